@@ -0,0 +1,202 @@
+import os, sys, io, json, wave, base64, hashlib, shutil
+
+# Build-time preprocessing: turns the raw assets into runtime-ready forms so the
+# app never decodes MP3s, splits GIFs or resizes PNGs while starting up or when
+# a timer expires. Outputs live under "prepared/" next to "assets/" and are
+# described by prepared/manifest.json; the app falls back to the raw files for
+# any entry that is missing or stale.
+MANIFEST_VERSION = 1
+PREPARED_DIR = "prepared"
+MANIFEST_NAME = PREPARED_DIR + "/manifest.json"
+
+# Mixer format sounds are rendered for; must match TibiaTimerApp.init_pygame
+MIXER_FREQUENCY = 44100
+MIXER_SIZE = -16
+MIXER_CHANNELS = 2
+MIXER_BUFFER = 512  # samples per mixer buffer (pygame's default)
+
+# Pre-sized variants of still images, by asset name
+IMAGE_SIZES = {
+    "assets/Transparentmage.png": [(94, 94)],
+}
+
+def sha1_bytes(data):
+    return hashlib.sha1(data).hexdigest()
+
+def image_key(name, size):
+    return f"{name}@{size[0]}x{size[1]}"
+
+def preprocess_assets(base_dir, frequency=MIXER_FREQUENCY, size=MIXER_SIZE, channels=MIXER_CHANNELS):
+    """
+    Convert base_dir/assets into base_dir/prepared and write the manifest.
+    Runs without a display or sound card (SDL's dummy audio driver).
+    """
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    from PIL import Image, ImageSequence
+
+    src_dir = os.path.join(base_dir, "assets")
+    out_dir = os.path.join(base_dir, PREPARED_DIR)
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    for sub in ("sounds", "frames", "images"):
+        os.makedirs(os.path.join(out_dir, sub))
+
+    pygame.mixer.init(frequency=frequency, size=size, channels=channels)
+    actual = pygame.mixer.get_init()
+    entries = {}
+    try:
+        for filename in sorted(os.listdir(src_dir)):
+            name = "assets/" + filename
+            with open(os.path.join(src_dir, filename), "rb") as f:
+                source = f.read()
+            stem, ext = os.path.splitext(filename)
+            ext = ext.lower()
+            if ext == ".mp3":
+                pcm = pygame.mixer.Sound(file=io.BytesIO(source)).get_raw()
+                output = f"{PREPARED_DIR}/sounds/{stem}.wav"
+                data = encode_wav(pcm, actual)
+                entries[name] = {
+                    "kind": "sound",
+                    "duration": len(pcm) / (actual[0] * actual[2] * (abs(actual[1]) // 8)),
+                }
+            elif ext == ".gif":
+                frames, durations = [], []
+                with Image.open(io.BytesIO(source)) as gif:
+                    for frame in ImageSequence.Iterator(gif):
+                        durations.append(frame.info.get("duration", 0))
+                        frames.append(frame.convert("RGBA"))
+                width, height = frames[0].size
+                strip = Image.new("RGBA", (width * len(frames), height))
+                for i, frame in enumerate(frames):
+                    strip.paste(frame, (i * width, 0))
+                output = f"{PREPARED_DIR}/frames/{stem}.png"
+                data = encode_png(strip)
+                entries[name] = {
+                    "kind": "frames",
+                    "frame_width": width,
+                    "frame_height": height,
+                    "count": len(frames),
+                    "durations": durations,
+                    "duration": sum(durations) / 1000.0,
+                }
+            else:
+                output = None
+            if output:
+                write_output(base_dir, output, data)
+                entries[name].update({"output": output, "source_sha1": sha1_bytes(source),
+                                      "sha1": sha1_bytes(data)})
+            for target in IMAGE_SIZES.get(name, []):
+                with Image.open(io.BytesIO(source)) as image:
+                    resized = image.convert("RGBA").resize(target, Image.Resampling.LANCZOS)
+                output = f"{PREPARED_DIR}/images/{stem}_{target[0]}x{target[1]}.png"
+                data = encode_png(resized)
+                write_output(base_dir, output, data)
+                entries[image_key(name, target)] = {
+                    "kind": "image", "output": output, "width": target[0], "height": target[1],
+                    "source_sha1": sha1_bytes(source), "sha1": sha1_bytes(data),
+                }
+    finally:
+        pygame.mixer.quit()
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "mixer": {"frequency": actual[0], "size": actual[1], "channels": actual[2]},
+        "entries": entries,
+    }
+    with open(os.path.join(base_dir, *MANIFEST_NAME.split("/")), "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    print(f"Prepared {len(entries)} assets into {out_dir}")
+    return out_dir
+
+def encode_wav(pcm, mixer_format):
+    frequency, size, channels = mixer_format
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(abs(size) // 8)
+        w.setframerate(frequency)
+        w.writeframes(pcm)
+    return buffer.getvalue()
+
+def encode_png(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+def write_output(base_dir, name, data):
+    with open(os.path.join(base_dir, *name.split("/")), "wb") as f:
+        f.write(data)
+
+# ================= Prepared Assets Class =================
+class PreparedAssets:
+    """
+    Runtime view of the manifest. lookup() returns an entry only while it is
+    fresh: the output exists with the recorded checksum and the source (when it
+    is still around to compare) hashes to what was preprocessed.
+    """
+    def __init__(self, assets):
+        self.assets = assets
+        self.manifest = None
+        self.checked = {}  # key -> entry or None
+        try:
+            if assets.exists(MANIFEST_NAME):
+                with assets.open(MANIFEST_NAME) as f:
+                    manifest = json.loads(f.read())
+                if manifest.get("version") == MANIFEST_VERSION:
+                    self.manifest = manifest
+                else:
+                    print("Asset manifest version mismatch, using raw assets")
+        except (OSError, ValueError) as e:
+            print(f"Could not read asset manifest, using raw assets: {e}")
+
+    def lookup(self, key):
+        if self.manifest is None:
+            return None
+        if key in self.checked:
+            return self.checked[key]
+        entry = self.manifest["entries"].get(key)
+        source = key.split("@", 1)[0]
+        try:
+            if entry is not None and (
+                    not self.assets.exists(entry["output"])
+                    or self.assets.digest(entry["output"]) != entry["sha1"]
+                    or (self.assets.exists(source) and self.assets.digest(source) != entry["source_sha1"])):
+                print(f"Prepared asset for {key} is stale, using raw file")
+                entry = None
+        except OSError as e:
+            print(f"Error checking prepared asset {key}: {e}")
+            entry = None
+        self.checked[key] = entry
+        return entry
+
+    def sound(self, name, mixer_format):
+        """
+        Name of the prepared PCM file for a sound asset, if usable with this
+        mixer format. With another format the raw file is decoded instead,
+        unless a pack left it out; then the WAV is converted while loading.
+        """
+        entry = self.lookup(name)
+        if entry is None or entry["kind"] != "sound":
+            return None
+        mixer = self.manifest["mixer"]
+        if (mixer["frequency"], mixer["size"], mixer["channels"]) != tuple(mixer_format) and self.assets.exists(name):
+            return None
+        return entry["output"]
+
+    def frames(self, name):
+        entry = self.lookup(name)
+        return entry if entry is not None and entry["kind"] == "frames" else None
+
+    def image(self, name, size):
+        entry = self.lookup(image_key(name, size))
+        return entry if entry is not None and entry["kind"] == "image" else None
+
+    def png_data(self, entry):
+        """Base64 PNG data for tk.PhotoImage(data=...)"""
+        with self.assets.open(entry["output"]) as f:
+            return base64.b64encode(f.read())
+
+if __name__ == "__main__":
+    # Usage: python asset_build.py [base_dir]   (base_dir contains the assets folder)
+    preprocess_assets(sys.argv[1] if len(sys.argv) > 1 else os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,160 @@
+import os, json, traceback
+import tkinter as tk
+
+# Bump whenever the on-disk layout or the conversion pipeline changes so stale
+# entries written by older builds are ignored instead of misread.
+CACHE_VERSION = 1
+
+# ================= Image Cache Class =================
+class ImageCache:
+    """
+    Versioned on-disk cache of pre-resized / pre-converted images.
+    Entries are keyed by the SHA-1 of the source asset and the target size, so
+    replacing an asset or changing a size simply produces a new entry. Loaded
+    PhotoImages are also shared in-process, so panels that show the same asset
+    (left and middle GIFs) hold a single copy of the pixels. Images produced by
+    the build-time preprocessing (PreparedAssets) are used before either.
+    """
+    def __init__(self, cache_root, assets, prepared=None):
+        self.assets = assets  # AssetSource the source images are read from
+        self.prepared = prepared
+        self.cache_dir = os.path.join(cache_root, f"images-v{CACHE_VERSION}")
+        self.loaded = {}  # cache key -> PhotoImage or list of PhotoImages
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError as e:
+            print(f"Image cache disabled: {e}")
+            self.cache_dir = None
+
+    def cache_key(self, name, size, kind):
+        size_part = f"{size[0]}x{size[1]}" if size else "orig"
+        entry = None
+        if self.prepared and not self.assets.exists(name):
+            # Packs leave out raw files that have a prepared form; the manifest still records their hash
+            entry = self.prepared.image(name, size) if kind == "img" and size else self.prepared.lookup(name)
+        digest = entry["source_sha1"] if entry is not None else self.assets.digest(name)
+        return f"{digest}_{size_part}_{kind}"
+
+    def entry_path(self, key, suffix):
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, key + suffix)
+
+    def get_image(self, name, size=None):
+        """Return a PhotoImage for the named asset, resized to size (w, h) with LANCZOS if given"""
+        key = self.cache_key(name, size, "img")
+        if key in self.loaded:
+            return self.loaded[key]
+        entry = self.prepared.image(name, size) if self.prepared and size else None
+        if entry is not None:
+            image = tk.PhotoImage(data=self.prepared.png_data(entry))
+            self.loaded[key] = image
+            return image
+        cached = self.entry_path(key, ".png")
+        if cached and os.path.exists(cached):
+            try:
+                # Tk decodes PNG natively, so a warm start never touches PIL
+                image = tk.PhotoImage(file=cached)
+                self.loaded[key] = image
+                return image
+            except tk.TclError as e:
+                print(f"Discarding unreadable cache entry {cached}: {e}")
+        # PIL is only imported on a cold cache
+        from PIL import Image
+        with self.assets.open(name) as f:
+            pil_image = Image.open(f)
+            pil_image.load()
+        if size:
+            pil_image = pil_image.resize(size, Image.Resampling.LANCZOS)
+        pil_image = pil_image.convert("RGBA")
+        self.write_png(pil_image, cached)
+        image = self.photo_from_pil(pil_image)
+        self.loaded[key] = image
+        return image
+
+    def get_frames(self, name, size=None):
+        """
+        Return the frames of an animated image as a list of PhotoImages.
+        Frames are cached as one horizontal strip plus a small JSON sidecar.
+        """
+        key = self.cache_key(name, size, "frames")
+        if key in self.loaded:
+            return self.loaded[key]
+        entry = self.prepared.frames(name) if self.prepared and not size else None
+        if entry is not None:
+            frames = self.split_strip(tk.PhotoImage(data=self.prepared.png_data(entry)),
+                                      entry["frame_width"], entry["frame_height"], entry["count"])
+            self.loaded[key] = frames
+            return frames
+        strip_path = self.entry_path(key, ".png")
+        meta_path = self.entry_path(key, ".json")
+        if strip_path and os.path.exists(strip_path) and os.path.exists(meta_path):
+            try:
+                with open(meta_path, "r") as f:
+                    meta = json.load(f)
+                frames = self.split_strip(tk.PhotoImage(file=strip_path),
+                                          meta["frame_width"], meta["frame_height"], meta["count"])
+                self.loaded[key] = frames
+                return frames
+            except (tk.TclError, OSError, ValueError, KeyError) as e:
+                print(f"Discarding unreadable cache entry {strip_path}: {e}")
+        from PIL import Image, ImageSequence
+        pil_frames = []
+        with self.assets.open(name) as f, Image.open(f) as source:
+            for frame in ImageSequence.Iterator(source):
+                frame = frame.convert("RGBA")
+                if size:
+                    frame = frame.resize(size, Image.Resampling.LANCZOS)
+                pil_frames.append(frame)
+        width, height = pil_frames[0].size
+        strip = Image.new("RGBA", (width * len(pil_frames), height))
+        for i, frame in enumerate(pil_frames):
+            strip.paste(frame, (i * width, 0))
+        if self.write_png(strip, strip_path):
+            try:
+                with open(meta_path, "w") as f:
+                    json.dump({"frame_width": width, "frame_height": height,
+                               "count": len(pil_frames)}, f)
+            except OSError as e:
+                print(f"Could not write cache metadata {meta_path}: {e}")
+        frames = [self.photo_from_pil(frame) for frame in pil_frames]
+        self.loaded[key] = frames
+        return frames
+
+    def split_strip(self, strip, width, height, count):
+        frames = []
+        for i in range(count):
+            frame = tk.PhotoImage(width=width, height=height)
+            frame.tk.call(frame, "copy", strip, "-from", i * width, 0, (i + 1) * width, height)
+            frames.append(frame)
+        return frames
+
+    def photo_from_pil(self, pil_image):
+        from PIL import ImageTk
+        return ImageTk.PhotoImage(pil_image)
+
+    def write_png(self, pil_image, cached):
+        if not cached:
+            return False
+        tmp_path = cached + ".tmp"
+        try:
+            pil_image.save(tmp_path, format="PNG")
+            os.replace(tmp_path, cached)
+            return True
+        except OSError as e:
+            print(f"Could not write image cache entry {cached}: {e}")
+            traceback.print_exc()
+            return False
+
+    def memory_usage(self):
+        """Approximate bytes of pixel data held by loaded images (Tk stores 4 bytes per pixel)"""
+        total = 0
+        seen = set()
+        for value in self.loaded.values():
+            images = value if isinstance(value, list) else [value]
+            for image in images:
+                if id(image) in seen:
+                    continue
+                seen.add(id(image))
+                total += image.width() * image.height() * 4
+        return total
@@ -0,0 +1,225 @@
+import os, sys, io, json, mmap, struct, hashlib
+
+from asset_build import MANIFEST_NAME
+
+# Pack layout:
+#   MAGIC | u32 version | u32 index length | JSON index | padding | asset data ...
+# The index maps each asset name ("assets/chime.mp3") to its absolute offset,
+# size and SHA-1, so readers can slice the memory map without scanning.
+PACK_MAGIC = b"TTPK"
+PACK_VERSION = 1
+PACK_NAME = "assets.pak"
+HEADER = struct.Struct("<4sII")
+DATA_ALIGN = 16
+
+def build_pack(src_dirs, out_path, base_dir=None):
+    """
+    Pack every file under src_dirs (one folder or a list) into a single indexed
+    archive at out_path. Names are stored relative to base_dir (defaults to the
+    first folder's parent) with forward slashes, matching the names the app
+    asks for at runtime. Raw files that a packed manifest has a fresh prepared
+    form of are left out (see superseded_sources).
+    """
+    if isinstance(src_dirs, str):
+        src_dirs = [src_dirs]
+    base_dir = base_dir or os.path.dirname(os.path.abspath(src_dirs[0]))
+    entries = []
+    for src_dir in src_dirs:
+        for folder, _dirs, files in os.walk(src_dir):
+            for filename in files:
+                full_path = os.path.join(folder, filename)
+                name = os.path.relpath(full_path, base_dir).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    data = f.read()
+                entries.append((name, data))
+    superseded = superseded_sources(entries)
+    if superseded:
+        entries = [entry for entry in entries if entry[0] not in superseded]
+        print(f"Leaving out {len(superseded)} raw assets replaced by prepared files")
+    entries.sort(key=lambda entry: entry[0])
+
+    # Offsets depend on the index length, which depends on the offsets' digits,
+    # so lay out twice: the second pass uses the final index size.
+    index_len = 0
+    for _ in range(2):
+        offset = align(HEADER.size + index_len)
+        index = {}
+        for name, data in entries:
+            index[name] = {"offset": offset, "size": len(data),
+                           "sha1": hashlib.sha1(data).hexdigest()}
+            offset = align(offset + len(data))
+        index_bytes = json.dumps(index, separators=(",", ":")).encode("utf-8")
+        if len(index_bytes) == index_len:
+            break
+        index_len = len(index_bytes)
+
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    os.makedirs(out_dir, exist_ok=True)
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(PACK_MAGIC, PACK_VERSION, len(index_bytes)))
+        f.write(index_bytes)
+        for name, data in entries:
+            f.write(b"\0" * (index[name]["offset"] - f.tell()))
+            f.write(data)
+    os.replace(tmp_path, out_path)
+    print(f"Packed {len(entries)} assets into {out_path}")
+    return out_path
+
+def superseded_sources(entries):
+    """
+    Names of raw assets among entries whose prepared output is also packed and
+    was made from exactly these bytes. PreparedAssets treats a missing source
+    as fresh, so the app never needs them (images are only shown at the sizes
+    asset_build.IMAGE_SIZES prepares).
+    """
+    data = dict(entries)
+    if MANIFEST_NAME not in data:
+        return set()
+    try:
+        manifest = json.loads(data[MANIFEST_NAME])
+    except ValueError as e:
+        print(f"Packing all raw assets, unreadable manifest: {e}")
+        return set()
+    superseded = set()
+    for key, entry in manifest.get("entries", {}).items():
+        name = key.split("@", 1)[0]  # image variants are keyed name@WxH
+        output = data.get(entry.get("output"))
+        if (name in data and output is not None
+                and hashlib.sha1(output).hexdigest() == entry.get("sha1")
+                and hashlib.sha1(data[name]).hexdigest() == entry.get("source_sha1")):
+            superseded.add(name)
+    return superseded
+
+def align(offset):
+    return (offset + DATA_ALIGN - 1) // DATA_ALIGN * DATA_ALIGN
+
+# ================= View Reader Class =================
+class ViewReader(io.RawIOBase):
+    """
+    Read-only, seekable file object over a memoryview. Nothing is copied until
+    the consumer reads, and then only the bytes it asks for.
+    """
+    def __init__(self, view, name=""):
+        self.view = view
+        self.name = name
+        self.pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = min(len(buffer), len(self.view) - self.pos)
+        if count <= 0:
+            return 0
+        buffer[:count] = self.view[self.pos:self.pos + count]
+        self.pos += count
+        return count
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.pos = offset
+        elif whence == io.SEEK_CUR:
+            self.pos += offset
+        elif whence == io.SEEK_END:
+            self.pos = len(self.view) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        self.pos = max(0, self.pos)
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+# ================= Asset Pack Class =================
+class AssetPack:
+    """Memory-mapped asset archive written by build_pack"""
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, index_len = HEADER.unpack_from(self.map, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError(f"{path} is not a version {PACK_VERSION} asset pack")
+        self.index = json.loads(bytes(self.map[HEADER.size:HEADER.size + index_len]))
+        self.buffer = memoryview(self.map)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def names(self):
+        return list(self.index)
+
+    def view(self, name):
+        """Zero-copy memoryview of an asset's bytes"""
+        entry = self.index[name]
+        return self.buffer[entry["offset"]:entry["offset"] + entry["size"]]
+
+    def digest(self, name):
+        return self.index[name]["sha1"]
+
+# ================= Asset Source Class =================
+class AssetSource:
+    """
+    Single way to reach bundled assets, replacing resource_path. Uses the
+    packed archive when one sits next to the program (frozen build, or a dev
+    tree after running this module) and loose files under base_path otherwise.
+    """
+    def __init__(self, base_path, extract_dir=None):
+        self.base_path = base_path
+        self.extract_dir = extract_dir
+        self.pack = None
+        pack_path = os.path.join(base_path, PACK_NAME)
+        if os.path.exists(pack_path):
+            try:
+                self.pack = AssetPack(pack_path)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring asset pack {pack_path}: {e}")
+
+    def loose_path(self, name):
+        return os.path.join(self.base_path, *name.split("/"))
+
+    def exists(self, name):
+        if self.pack is not None:
+            return name in self.pack
+        return os.path.exists(self.loose_path(name))
+
+    def open(self, name):
+        """Binary file object for an asset"""
+        if self.pack is not None:
+            return ViewReader(self.pack.view(name), name)
+        return open(self.loose_path(name), "rb")
+
+    def digest(self, name):
+        """SHA-1 of an asset (read from the pack index when packed)"""
+        if self.pack is not None:
+            return self.pack.digest(name)
+        h = hashlib.sha1()
+        with open(self.loose_path(name), "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def path(self, name):
+        """
+        Real filesystem path for APIs that only take filenames (e.g. iconbitmap).
+        Packed assets are extracted once into extract_dir on first use.
+        """
+        if self.pack is None:
+            return self.loose_path(name)
+        target = os.path.join(self.extract_dir or self.base_path, *name.split("/"))
+        view = self.pack.view(name)
+        if not os.path.exists(target) or os.path.getsize(target) != len(view):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(view)
+        return target
+
+if __name__ == "__main__":
+    # Usage: python asset_pack.py [output_pack] [asset_dir ...]
+    output = sys.argv[1] if len(sys.argv) > 1 else os.path.join("build", PACK_NAME)
+    sources = sys.argv[2:] or [d for d in ("assets", "prepared") if os.path.isdir(d)]
+    build_pack(sources, output)
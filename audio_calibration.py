@@ -0,0 +1,392 @@
+import os, sys, json, math, time, array, random, argparse, tempfile, threading, statistics
+
+from asset_build import MIXER_FREQUENCY, MIXER_SIZE, MIXER_CHANNELS, MIXER_BUFFER
+from timer_core import get_settings_path
+from io_worker import write_file_atomic
+
+# Picks the mixer buffer size on the real output device. Latency is measured
+# by loopback: short clicks are played through the mixer and recorded from a
+# capture device that hears the output. That is best a loopback or monitor
+# source ("Monitor of ..." on PulseAudio, "Stereo Mix" on Windows), but a
+# microphone next to the speakers also works. The time from play() until a
+# click arrives in the recording is the round trip. It includes the input
+# side, so it is an upper bound on the output latency. Next, a steady tone
+# plays while a Python busy loop keeps the CPU loaded, as the UI would.
+# Gaps of silence in the recorded tone count as underruns. The smallest
+# buffer without underruns wins, and its round trip becomes
+# "output_latency_ms" (used to start ready sounds early).
+#
+# --simulate runs the same clicks through SDL's disk driver, which writes the
+# mixed output to a file at playback speed, instead of a device. It only
+# exercises the method and its numbers are never saved.
+#
+#     python tibia_timer.py --calibrate-audio
+#     python audio_calibration.py --capture "Monitor of Built-in Audio" --buffers 256,512,1024
+#     python audio_calibration.py --simulate --no-save
+CANDIDATE_BUFFERS = (128, 256, 512, 1024, 2048)
+TRIALS = 12
+CAPTURE_CHUNK = 256
+LOOPBACK_HINTS = ("monitor", "loopback", "stereo mix", "what u hear", "wave out")
+TONE_HZ = 440.0
+TONE_SECONDS = 1.5
+MAX_ROUND_TRIP = 0.5   # a click heard later than this after play() is not that click
+DROPOUT_WINDOW = 0.001  # recorded tone is checked for silence in 1 ms windows
+POLL_INTERVAL = 0.0002
+UNDERRUN_BUFFERS = 3.0  # simulated: an output pause this many buffers longer than expected is an underrun
+
+def make_click(channels, frames=4, amplitude=30000):
+    import pygame
+    return pygame.mixer.Sound(buffer=array.array("h", [amplitude] * channels * frames + [0] * channels * 64).tobytes())
+
+def make_tone(frequency, channels, seconds=TONE_SECONDS, amplitude=12000):
+    import pygame
+    samples = array.array("h")
+    for i in range(int(seconds * frequency)):
+        samples.extend([int(amplitude * math.sin(2 * math.pi * TONE_HZ * i / frequency))] * channels)
+    return pygame.mixer.Sound(buffer=samples.tobytes())
+
+def busy_load(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(2000))
+
+def find_clicks(samples, channels, count, threshold=16000, min_gap=1):
+    """Frame numbers where each click starts; louder frames closer than min_gap belong to the same click"""
+    frames = []
+    last_loud = None
+    for i in range(0, len(samples) - channels + 1, channels):
+        if abs(samples[i]) > threshold:
+            frame = i // channels
+            if last_loud is None or frame - last_loud > min_gap:
+                frames.append(frame)
+                if len(frames) == count:
+                    break
+            last_loud = frame
+    return frames
+
+# ---------------- Loopback Measurement ----------------
+def capture_devices():
+    from pygame._sdl2 import audio
+    return list(audio.get_audio_device_names(True))
+
+def pick_capture_device(names):
+    """A loopback/monitor source if there is one, otherwise the first capture device"""
+    for name in names:
+        if any(hint in name.lower() for hint in LOOPBACK_HINTS):
+            return name
+    return names[0] if names else None
+
+class Recorder:
+    """Mono 16-bit capture that remembers when each chunk arrived"""
+    def __init__(self, device, frequency):
+        from pygame._sdl2 import audio
+        self.chunks = []  # (arrival time, samples)
+        self.device = audio.AudioDevice(devicename=device, iscapture=True, frequency=frequency,
+                                        audioformat=audio.AUDIO_S16, numchannels=1, chunksize=CAPTURE_CHUNK,
+                                        allowed_changes=0, callback=self.callback)
+        self.frequency = self.device.frequency
+
+    def callback(self, device, memory):
+        samples = array.array("h")
+        samples.frombytes(bytes(memory))
+        self.chunks.append((time.monotonic(), samples))
+
+    def start(self):
+        self.device.pause(0)
+
+    def stop(self):
+        self.device.pause(1)
+        self.device.close()
+
+    def samples(self):
+        joined = array.array("h")
+        for _, samples in self.chunks:
+            joined.extend(samples)
+        return joined
+
+    def frame_time(self, frame):
+        """When recorded frame arrived: its chunk's callback time, less the frames after it in the chunk"""
+        start = 0
+        for arrived, samples in self.chunks:
+            if frame < start + len(samples):
+                return arrived - (start + len(samples) - frame) / self.frequency
+            start += len(samples)
+        return None
+
+    def first_frame_after(self, when):
+        start = 0
+        for arrived, samples in self.chunks:
+            if arrived >= when:
+                return start
+            start += len(samples)
+        return start
+
+def count_dropouts(samples, frequency, begin, end):
+    """Runs of silent windows inside the recorded tone between frames begin and end"""
+    window = max(1, int(frequency * DROPOUT_WINDOW))
+    peaks = [max(abs(value) for value in samples[i:i + window]) for i in range(begin, end - window + 1, window)]
+    if not peaks:
+        return 0, 0
+    level = sorted(peaks)[len(peaks) // 2]
+    loud = [i for i, peak in enumerate(peaks) if peak > level / 2]
+    if not loud or level < 200:
+        return 0, 0  # the tone never reached the recording
+    dropouts, silent = 0, 0
+    for peak in peaks[loud[0]:loud[-1] + 1]:
+        if peak < level / 10:
+            silent += 1
+        else:
+            dropouts += silent > 0
+            silent = 0
+    return dropouts, level
+
+def measure_loopback(buffer, trials=TRIALS, capture=None, frequency=MIXER_FREQUENCY, load=True):
+    """Round-trip latency and underruns for one buffer size on the real device; returns a dict of results"""
+    import pygame
+    pygame.mixer.init(frequency=frequency, size=MIXER_SIZE, channels=MIXER_CHANNELS, buffer=buffer)
+    actual_frequency, size, channels = pygame.mixer.get_init()
+    recorder = Recorder(capture, actual_frequency)
+    click = make_click(channels)
+    tone = make_tone(actual_frequency, channels)
+    stop = threading.Event()
+    loader = threading.Thread(target=busy_load, args=(stop,), daemon=True)
+    played = []
+    try:
+        recorder.start()
+        time.sleep(0.3)  # let both streams settle; this stretch is the noise floor
+        quiet_until = time.monotonic()
+        if load:
+            loader.start()
+        for _ in range(trials):
+            time.sleep(random.uniform(0.15, 0.25))  # longer than room echo, random phase against the buffer
+            played.append(time.monotonic())
+            click.play()
+        time.sleep(MAX_ROUND_TRIP)
+        tone_at = time.monotonic()
+        tone.play()
+        time.sleep(TONE_SECONDS + MAX_ROUND_TRIP)
+    finally:
+        stop.set()
+        if loader.is_alive():
+            loader.join(1.0)
+        recorder.stop()
+        pygame.mixer.quit()
+
+    samples = recorder.samples()
+    quiet_end = recorder.first_frame_after(quiet_until)
+    clicks_end = recorder.first_frame_after(tone_at)
+    noise = max((abs(value) for value in samples[:quiet_end]), default=0)
+    peak = max((abs(value) for value in samples[quiet_end:clicks_end]), default=0)
+    latencies = []
+    if peak > 3 * noise + 500:  # the clicks are audible above the noise floor
+        threshold = noise + (peak - noise) / 2
+        heard = find_clicks(samples[quiet_end:clicks_end], 1, trials * 4, threshold, int(0.05 * actual_frequency))
+        times = [recorder.frame_time(quiet_end + frame) for frame in heard]
+        for played_at in played:
+            match = [when for when in times if when is not None and played_at < when < played_at + MAX_ROUND_TRIP]
+            if match:
+                latencies.append((match[0] - played_at) * 1000.0)
+    underruns, level = count_dropouts(samples, actual_frequency, clicks_end, len(samples))
+    return {
+        "buffer": buffer,
+        "frequency": actual_frequency,
+        "capture": capture,
+        "clicks_found": len(latencies),
+        "latency_ms": statistics.median(latencies) if latencies else None,
+        "max_latency_ms": max(latencies) if latencies else None,
+        "underruns": underruns if level else None,
+    }
+
+# ---------------- Simulated Measurement ----------------
+def output_rate(jumps, frequency):
+    """Frames per second the output file actually grows by (the disk driver rounds its sleep to whole ms)"""
+    jumps = [(when, written) for when, written in jumps if written > 0]
+    if len(jumps) >= 2:
+        (t0, w0), (t1, w1) = jumps[0], jumps[-1]
+        if t1 > t0 and w1 > w0:
+            return (w1 - w0) / (t1 - t0)
+    return float(frequency)
+
+def output_time(jumps, frame, buffer, rate):
+    """
+    When the file grew past the buffer holding frame, less the frames written
+    after that buffer in the same flush (one flush of the C library's write
+    buffer can carry several mixer buffers). The flush itself may still come a
+    write later; measure_simulated takes that lag out.
+    """
+    end = (frame // buffer + 1) * buffer
+    for when, written in jumps:
+        if written >= end:
+            return when - (written - end) / rate
+    return None
+
+def measure_simulated(buffer, trials=TRIALS, frequency=MIXER_FREQUENCY, load=True):
+    """The click method on SDL's disk driver: scheduling-to-mixed-output delay, no device involved"""
+    out_path = os.path.join(tempfile.mkdtemp(prefix="tt-audio-"), "output.raw")
+    os.environ["SDL_AUDIODRIVER"] = "disk"
+    os.environ["SDL_DISKAUDIOFILE"] = out_path
+    import pygame
+    pygame.mixer.init(frequency=frequency, size=MIXER_SIZE, channels=MIXER_CHANNELS, buffer=buffer)
+    actual_frequency, size, channels = pygame.mixer.get_init()
+    frame_bytes = channels * abs(size) // 8
+    click = make_click(channels)
+
+    jumps = []  # (time, frames written) whenever the output file grows
+    stop = threading.Event()
+    def poll():
+        last = -1
+        while not stop.is_set():
+            try:
+                written = os.path.getsize(out_path) // frame_bytes
+            except OSError:
+                written = 0
+            if written != last:
+                jumps.append((time.monotonic(), written))
+                last = written
+            time.sleep(POLL_INTERVAL)
+    threads = [threading.Thread(target=poll, daemon=True)]
+    if load:
+        threads.append(threading.Thread(target=busy_load, args=(stop,), daemon=True))
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(POLL_INTERVAL)  # the load thread would otherwise delay each poll by up to 5 ms
+    for thread in threads:
+        thread.start()
+
+    played = []
+    try:
+        time.sleep(0.2)  # let the stream settle
+        for _ in range(trials):
+            # Random phase against the buffer period, and never two clicks in one buffer
+            time.sleep(buffer / actual_frequency + random.uniform(0.03, 0.08))
+            before = time.monotonic()
+            click.play()
+            played.append((before, time.monotonic()))
+        time.sleep(0.3 + 4 * buffer / actual_frequency)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join(1.0)
+        sys.setswitchinterval(switch_interval)
+        pygame.mixer.quit()
+
+    with open(out_path, "rb") as f:
+        data = f.read()
+    os.remove(out_path)
+    os.rmdir(os.path.dirname(out_path))
+    samples = array.array("h")
+    samples.frombytes(data[:len(data) - len(data) % 2])
+    clicks = find_clicks(samples, channels, trials)
+    rate = output_rate(jumps, actual_frequency)
+    heard = [(played_at, returned, output_time(jumps, frame, buffer, rate))
+             for (played_at, returned), frame in zip(played, clicks)]
+    heard = [entry for entry in heard if entry[2] is not None]
+    # The buffer before each click was mixed before play() returned, or the click
+    # would be in it; a flush that came a write late shows up as a break of that
+    lag = max([0.0] + [written_at - buffer / rate - returned for _, returned, written_at in heard])
+    latencies = [max(0.0, (written_at - lag - played_at) * 1000.0) for played_at, _, written_at in heard]
+    # Output normally grows in steady steps; a much longer pause means the mixer fell behind
+    gaps = [t1 - t0 for (t0, _), (t1, _) in zip(jumps[1:], jumps[2:])]
+    step = statistics.median(gaps) if gaps else 0.0
+    underruns = sum(1 for gap in gaps if gap > step + UNDERRUN_BUFFERS * buffer / actual_frequency)
+    return {
+        "buffer": buffer,
+        "frequency": actual_frequency,
+        "capture": None,
+        "clicks_found": len(clicks),
+        "latency_ms": statistics.median(latencies) if latencies else None,
+        "max_latency_ms": max(latencies) if latencies else None,
+        "underruns": underruns,
+    }
+
+def calibrate(buffers=CANDIDATE_BUFFERS, trials=TRIALS, load=True, capture=None, simulate=False):
+    """
+    Measure every candidate; returns (chosen result or None, all results).
+    A buffer qualifies with no underruns and at least three quarters of its clicks heard.
+    """
+    results = []
+    for buffer in sorted(buffers):
+        if simulate:
+            result = measure_simulated(buffer, trials, load=load)
+        else:
+            result = measure_loopback(buffer, trials, capture, load=load)
+        results.append(result)
+        print(f"buffer {buffer:>5}: latency {format_ms(result['latency_ms'])} median, "
+              f"{format_ms(result['max_latency_ms'])} max, "
+              f"{'-' if result['underruns'] is None else result['underruns']} underruns, "
+              f"{result['clicks_found']}/{trials} clicks found")
+    usable = [result for result in results
+              if result["underruns"] == 0 and result["latency_ms"] is not None
+              and result["clicks_found"] * 4 >= trials * 3]
+    return (usable[0] if usable else None), results
+
+def format_ms(value):
+    return "-" if value is None else f"{value:6.1f} ms"
+
+def save_audio_settings(chosen, path=None):
+    """Store the chosen buffer and its latency in the "audio" settings section"""
+    path = path or get_settings_path()
+    settings = {}
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            settings = json.load(f)
+    settings["audio"] = dict(settings.get("audio", {}), buffer=chosen["buffer"],
+                             output_latency_ms=round(chosen["latency_ms"], 1),
+                             calibrated=time.strftime("%Y-%m-%d %H:%M:%S"),
+                             capture=chosen["capture"])
+    write_file_atomic(path, json.dumps(settings, indent=4))
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibrate the audio buffer size and output latency")
+    parser.add_argument("--buffers", default=",".join(str(buffer) for buffer in CANDIDATE_BUFFERS),
+                        help="comma separated buffer sizes (samples) to try")
+    parser.add_argument("--trials", type=int, default=TRIALS, help="clicks per buffer size")
+    parser.add_argument("--capture", help="capture device that hears the output (default: a loopback/monitor source)")
+    parser.add_argument("--list-devices", action="store_true", help="print the capture devices and exit")
+    parser.add_argument("--simulate", action="store_true",
+                        help="measure on SDL's disk driver instead of the device (never saved)")
+    parser.add_argument("--no-load", action="store_true", help="measure without the CPU load thread")
+    parser.add_argument("--no-save", action="store_true", help="only print the results")
+    parser.add_argument("--json", help="also write all results to this file")
+    args = parser.parse_args(argv)
+    try:
+        buffers = [int(buffer) for buffer in args.buffers.split(",") if buffer.strip()]
+    except ValueError:
+        parser.error("--buffers takes whole numbers, e.g. 256,512,1024")
+
+    capture = None
+    if not args.simulate:
+        import pygame
+        pygame.mixer.init(frequency=MIXER_FREQUENCY, size=MIXER_SIZE, channels=MIXER_CHANNELS, buffer=MIXER_BUFFER)
+        try:
+            devices = capture_devices()
+        finally:
+            pygame.mixer.quit()
+        if args.list_devices:
+            print("\n".join(devices) if devices else "No capture devices")
+            return 0
+        if args.capture and args.capture not in devices:
+            parser.error(f"no capture device {args.capture!r}; --list-devices shows them")
+        capture = args.capture or pick_capture_device(devices)
+        if capture is None:
+            print("No capture device to hear the output with; the latency cannot be measured on this device. "
+                  "Enable a loopback/monitor source (or plug in a microphone) and run again.")
+            return 1
+        print(f"Recording the output through {capture!r}")
+
+    chosen, results = calibrate(buffers, args.trials, load=not args.no_load, capture=capture, simulate=args.simulate)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"chosen": chosen, "results": results, "simulated": args.simulate}, f, indent=2)
+    if chosen is None:
+        print("No buffer size played without underruns and with the clicks heard; nothing saved")
+        return 1
+    print(f"Chosen buffer: {chosen['buffer']} samples, output latency {format_ms(chosen['latency_ms']).strip()}"
+          + (" (round trip, an upper bound)" if not args.simulate else ""))
+    if args.simulate:
+        print("Simulated results describe the disk driver, not a device; not saved")
+    elif not args.no_save:
+        print(f"Saved to {save_audio_settings(chosen)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
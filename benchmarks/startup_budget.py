@@ -0,0 +1,349 @@
+"""
+Startup time and memory budget.
+
+Launches the app in fresh child processes under controlled conditions: an
+empty temporary data folder (so no saved settings, journal or caches), SDL
+dummy audio, and on Linux without a display a virtual X server (Xvfb).
+Each child reports, measured from just before the process was spawned:
+
+  import_ms        the app module imported (Tk, ttkbootstrap, pygame, PIL, ...)
+  first_paint_ms   the first Expose event of the main window
+  start_usable_ms  the Start button is enabled and mapped, and the preloaded
+                   sounds are decoded and the I/O queue is empty
+  peak_rss_mb      peak resident memory up to the end of the settle period
+  steady_rss_mb    resident memory after the settle period
+  threads          OS threads after the settle period
+
+The headless mode measures the same for the Tk-free core (first paint is
+the first status line; the keyboard listener is not started).
+
+Medians over --runs launches are compared against the baseline file, which
+holds one entry per platform and mode. A metric that is more than --budget
+percent (plus a small absolute slack) worse than its baseline fails the run
+with exit status 1. There is no bundled baseline: numbers only mean
+something on the machine they were taken on, so record one first.
+
+    python benchmarks/startup_budget.py --update-baseline
+    python benchmarks/startup_budget.py
+    python benchmarks/startup_budget.py --modes headless --runs 10 --budget 10
+"""
+import os, sys, json, time, shutil, argparse, tempfile, platform, statistics, subprocess, threading
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_baseline.json")
+RESULT_PREFIX = "STARTUP_RESULT "
+MODES = ("gui", "headless")
+RUNS = 5
+SETTLE = 3.0
+BUDGET_PERCENT = 15.0
+CHILD_TIMEOUT = 60.0
+POLL_MS = 5
+# Absolute slack on top of the percentage, so a 4 ms phase turning into 5 ms is not a failure
+METRICS = {
+    "import_ms": 10.0,
+    "first_paint_ms": 10.0,
+    "start_usable_ms": 10.0,
+    "peak_rss_mb": 1.0,
+    "steady_rss_mb": 1.0,
+    "threads": 0,
+}
+
+# ================= Child Side =================
+def since_launch():
+    return (time.time() - float(os.environ["STARTUP_BENCH_T0"])) * 1000.0
+
+def peak_rss():
+    """Peak resident set size of this process in bytes, or None"""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+        return None
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, KB elsewhere
+
+def thread_count():
+    """OS threads of this process (audio, Tk and library threads included where visible)"""
+    try:
+        return len(os.listdir("/proc/self/task"))
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().num_threads()
+    except ImportError:
+        return threading.active_count()
+
+def finish(result):
+    from timer_core import get_process_rss
+    result["steady_rss_mb"] = (get_process_rss() or 0) / 1048576
+    result["peak_rss_mb"] = (peak_rss() or 0) / 1048576
+    result["threads"] = thread_count()
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+
+def child_gui(settle):
+    result = {}
+    import tibia_timer
+    import ttkbootstrap as ttk
+    result["import_ms"] = since_launch()
+    root = ttk.Window(themename="darkly")
+    root.geometry("1220x400")
+    state = {"app": None}
+
+    def on_expose(event):
+        if "first_paint_ms" not in result:
+            result["first_paint_ms"] = since_launch()
+            root.after(POLL_MS, check_usable)
+    # Every widget's bindtags include its toplevel, so this sees the first paint of any of them
+    root.bind("<Expose>", on_expose, add="+")
+
+    def check_usable():
+        app = state["app"]
+        button = app.start_stop_btn
+        if (button.winfo_viewable() and button.instate(["!disabled"])
+                and not app.sound_loading and app.io_worker.stats()["depth"] == 0):
+            result["start_usable_ms"] = since_launch()
+            root.after(int(settle * 1000), settled)
+        else:
+            root.after(POLL_MS, check_usable)
+
+    def settled():
+        finish(result)
+        os._exit(0)  # the temporary data folder is thrown away, so skip on_closing
+
+    state["app"] = tibia_timer.TibiaTimerApp(root)
+    result["construct_ms"] = since_launch()
+    root.mainloop()
+
+def child_headless(settle):
+    import io
+    result = {}
+    import headless
+    from timer_core import get_settings_path
+    result["import_ms"] = since_launch()
+    timer = headless.HeadlessTimer(get_settings_path(), sound=True, out=io.StringIO(), control_port=0)
+    result["construct_ms"] = since_launch()
+    timer.init_audio()
+    result["start_usable_ms"] = since_launch()
+    timer.render(time.monotonic())
+    result["first_paint_ms"] = since_launch()
+    end = time.monotonic() + settle
+    while time.monotonic() < end:
+        delay = timer.process(time.monotonic())  # None while no timer runs
+        timer.render(time.monotonic())
+        remaining = max(0.0, end - time.monotonic())
+        timer.wakeup.wait(remaining if delay is None else min(delay, remaining))
+        timer.wakeup.clear()
+    finish(result)
+
+# ================= Launcher =================
+class VirtualDisplay:
+    """An Xvfb server for the GUI runs when Linux has no display"""
+    def __init__(self):
+        self.process = None
+        self.display = None
+
+    def start(self):
+        xvfb = shutil.which("Xvfb")
+        if not xvfb:
+            return None
+        for number in range(99, 120):
+            if os.path.exists(f"/tmp/.X11-unix/X{number}") or os.path.exists(f"/tmp/.X{number}-lock"):
+                continue
+            self.process = subprocess.Popen([xvfb, f":{number}", "-screen", "0", "1600x900x24", "-nolisten", "tcp"],
+                                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            deadline = time.monotonic() + 5.0
+            while time.monotonic() < deadline:
+                if os.path.exists(f"/tmp/.X11-unix/X{number}"):
+                    self.display = f":{number}"
+                    return self.display
+                if self.process.poll() is not None:
+                    break
+                time.sleep(0.05)
+            self.stop()
+        return None
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(5.0)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+
+def has_display():
+    if sys.platform in ("win32", "darwin"):
+        return True
+    return bool(os.environ.get("DISPLAY"))
+
+def launch(mode, settle, display=None):
+    """Run one child and return its result dict (raises RuntimeError if it reports nothing)"""
+    data_dir = tempfile.mkdtemp(prefix="tt-startup-")
+    env = dict(os.environ)
+    env.update({
+        "APPDATA": data_dir,
+        "XDG_DATA_HOME": data_dir,
+        "SDL_AUDIODRIVER": "dummy",
+        "PYTHONDONTWRITEBYTECODE": "1",
+    })
+    if display:
+        env["DISPLAY"] = display
+    command = [sys.executable, os.path.abspath(__file__), "--child", mode, "--settle", str(settle)]
+    try:
+        env["STARTUP_BENCH_T0"] = repr(time.time())
+        completed = subprocess.run(command, env=env, cwd=REPO_DIR, capture_output=True, text=True,
+                                   timeout=CHILD_TIMEOUT + settle)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"{mode} run did not finish within {CHILD_TIMEOUT + settle:.0f} s")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    output = (completed.stdout + completed.stderr).strip().splitlines()
+    raise RuntimeError(f"{mode} run exited with {completed.returncode} without a result:\n  "
+                       + "\n  ".join(output[-15:]))
+
+def measure(mode, runs, settle, display=None):
+    """Median of every metric over runs launches (one warm-up launch first)"""
+    launch(mode, settle=0.0, display=display)  # warm the OS file cache and __pycache__
+    samples = []
+    for _ in range(runs):
+        samples.append(launch(mode, settle, display))
+    return {metric: statistics.median(sample[metric] for sample in samples)
+            for metric in METRICS if all(metric in sample for sample in samples)}
+
+# ================= Baseline =================
+def baseline_key(mode):
+    return f"{sys.platform}/{mode}"
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+def save_baseline(path, baseline):
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def compare(metrics, reference, budget):
+    """Rows of (metric, baseline, current, change %, failed)"""
+    rows = []
+    for metric, slack in METRICS.items():
+        if metric not in metrics or metric not in reference:
+            continue
+        base, current = reference[metric], metrics[metric]
+        change = (current - base) / base * 100.0 if base else 0.0
+        failed = current > base * (1 + budget / 100.0) + slack
+        rows.append((metric, base, current, change, failed))
+    return rows
+
+def format_value(metric, value):
+    if metric == "threads":
+        return f"{value:g}"
+    return f"{value:.1f}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Startup time and memory regression budget")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma separated: gui, headless")
+    parser.add_argument("--runs", type=int, default=RUNS, help="launches per mode (medians are compared)")
+    parser.add_argument("--settle", type=float, default=SETTLE, help="seconds to idle before the steady-state sample")
+    parser.add_argument("--budget", type=float, default=BUDGET_PERCENT, help="allowed regression in percent")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--json", help="also write the measured medians to this file")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child == "gui":
+        child_gui(args.settle)
+        return 0
+    if args.child == "headless":
+        child_headless(args.settle)
+        return 0
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"unknown mode(s) {', '.join(unknown)}, expected {', '.join(MODES)}")
+
+    baseline = load_baseline(args.baseline)
+    measured = {}
+    failures = 0
+    errors = 0
+    virtual = VirtualDisplay()
+    try:
+        for mode in modes:
+            display = None
+            if mode == "gui" and not has_display():
+                display = virtual.display or virtual.start()
+                if not display:
+                    print("gui: skipped, no display and Xvfb is not installed")
+                    continue
+            try:
+                metrics = measure(mode, args.runs, args.settle, display)
+            except RuntimeError as e:
+                print(f"{mode}: failed to measure: {e}")
+                errors += 1
+                continue
+            measured[mode] = metrics
+            reference = baseline.get(baseline_key(mode), {}).get("metrics")
+            print(f"{mode} ({args.runs} runs, medians){' on ' + display if display else ''}:")
+            if not reference or args.update_baseline:
+                for metric in METRICS:
+                    if metric in metrics:
+                        print(f"  {metric:<16} {format_value(metric, metrics[metric]):>9}")
+                if not reference and not args.update_baseline:
+                    print(f"  no baseline for {baseline_key(mode)}; record one with --update-baseline")
+                continue
+            for metric, base, current, change, failed in compare(metrics, reference, args.budget):
+                print(f"  {metric:<16} {format_value(metric, current):>9}  baseline {format_value(metric, base):>9}"
+                      f"  {change:+6.1f}%{'  OVER BUDGET' if failed else ''}")
+                failures += failed
+    finally:
+        virtual.stop()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(measured, f, indent=2)
+    if args.update_baseline and measured:
+        for mode, metrics in measured.items():
+            baseline[baseline_key(mode)] = {
+                "metrics": metrics,
+                "runs": args.runs,
+                "settle": args.settle,
+                "python": platform.python_version(),
+                "recorded": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+        save_baseline(args.baseline, baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if failures:
+        print(f"{failures} metric(s) over the {args.budget:g}% budget")
+    return 1 if failures or errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,370 @@
+"""
+Timer accuracy benchmark.
+
+Drives the app's own countdown code (TibiaTimerApp.arm_timer and
+countdown_left/middle/right, with timer_core's adaptive ticks) on a model of
+the Tk event loop. The app object gets a fake root whose after() feeds this
+loop, and the tibia_timer module sees a clock that follows it. In the loop,
+one thread runs callbacks in due order, each callback takes CPU time, and
+wakeups snap to the OS timer granularity plus random lateness. Background
+load competes for the same loop:
+
+  gif      frame updates for the three panel animations
+  logspam  log tailer scans of appended chat text
+  keys     bursts of key events through the hotkey handler
+  timers   extra concurrent countdowns (more app instances on the same loop)
+
+Most runs use a fake clock, so hours of 600 s buff timers take seconds.
+--real adds one short run on the real clock after calibrating how late
+time.sleep() wakes up on this machine.
+
+For every timer it prints the fire-time error distribution (when the
+expiry notification went out minus the deadline) and the display lag (how
+late the label changed after the true remaining time crossed a display
+boundary). Whatever the app's scheduler does is what gets measured.
+
+    python benchmarks/timer_accuracy.py
+    python benchmarks/timer_accuracy.py --runs 20 --load gif,logspam,keys --timers 8
+    python benchmarks/timer_accuracy.py --real --json results.json
+"""
+import os, sys, json, time, heapq, random, argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+import tibia_timer
+from timer_core import tick_step, parse_timer, TIMER_SIDES
+
+# Scheduled work per load source: (period ms, cost ms, jitter ms)
+LOADS = {
+    "gif": (100, 0.4, 0.2),      # one label.configure(image=...) per frame, three panels
+    "logspam": (50, 1.5, 1.0),   # a few KB of chat text per scan
+    "keys": (250, 0.2, 0.1),     # key events arrive in bursts, see KEY_BURST
+    "timers": None,              # extra countdowns, see --timers
+}
+KEY_BURST = 8
+TICK_COST_MS = 0.15  # label.config + after() per countdown tick
+IDLE_NEVER_MS = 10 ** 9  # idle checks are pushed past the end of every run
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def distribution(values):
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": max(values),
+        "min": min(values),
+    }
+
+# ================= Event Loops =================
+class FakeLoop:
+    """Single-threaded after()-style loop on a simulated clock"""
+    def __init__(self, granularity_ms=1.0, lateness_ms=0.5, seed=1):
+        self.now = 0.0
+        self.queue = []
+        self.seq = 0
+        self.cancelled = set()
+        self.granularity = granularity_ms / 1000.0
+        self.lateness = lateness_ms / 1000.0
+        self.random = random.Random(seed)
+
+    def monotonic(self):
+        return self.now
+
+    def after(self, ms, callback, *args):
+        due = self.now + ms / 1000.0
+        if self.granularity:
+            due = -(-due // self.granularity) * self.granularity  # the OS timer only fires on its ticks
+        due += self.random.expovariate(1.0 / self.lateness) if self.lateness else 0.0
+        self.seq += 1
+        heapq.heappush(self.queue, (due, self.seq, callback, args))
+        return self.seq
+
+    def after_cancel(self, job):
+        self.cancelled.add(job)
+
+    def pop(self):
+        """Next due callback, skipping cancelled ones; None when the queue is empty"""
+        while self.queue:
+            entry = heapq.heappop(self.queue)
+            if entry[1] in self.cancelled:
+                self.cancelled.discard(entry[1])
+                continue
+            return entry
+        return None
+
+    def work(self, ms):
+        """A callback spending ms of CPU time"""
+        self.now += ms / 1000.0
+
+    def run_until(self, end):
+        while self.queue and self.queue[0][0] <= end:
+            entry = self.pop()
+            if entry is None:
+                break
+            due, _seq, callback, args = entry
+            self.now = max(self.now, due)
+            callback(*args)
+        self.now = max(self.now, end)
+
+class RealLoop(FakeLoop):
+    """Same interface on the real monotonic clock; work() busy-spins"""
+    def __init__(self):
+        super().__init__(granularity_ms=0, lateness_ms=0)
+        self.start = time.monotonic()
+
+    def monotonic(self):
+        return time.monotonic() - self.start
+
+    def after(self, ms, callback, *args):
+        self.seq += 1
+        heapq.heappush(self.queue, (self.monotonic() + ms / 1000.0, self.seq, callback, args))
+        return self.seq
+
+    def work(self, ms):
+        end = time.perf_counter() + ms / 1000.0
+        while time.perf_counter() < end:
+            pass
+
+    def run_until(self, end):
+        while self.queue and self.queue[0][0] <= end:
+            due = self.queue[0][0]
+            delay = due - self.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            entry = self.pop()
+            if entry is None:
+                break
+            _due, _seq, callback, args = entry
+            callback(*args)
+        delay = end - self.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+class LoopClock:
+    """Stands in for the time module inside tibia_timer, so deadlines follow the loop's clock"""
+    def __init__(self, loop):
+        self.loop = loop
+        self.epoch = time.time()
+
+    def monotonic(self):
+        return self.loop.monotonic()
+
+    def time(self):
+        return self.epoch + self.loop.monotonic()
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+# ================= App Harness =================
+class Label:
+    """countdown_label stand-in: costs a Tk configure, and records when the shown value changes"""
+    def __init__(self, loop, timers, side):
+        self.loop = loop
+        self.timers = timers
+        self.side = side
+        self.shown = None
+
+    def config(self, text="", **options):
+        self.loop.work(TICK_COST_MS)
+        if not text.startswith("Ready in: "):
+            self.shown = None  # ready text; the next arm starts a new countdown
+            return
+        shown = parse_timer(text[len("Ready in: "):].rstrip("s"))
+        if self.shown is not None and shown != self.shown:
+            self.timers[self.side].display_changed(self.shown, shown)
+        self.shown = shown
+
+class Panel:
+    def __init__(self, loop, timers, side):
+        self.countdown_label = Label(loop, timers, side)
+
+class Notifier:
+    """notify_expired's sink: the moment the app considers the timer expired"""
+    def __init__(self, timers):
+        self.timers = timers
+
+    def notify(self, side, text):
+        self.timers[side].fired()
+
+class Timer:
+    """One countdown of one app instance, re-armed after each expiry until stop_at"""
+    def __init__(self, loop, app, side, name, duration, repeat_gap, stop_at):
+        self.loop = loop
+        self.app = app
+        self.side = side
+        self.name = name
+        self.duration = duration
+        self.repeat_gap = repeat_gap
+        self.stop_at = stop_at
+        self.fire_errors = []   # ms, fired minus deadline
+        self.display_lags = []  # ms, display change minus true boundary crossing
+
+    def deadline(self):
+        return getattr(self.app, f"{self.side}_deadline")
+
+    def arm(self):
+        if self.loop.monotonic() + self.duration > self.stop_at:
+            return
+        self.app.arm_timer(self.side, self.duration)
+
+    def display_changed(self, old, new):
+        # The true value crossed the boundary just below the old display
+        crossed = self.deadline() - (old - tick_step(old))
+        self.display_lags.append(max(0.0, self.loop.monotonic() - crossed) * 1000.0)
+
+    def fired(self):
+        self.fire_errors.append((self.loop.monotonic() - self.deadline()) * 1000.0)
+        self.loop.after(int(self.repeat_gap * 1000), self.arm)
+
+    def report(self):
+        return {"fire_error_ms": distribution(self.fire_errors),
+                "display_lag_ms": distribution(self.display_lags)}
+
+def make_app(loop, timers):
+    """
+    A TibiaTimerApp without Tk widgets, audio or background services: just the
+    state arm_timer and countdown_* use, with the loop as its root
+    """
+    app = tibia_timer.TibiaTimerApp.__new__(tibia_timer.TibiaTimerApp)
+    app.root = loop
+    app.extra_settings = {"audio": {"output_latency_ms": 0}}  # no early-start jobs; no sound is played
+    app.wakeup_count = 0
+    app.idle = False
+    app.idle_check_job = None
+    app.idle_grace_ms = IDLE_NEVER_MS
+    app.state_feed = app.party_sync = app.cooldown_stats = app.timer_journal = None
+    app.notifier = Notifier(timers)
+    app.alert_jobs = {side: [] for side in TIMER_SIDES}
+    app.alert_deadline = {}
+    app.early_sound = {}
+    for side in TIMER_SIDES:
+        setattr(app, f"{side}_panel", Panel(loop, timers, side))
+        setattr(app, f"countdown_{side}_job", None)
+        setattr(app, f"is_counting_{side}", False)
+        setattr(app, f"{side}_deadline", None)
+        setattr(app, f"{side}_finished_at", None)
+    return app
+
+def start_load(loop, loads, rng):
+    def periodic(period, cost, jitter, burst=1):
+        def run():
+            for _ in range(burst):
+                loop.work(max(0.0, rng.gauss(cost, jitter)))
+            loop.after(period, run)
+        loop.after(rng.randint(0, period), run)
+
+    for name in loads:
+        if name == "gif":
+            for _ in range(3):
+                periodic(*LOADS["gif"])
+        elif name == "logspam":
+            periodic(*LOADS["logspam"])
+        elif name == "keys":
+            periodic(*LOADS["keys"], burst=KEY_BURST)
+
+def run_scenario(loop, args, length):
+    rng = random.Random(args.seed)
+    start_load(loop, args.load, rng)
+    stop_at = loop.monotonic() + length
+    plans = [[("left", "left", args.left, 0.3), ("middle", "middle", args.middle, 0.5),
+              ("right", "right", args.right, 0.0)]]
+    if "timers" in args.load:
+        for i in range(args.timers):
+            if i % len(TIMER_SIDES) == 0:
+                plans.append([])
+            side = TIMER_SIDES[i % len(TIMER_SIDES)]
+            plans[-1].append((side, f"extra{i + 1}", rng.uniform(1.0, 30.0), rng.uniform(0.0, 1.0)))
+    all_timers = []
+    real_time = tibia_timer.time
+    tibia_timer.time = LoopClock(loop)
+    try:
+        for plan in plans:
+            timers = {}
+            app = make_app(loop, timers)
+            for side, name, duration, repeat_gap in plan:
+                timers[side] = Timer(loop, app, side, name, duration, repeat_gap, stop_at)
+            for timer in timers.values():
+                loop.after(rng.randint(0, 50), timer.arm)
+            all_timers.extend(timers.values())
+        loop.run_until(stop_at + 60.0)  # room for late timers to fire
+    finally:
+        tibia_timer.time = real_time
+    return {timer.name: timer.report() for timer in all_timers}
+
+def calibrate_sleep(samples=200, ms=1.0):
+    """How late time.sleep(ms) wakes up on this machine, in ms"""
+    overshoot = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        time.sleep(ms / 1000.0)
+        overshoot.append((time.perf_counter() - start) * 1000.0 - ms)
+    return distribution(overshoot)
+
+def format_distribution(dist):
+    if not dist["count"]:
+        return "no samples"
+    return (f"n={dist['count']:<6} mean={dist['mean']:8.2f} p50={dist['p50']:8.2f} "
+            f"p95={dist['p95']:8.2f} p99={dist['p99']:8.2f} max={dist['max']:8.2f}")
+
+def print_results(title, results):
+    print(f"\n{title}")
+    for name, report in results.items():
+        print(f"  {name:<8} fire error ms   {format_distribution(report['fire_error_ms'])}")
+        print(f"  {'':<8} display lag ms  {format_distribution(report['display_lag_ms'])}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Countdown accuracy under synthetic load")
+    parser.add_argument("--load", default="gif,logspam,keys,timers",
+                        help="comma separated load sources: gif, logspam, keys, timers (or 'none')")
+    parser.add_argument("--timers", type=int, default=4, help="extra concurrent countdowns for the timers load")
+    parser.add_argument("--left", type=float, default=2.0, help="left timer seconds")
+    parser.add_argument("--middle", type=float, default=6.5, help="middle timer seconds")
+    parser.add_argument("--right", type=float, default=600.0, help="right timer seconds (buff default)")
+    parser.add_argument("--runs", type=int, default=6, help="right timer periods per fake-clock run")
+    parser.add_argument("--granularity", type=float, default=15.6,
+                        help="OS timer granularity in ms for the fake clock (15.6 is the Windows default)")
+    parser.add_argument("--lateness", type=float, default=0.5, help="mean extra wakeup lateness in ms (fake clock)")
+    parser.add_argument("--real", action="store_true", help="also run once on the real clock")
+    parser.add_argument("--real-seconds", type=float, default=15.0, help="length of the real-clock run")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write all results to this file")
+    args = parser.parse_args(argv)
+    args.load = [] if args.load == "none" else [name.strip() for name in args.load.split(",") if name.strip()]
+    unknown = [name for name in args.load if name not in LOADS]
+    if unknown:
+        parser.error(f"unknown load source(s): {', '.join(unknown)}")
+
+    output = {"settings": {key: value for key, value in vars(args).items() if key != "json"}}
+    loop = FakeLoop(args.granularity, args.lateness, args.seed)
+    started = time.perf_counter()
+    output["fake_clock"] = run_scenario(loop, args, args.runs * (args.right + 1.0))
+    print(f"Fake clock: {loop.now:.0f} simulated s in {time.perf_counter() - started:.1f} s, "
+          f"load={','.join(args.load) or 'none'}, granularity={args.granularity} ms")
+    print_results("Fake clock", output["fake_clock"])
+
+    if args.real:
+        output["sleep_calibration_ms"] = calibrate_sleep()
+        print(f"\nReal clock calibration, time.sleep(1 ms) overshoot: "
+              f"{format_distribution(output['sleep_calibration_ms'])}")
+        real_args = argparse.Namespace(**vars(args))
+        real_args.right = min(args.right, args.real_seconds - 1.0)
+        output["real_clock"] = run_scenario(RealLoop(), real_args, args.real_seconds)
+        print_results(f"Real clock ({args.real_seconds:g} s, right timer {real_args.right:g} s)", output["real_clock"])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(output, f, indent=2)
+        print(f"\nWrote {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import os, re, hmac, json, socket, secrets, socketserver, threading, queue, traceback
+
+from timer_core import get_data_dir
+
+# Local control API. Each request is one line of JSON: a command object such as
+#   {"cmd": "arm", "timer": "left", "duration": 6.5}
+#   {"cmd": "cancel", "timer": "right"}
+#   {"cmd": "query"}                 (all timers, or add "timer": "left")
+#   {"cmd": "ping"}
+# or a JSON list of such objects, which is executed as one batch. The reply is
+# one line of JSON: a result object, or a list of results for a batch. An "id"
+# field on a command is echoed back on its result.
+#
+# The server is off unless enabled, and every connection must first send
+#   {"cmd": "auth", "token": "..."}
+# with the per-install token from control.token in the data folder (created
+# on first use, readable only by the user). Anything that looks like HTTP is
+# dropped, so a web page cannot drive the timers through a browser request.
+DEFAULT_PORT = 47653
+# Headless mode gets its own port so it can run beside the GUI; 47654 is the
+# overlay feed (state_feed.py) and 47655 party sync (party_sync.py)
+DEFAULT_HEADLESS_PORT = 47656
+MAX_LINE = 65536
+TOKEN_FILE = "control.token"
+HTTP_LINE = re.compile(rb"^(?:[A-Z]+ \S+ HTTP/\d|[A-Za-z0-9-]+:\s)")  # request line or header
+
+def get_token_path():
+    return os.path.join(get_data_dir(), TOKEN_FILE)
+
+def load_token(path=None):
+    """The per-install control token, creating it (mode 0600) on first use"""
+    path = path or get_token_path()
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(path, "r") as f:
+            token = f.read().strip()
+        if token:
+            return token
+        os.remove(path)  # empty from an interrupted first run
+        return load_token(path)
+    token = secrets.token_urlsafe(24)
+    with os.fdopen(fd, "w") as f:
+        f.write(token + "\n")
+    return token
+
+def check_auth(line, token):
+    """(authorized, reply) for the first request line of a connection"""
+    try:
+        request = json.loads(line)
+    except ValueError as e:
+        return False, {"ok": False, "error": f"bad request: {e}"}
+    if (isinstance(request, dict) and request.get("cmd") == "auth"
+            and hmac.compare_digest(str(request.get("token", "")).encode("utf-8"), token.encode("utf-8"))):
+        reply = {"ok": True}
+        if "id" in request:
+            reply["id"] = request["id"]
+        return True, reply
+    return False, {"ok": False, "error": "unauthorized: send {\"cmd\": \"auth\", \"token\": ...} first"}
+
+def decode_request(line):
+    """Parse a request line into (list of commands, is_batch)"""
+    request = json.loads(line)
+    if isinstance(request, list):
+        commands = request
+        batch = True
+    else:
+        commands = [request]
+        batch = False
+    for command in commands:
+        if not isinstance(command, dict) or not isinstance(command.get("cmd"), str):
+            raise ValueError("each command must be an object with a 'cmd' string")
+    return commands, batch
+
+def encode_reply(results, batch):
+    return (json.dumps(results if batch else results[0], separators=(",", ":")) + "\n").encode("utf-8")
+
+# ================= Control Request Handler =================
+class ControlRequestHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        if self.request.family in (socket.AF_INET, socket.AF_INET6):
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        authorized = self.server.token is None
+        while True:
+            line = self.rfile.readline(MAX_LINE)
+            if not line:
+                return
+            if HTTP_LINE.match(line):
+                return  # a browser or other HTTP client; close without answering
+            if not line.strip():
+                continue
+            if not authorized:
+                authorized, reply = check_auth(line, self.server.token)
+                self.wfile.write(encode_reply([reply], False))
+                if not authorized:
+                    return
+                continue
+            try:
+                commands, batch = decode_request(line)
+            except ValueError as e:
+                self.wfile.write(encode_reply([{"ok": False, "error": f"bad request: {e}"}], False))
+                continue
+            results = self.server.dispatch(commands)
+            self.wfile.write(encode_reply(results, batch))
+
+class ThreadingTCPControlServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class ThreadingUnixControlServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:
+    ThreadingUnixControlServer = None
+
+# ================= Control Server Class =================
+class ControlServer:
+    """
+    Serves the control protocol on its own thread. address is a
+    (host, port) tuple for TCP (always bind loopback) or a filesystem path for
+    a Unix domain socket. dispatch(commands) must be thread-safe and return one
+    result dict per command. With a token, connections must authenticate first.
+    """
+    def __init__(self, dispatch, address=("127.0.0.1", DEFAULT_PORT), token=None):
+        self.address = address
+        if isinstance(address, str):
+            if ThreadingUnixControlServer is None:
+                raise OSError("Unix domain sockets are not available on this platform")
+            if os.path.exists(address):
+                os.remove(address)  # stale socket from a previous run
+            self.server = ThreadingUnixControlServer(address, ControlRequestHandler)
+        else:
+            self.server = ThreadingTCPControlServer(address, ControlRequestHandler)
+        self.server.dispatch = dispatch
+        self.server.token = token
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="control-server", daemon=True)
+        self.thread.start()
+        print(f"Control server listening on {self.server.server_address}")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+# ================= Tk Dispatcher Class =================
+class TkDispatcher:
+    """
+    Thread-safe bridge that runs command batches on the Tk thread.
+    Server threads enqueue a batch and block until the Tk thread has executed
+    it; one after(0) drain is scheduled per burst, however many batches queue
+    up behind it, so the Tk loop pays a single wakeup for a flood of commands.
+    """
+    def __init__(self, root, handler, timeout=2.0):
+        self.root = root
+        self.handler = handler  # handler(command) -> result dict, runs on the Tk thread
+        self.timeout = timeout
+        self.pending = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.drain_scheduled = False
+
+    def __call__(self, commands):
+        done = threading.Event()
+        slot = {"commands": commands, "results": None, "done": done, "started": False, "cancelled": False}
+        self.pending.put(slot)
+        with self.lock:
+            schedule = not self.drain_scheduled
+            self.drain_scheduled = True
+        if schedule:
+            try:
+                self.root.after(0, self.drain)
+            except RuntimeError as e:
+                with self.lock:
+                    self.drain_scheduled = False
+                    slot["cancelled"] = True
+                return [{"ok": False, "error": f"app is shutting down: {e}"} for _ in commands]
+        if not done.wait(self.timeout):
+            with self.lock:
+                # A batch the caller was told timed out must never run later
+                if not slot["started"]:
+                    slot["cancelled"] = True
+                    return [{"ok": False, "error": "timed out waiting for the app"} for _ in commands]
+            done.wait()  # the Tk thread is already running it; report what it did
+        return slot["results"]
+
+    def drain(self):
+        with self.lock:
+            self.drain_scheduled = False
+        while True:
+            try:
+                slot = self.pending.get_nowait()
+            except queue.Empty:
+                return
+            with self.lock:
+                if slot["cancelled"]:
+                    continue
+                slot["started"] = True
+            slot["results"] = [run_command(self.handler, command) for command in slot["commands"]]
+            slot["done"].set()
+
+def run_command(handler, command):
+    """Run one command through handler, turning exceptions into error results"""
+    try:
+        result = handler(command)
+    except (KeyError, ValueError, TypeError) as e:
+        result = {"ok": False, "error": str(e)}
+    except Exception as e:
+        traceback.print_exc()
+        result = {"ok": False, "error": f"internal error: {e}"}
+    if "id" in command:
+        result["id"] = command["id"]
+    return result
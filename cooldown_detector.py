@@ -0,0 +1,190 @@
+import time, threading, traceback
+
+try:
+    import numpy as np
+except ImportError:  # optional; the detector is simply unavailable without it
+    np = None
+
+# Detects which spells the game client really has on cooldown by comparing
+# the icons in its cooldown bar against reference screenshots. Only the
+# configured screen region is captured, every icon is compared in one
+# vectorised pass, and all working arrays are allocated once up front.
+#
+# Settings section "cooldown_detector":
+#   {"enabled": true, "region": [x, y, width, height], "fps": 4,
+#    "threshold": 40, "confirm_frames": 2, "grace": 1.5,
+#    "icons": [{"timer": "left", "x": 0, "y": 0,
+#               "ready": "ready.png", "cooldown": "cooldown.png"}]}
+# Icon x/y are relative to the region. "cooldown" is optional: without it an
+# icon counts as on cooldown once its mean pixel difference from the ready
+# template exceeds threshold (0-255).
+
+def load_frame(path):
+    """RGB frame (height x width x 3 uint8) from an image file, e.g. a saved screenshot"""
+    from PIL import Image
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))
+
+def grab_region(region):
+    """Capture only region (x, y, width, height) of the screen as an RGB frame"""
+    from PIL import ImageGrab
+    x, y, width, height = region
+    return np.asarray(ImageGrab.grab(bbox=(x, y, x + width, y + height)).convert("RGB"))
+
+# ================= Cooldown Detector Class =================
+class CooldownDetector:
+    """Classifies icons in successive frames, with hysteresis against flicker"""
+    def __init__(self, icons, threshold=40, confirm_frames=2):
+        if np is None:
+            raise RuntimeError("the cooldown detector needs numpy")
+        if not icons:
+            raise ValueError("no icons configured")
+        self.icons = icons
+        self.timers = [icon["timer"] for icon in icons]
+        self.threshold = threshold
+        self.confirm_frames = max(1, confirm_frames)
+        ready = [load_frame(icon["ready"]) for icon in icons]
+        self.height, self.width = ready[0].shape[:2]
+        for icon, template in zip(icons, ready):
+            if template.shape[:2] != (self.height, self.width):
+                raise ValueError(f"{icon['ready']} is {template.shape[1]}x{template.shape[0]}, "
+                                 f"expected {self.width}x{self.height} like the first icon")
+        count = len(icons)
+        shape = (count, self.height, self.width, 3)
+        self.ready = np.stack(ready).astype(np.int16)
+        self.cooldown = np.zeros(shape, np.int16)
+        self.has_cooldown = np.zeros(count, bool)
+        for i, icon in enumerate(icons):
+            if icon.get("cooldown"):
+                self.cooldown[i] = load_frame(icon["cooldown"])
+                self.has_cooldown[i] = True
+        # Working buffers reused for every frame
+        self.patches = np.empty(shape, np.int16)
+        self.diff = np.empty(shape, np.int16)
+        self.ready_scores = np.empty(count, np.float64)
+        self.cooldown_scores = np.empty(count, np.float64)
+        self.raw = np.zeros(count, bool)
+        self.state = np.zeros(count, bool)  # confirmed on-cooldown flags
+        self.streak = np.zeros(count, np.int32)
+        self.frames = 0
+
+    def score(self, frame):
+        """Per-icon on-cooldown guess for one frame of the region, before hysteresis"""
+        for i, icon in enumerate(self.icons):
+            x, y = icon["x"], icon["y"]
+            np.copyto(self.patches[i], frame[y:y + self.height, x:x + self.width, :3], casting="unsafe")
+        flat = self.diff.reshape(len(self.icons), -1)
+        np.subtract(self.patches, self.ready, out=self.diff)
+        np.abs(self.diff, out=self.diff)
+        np.mean(flat, axis=1, out=self.ready_scores)
+        np.subtract(self.patches, self.cooldown, out=self.diff)
+        np.abs(self.diff, out=self.diff)
+        np.mean(flat, axis=1, out=self.cooldown_scores)
+        np.copyto(self.raw, np.where(self.has_cooldown, self.cooldown_scores < self.ready_scores,
+                                     self.ready_scores > self.threshold))
+        return self.raw
+
+    def update(self, frame):
+        """
+        Feed one frame; returns {timer: on_cooldown} for icons whose confirmed
+        state flipped, i.e. that disagreed with it for confirm_frames frames in a row.
+        """
+        self.frames += 1
+        raw = self.score(frame)
+        disagree = raw != self.state
+        self.streak[disagree] += 1
+        self.streak[~disagree] = 0
+        flipped = np.flatnonzero(self.streak >= self.confirm_frames)
+        self.state[flipped] = raw[flipped]
+        self.streak[flipped] = 0
+        return {self.timers[i]: bool(self.state[i]) for i in flipped}
+
+    def detected(self):
+        return {timer: bool(on_cooldown) for timer, on_cooldown in zip(self.timers, self.state)}
+
+# ================= Cooldown Reconciler Class =================
+class CooldownReconciler:
+    """
+    Decides how detected cooldowns correct the app's timers:
+      - an icon going onto cooldown while its timer is idle arms the timer
+        (the spell was cast without the hotkey)
+      - an icon showing ready while its timer runs cancels the timer once the
+        arm is older than grace seconds (the cast failed, or the spell came
+        back early)
+    """
+    def __init__(self, grace=1.5):
+        self.grace = grace
+        self.seen_deadline = {}
+        self.armed_at = {}
+
+    def actions(self, changes, detected, deadlines, now):
+        """
+        changes/detected: from CooldownDetector.update()/detected();
+        deadlines: {timer: deadline or None while idle}. Returns [(action, timer)].
+        """
+        actions = []
+        for timer, deadline in deadlines.items():
+            if timer not in detected:
+                continue
+            if deadline != self.seen_deadline.get(timer):
+                self.seen_deadline[timer] = deadline
+                self.armed_at[timer] = now
+            if deadline is None:
+                if changes.get(timer):
+                    actions.append(("arm", timer))
+            elif not detected[timer] and now - self.armed_at[timer] >= self.grace:
+                actions.append(("cancel", timer))
+                self.armed_at[timer] = float("inf")  # once per arm
+        return actions
+
+# ================= Detector Thread Class =================
+class CooldownWatcher:
+    """
+    Captures and classifies the region at up to fps frames per second on a
+    background thread. deadlines() is read on that thread and must be cheap;
+    on_action(action, timer) is only called when a timer needs correcting.
+    """
+    def __init__(self, detector, region, deadlines, on_action, fps=4, grace=1.5, grab=grab_region):
+        self.detector = detector
+        self.region = region
+        self.deadlines = deadlines
+        self.on_action = on_action
+        self.interval = 1.0 / max(0.1, fps)
+        self.reconciler = CooldownReconciler(grace)
+        self.grab = grab
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.frame_seconds = 0.0  # capture + analysis time of the last frame
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="cooldown-detector", daemon=True)
+        self.thread.start()
+        print(f"Cooldown detector watching {self.region} at {1.0 / self.interval:g} fps")
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(2.0)
+            self.thread = None
+
+    def run(self):
+        next_frame = time.monotonic()
+        while not self.stop_event.is_set():
+            started = time.monotonic()
+            try:
+                self.process(self.grab(self.region), started)
+            except Exception as e:
+                print(f"Error in cooldown detector: {e}")
+                traceback.print_exc()
+                self.stop_event.wait(5.0)  # e.g. capture unavailable; do not spin
+            self.frame_seconds = time.monotonic() - started
+            next_frame = max(next_frame + self.interval, time.monotonic())
+            self.stop_event.wait(next_frame - time.monotonic())
+
+    def process(self, frame, now):
+        changes = self.detector.update(frame)
+        actions = self.reconciler.actions(changes, self.detector.detected(), self.deadlines(), now)
+        for action, timer in actions:
+            self.on_action(action, timer)
+        return actions
@@ -0,0 +1,231 @@
+import os, sys, csv, time, array, argparse, threading
+
+try:
+    import numpy as np
+except ImportError:  # recording works without numpy, the aggregates do not
+    np = None
+
+from timer_core import get_data_dir, TIMER_SIDES
+
+# Columnar log of timer activations and expiries. Each field is its own
+# array.array in memory and its own append-only file on disk, so recording
+# is a handful of appends and a query loads whole columns straight into
+# NumPy without parsing, however many sessions have been kept. Appends go to
+# the I/O worker in batches, never from the Tk thread, and once the files
+# hold more than max_rows rows the oldest are dropped (see rotate()).
+EVENT_ACTIVATE = 1
+EVENT_EXPIRE = 2
+EVENT_NAMES = {EVENT_ACTIVATE: "activate", EVENT_EXPIRE: "expire"}
+# (name, array typecode, matching numpy dtype)
+COLUMNS = (
+    ("time", "d", "f8"),      # wall clock seconds, comparable across sessions
+    ("session", "I", "u4"),   # start time of the session that recorded the row
+    ("timer", "B", "u1"),     # index into TIMER_SIDES
+    ("kind", "B", "u1"),      # EVENT_ACTIVATE or EVENT_EXPIRE
+    ("duration", "f", "f4"),  # seconds the timer was armed for (0 for expiries)
+)
+FLUSH_ROWS = 256
+DEFAULT_MAX_ROWS = 200000  # about 3.6 MB of columns
+KEEP_FRACTION = 0.75       # share of max_rows left after a rotation
+ROTATE_MARKER = "rotate.done"
+
+def get_stats_dir():
+    folder = os.path.join(get_data_dir(), "stats")
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+# ================= Cooldown Stats Class =================
+class CooldownStats:
+    """Records timer events for the current session and answers queries over all of them"""
+    def __init__(self, folder=None, worker=None, max_rows=DEFAULT_MAX_ROWS):
+        self.folder = folder or get_stats_dir()
+        self.worker = worker  # None writes on the calling thread
+        self.max_rows = int(max_rows)
+        self.session = int(time.time())
+        self.pending = {name: array.array(code) for name, code, _dtype in COLUMNS}
+        self.writing = []  # batches handed to the worker and not yet on disk
+        self.lock = threading.Lock()  # files and self.writing
+        self.sent = {}  # side -> (state, deadline) last recorded
+        self.repair()
+
+    def repair(self):
+        """
+        Finish or undo an interrupted rotation, then cut columns that a crash
+        between appends left longer back to whole rows
+        """
+        if os.path.exists(os.path.join(self.folder, ROTATE_MARKER)):
+            for name, _code, _dtype in COLUMNS:
+                if os.path.exists(self.column_path(name) + ".new"):
+                    os.replace(self.column_path(name) + ".new", self.column_path(name))
+            os.remove(os.path.join(self.folder, ROTATE_MARKER))
+        for name, _code, _dtype in COLUMNS:
+            if os.path.exists(self.column_path(name) + ".new"):
+                os.remove(self.column_path(name) + ".new")
+        sizes = self.column_rows()
+        rows = min(sizes.values())
+        for name, code, _dtype in COLUMNS:
+            if sizes[name] > rows:
+                os.truncate(self.column_path(name), rows * array.array(code).itemsize)
+
+    def column_path(self, name):
+        return os.path.join(self.folder, f"{name}.col")
+
+    def column_rows(self):
+        sizes = {}
+        for name, code, _dtype in COLUMNS:
+            path = self.column_path(name)
+            sizes[name] = os.path.getsize(path) // array.array(code).itemsize if os.path.exists(path) else 0
+        return sizes
+
+    def record(self, side, kind, duration=0.0, when=None):
+        row = (time.time() if when is None else when, self.session, TIMER_SIDES.index(side), kind, duration)
+        for (name, _code, _dtype), value in zip(COLUMNS, row):
+            self.pending[name].append(value)
+        if len(self.pending["time"]) >= FLUSH_ROWS:
+            self.flush()
+
+    def timer_changed(self, side, state, deadline=None, duration=0.0):
+        """Record an activation for every new deadline and an expiry when a timer runs out"""
+        if self.sent.get(side) == (state, deadline):
+            return
+        self.sent[side] = (state, deadline)
+        if state == "running":
+            self.record(side, EVENT_ACTIVATE, duration)
+        elif state == "expired":
+            self.record(side, EVENT_EXPIRE)
+
+    def flush(self):
+        """Hand pending rows to the worker (or write them now without one)"""
+        if not self.pending["time"]:
+            return
+        batch = self.pending
+        self.pending = {name: array.array(code) for name, code, _dtype in COLUMNS}
+        with self.lock:
+            self.writing.append(batch)
+        if self.worker is None or not self.worker.submit(self.write_batch, batch):
+            self.write_batch(batch)
+
+    def write_batch(self, batch):
+        """Append one batch to the column files (worker thread)"""
+        with self.lock:
+            try:
+                for name, _code, _dtype in COLUMNS:
+                    with open(self.column_path(name), "ab") as f:
+                        batch[name].tofile(f)
+                rows = min(self.column_rows().values())
+                if self.max_rows and rows > self.max_rows:
+                    self.rotate(rows, int(self.max_rows * KEEP_FRACTION))
+            except OSError as e:
+                print(f"Error writing cooldown stats: {e}")
+            finally:
+                self.writing.remove(batch)
+
+    def rotate(self, rows, keep):
+        """
+        Keep only the newest keep of the first rows rows. All trimmed columns are written first
+        and committed by a marker file, so a crash midway never leaves the
+        columns out of step (repair() finishes or discards the rotation).
+        """
+        for name, code, _dtype in COLUMNS:
+            itemsize = array.array(code).itemsize
+            with open(self.column_path(name), "rb") as f:
+                f.seek((rows - keep) * itemsize)
+                data = f.read(keep * itemsize)
+            with open(self.column_path(name) + ".new", "wb") as f:
+                f.write(data)
+        with open(os.path.join(self.folder, ROTATE_MARKER), "wb"):
+            pass
+        for name, _code, _dtype in COLUMNS:
+            os.replace(self.column_path(name) + ".new", self.column_path(name))
+        os.remove(os.path.join(self.folder, ROTATE_MARKER))
+        print(f"Rotated cooldown stats to the newest {keep} rows")
+
+    # ---------------- Queries ----------------
+    def load(self):
+        """All recorded rows (files plus unflushed) as {column: numpy array}"""
+        if np is None:
+            raise RuntimeError("cooldown statistics need numpy")
+        columns = {}
+        with self.lock:
+            for name, _code, dtype in COLUMNS:
+                path = self.column_path(name)
+                stored = np.fromfile(path, dtype=dtype) if os.path.exists(path) else np.empty(0, dtype)
+                parts = [stored] + [np.frombuffer(batch[name], dtype=dtype) for batch in self.writing]
+                columns[name] = np.concatenate(parts + [np.frombuffer(self.pending[name], dtype=dtype)])
+        # Only differs from repair() if another instance is writing right now
+        rows = min(len(column) for column in columns.values())
+        return {name: column[:rows] for name, column in columns.items()}
+
+    def summary(self, since=None):
+        """
+        Per timer: activations, expiries, activations per minute of session
+        time, and how long the spell sat ready before the next press
+        (mean/median/p90 of expiry -> next activation gaps).
+        """
+        data = self.load()
+        if since is not None:
+            keep = data["time"] >= since
+            data = {name: column[keep] for name, column in data.items()}
+        order = np.lexsort((data["time"], data["timer"]))  # grouped by timer, in time order
+        data = {name: column[order] for name, column in data.items()}
+        session_minutes = 0.0
+        for session in np.unique(data["session"]):
+            times = data["time"][data["session"] == session]
+            session_minutes += (times.max() - times.min()) / 60.0
+        results = {}
+        for index, side in enumerate(TIMER_SIDES):
+            rows = data["timer"] == index
+            times, kinds, sessions = data["time"][rows], data["kind"][rows], data["session"][rows]
+            activations = int(np.count_nonzero(kinds == EVENT_ACTIVATE))
+            # An activation straight after an expiry in the same session is a ready gap
+            follows_expiry = ((kinds[1:] == EVENT_ACTIVATE) & (kinds[:-1] == EVENT_EXPIRE)
+                              & (sessions[1:] == sessions[:-1]))
+            gaps = (times[1:] - times[:-1])[follows_expiry]
+            results[side] = {
+                "activations": activations,
+                "expiries": int(np.count_nonzero(kinds == EVENT_EXPIRE)),
+                "per_minute": activations / session_minutes if session_minutes else 0.0,
+                "ready_gap_mean": float(gaps.mean()) if len(gaps) else None,
+                "ready_gap_median": float(np.median(gaps)) if len(gaps) else None,
+                "ready_gap_p90": float(np.percentile(gaps, 90)) if len(gaps) else None,
+            }
+        return results
+
+    def export_csv(self, path):
+        data = self.load()
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time", "session", "timer", "event", "duration"])
+            for row in zip(data["time"].tolist(), data["session"].tolist(), data["timer"].tolist(),
+                           data["kind"].tolist(), data["duration"].tolist()):
+                writer.writerow([f"{row[0]:.3f}", row[1], TIMER_SIDES[row[2]], EVENT_NAMES[row[3]], f"{row[4]:g}"])
+        return path
+
+    def export_npz(self, path):
+        """Compressed column archive, loadable with numpy.load (or pandas via DataFrame(dict(...)))"""
+        np.savez_compressed(path, **self.load())
+        return path
+
+def format_summary(results):
+    lines = []
+    for side, stats in results.items():
+        gap = "-" if stats["ready_gap_mean"] is None else (
+            f"{stats['ready_gap_mean']:.1f}s mean, {stats['ready_gap_median']:.1f}s median, "
+            f"{stats['ready_gap_p90']:.1f}s p90")
+        lines.append(f"{side.capitalize()}: {stats['activations']} activations "
+                     f"({stats['per_minute']:.2f}/min), ready before press: {gap}")
+    return lines
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cooldown usage statistics")
+    parser.add_argument("--days", type=float, help="only the last N days")
+    parser.add_argument("--csv", help="export all rows to this CSV file")
+    parser.add_argument("--npz", help="export all columns to this .npz file")
+    args = parser.parse_args()
+    stats = CooldownStats()
+    print("\n".join(format_summary(stats.summary(time.time() - args.days * 86400 if args.days else None))))
+    if args.csv:
+        print("Wrote", stats.export_csv(args.csv))
+    if args.npz:
+        print("Wrote", stats.export_npz(args.npz))
+    sys.exit(0)
@@ -0,0 +1,113 @@
+import os, time, hashlib, threading, traceback
+
+from timer_core import get_data_dir
+from io_worker import default_worker, append_file
+
+# Unhandled exceptions are grouped by fingerprint: the exception type plus
+# the code locations it passed through (not the message, which often holds
+# changing values). The first occurrence is written in full; repeats only
+# bump a counter, written as one summary line at most every REPEAT_INTERVAL
+# seconds and once more on exit. The report file rotates at MAX_BYTES.
+MAX_BYTES = 256 * 1024
+BACKUPS = 2
+REPEAT_INTERVAL = 60.0
+
+def get_error_report_path():
+    return os.path.join(get_data_dir(), "error_report.txt")
+
+def fingerprint(exctype, tb):
+    frames = traceback.extract_tb(tb)
+    parts = [exctype.__module__, exctype.__qualname__]
+    parts.extend(f"{os.path.basename(frame.filename)}:{frame.name}:{frame.lineno}" for frame in frames)
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:12]
+
+def write_rotating(path, text, max_bytes=MAX_BYTES, backups=BACKUPS):
+    """Append text to path, first shifting path -> path.1 -> path.2 ... if it would pass max_bytes"""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        size = 0
+    if size and size + len(text) > max_bytes:
+        for i in range(backups - 1, 0, -1):
+            if os.path.exists(f"{path}.{i}"):
+                os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+        if backups:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+    return append_file(path, text)
+
+# ================= Error Reporter Class =================
+class ErrorReporter:
+    """
+    Thread-safe: report() may be called from the Tk thread, the hotkey
+    listener or any worker. Writes go through the I/O worker (or straight to
+    disk if its queue is full).
+    """
+    def __init__(self, path=None, max_bytes=MAX_BYTES, backups=BACKUPS,
+                 repeat_interval=REPEAT_INTERVAL, worker=None):
+        self.path = path or get_error_report_path()
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.repeat_interval = repeat_interval
+        self.worker = worker or default_worker()
+        self.lock = threading.Lock()
+        self.seen = {}  # fingerprint -> {"summary", "count", "written", "last_write"}
+
+    def report(self, exctype, value, tb):
+        now = time.time()
+        key = fingerprint(exctype, tb)
+        summary = "".join(traceback.format_exception_only(exctype, value)).strip()
+        with self.lock:
+            entry = self.seen.get(key)
+            if entry is None:
+                self.seen[key] = {"summary": summary, "count": 1, "written": 1, "last_write": now}
+                text = "".join([f"\n=========== Exception {key} at {time.strftime('%Y-%m-%d %H:%M:%S')} ===========\n"]
+                               + traceback.format_exception(exctype, value, tb)
+                               + ["===========================================\n"])
+            else:
+                entry["count"] += 1
+                entry["summary"] = summary
+                if now - entry["last_write"] < self.repeat_interval:
+                    return key
+                text = self.repeat_line(key, entry, now)
+        self.write(text)
+        return key
+
+    def repeat_line(self, key, entry, now):
+        """Summary of repeats since the last write; call with the lock held"""
+        repeats = entry["count"] - entry["written"]
+        entry["written"] = entry["count"]
+        entry["last_write"] = now
+        return (f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))} Exception {key} repeated "
+                f"{repeats} more time(s), {entry['count']} in total: {entry['summary']}\n")
+
+    def write(self, text):
+        if not self.worker.submit(write_rotating, self.path, text, self.max_bytes, self.backups):
+            try:
+                write_rotating(self.path, text, self.max_bytes, self.backups)
+            except OSError as e:
+                print(f"Could not write error report: {e}")
+
+    def flush(self):
+        """Write the repeat counts not yet on disk (on exit)"""
+        now = time.time()
+        with self.lock:
+            lines = [self.repeat_line(key, entry, now) for key, entry in self.seen.items()
+                     if entry["count"] > entry["written"]]
+        if lines:
+            self.write("".join(lines))
+
+    def counts(self):
+        with self.lock:
+            return {key: entry["count"] for key, entry in self.seen.items()}
+
+default_reporter_instance = None
+default_reporter_lock = threading.Lock()
+
+def default_reporter():
+    global default_reporter_instance
+    with default_reporter_lock:
+        if default_reporter_instance is None:
+            default_reporter_instance = ErrorReporter()
+        return default_reporter_instance
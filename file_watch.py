@@ -0,0 +1,114 @@
+import os, sys, struct, select, threading, ctypes, ctypes.util, traceback
+
+# Change notification for a single file. Linux uses inotify on the file's
+# folder, which also catches the file being replaced or recreated; everything
+# else (and Linux without inotify) falls back to comparing os.stat() results
+# every poll_interval seconds.
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, name length
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+def file_signature(path):
+    """(inode, size, mtime) or None if the file does not exist"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+# ================= File Watcher Class =================
+class FileWatcher:
+    """Calls callback() on a background thread whenever path may have changed"""
+    def __init__(self, path, callback, poll_interval=0.5):
+        self.path = os.path.abspath(path)
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.mode = None  # "inotify" or "poll" once running
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name=f"watch-{os.path.basename(self.path)}", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(2.0)
+            self.thread = None
+
+    def run(self):
+        try:
+            fd = self.open_inotify() if sys.platform.startswith("linux") else None
+        except OSError as e:
+            print(f"inotify unavailable for {self.path}, polling instead: {e}")
+            fd = None
+        try:
+            if fd is not None:
+                self.mode = "inotify"
+                self.watch_inotify(fd)
+            else:
+                self.mode = "poll"
+                self.watch_poll()
+        except Exception as e:
+            print(f"Error watching {self.path}: {e}")
+            traceback.print_exc()
+
+    def notify(self):
+        try:
+            self.callback()
+        except Exception as e:
+            print(f"Error in file watch callback for {self.path}: {e}")
+            traceback.print_exc()
+
+    # ---------------- inotify ----------------
+    def open_inotify(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        folder = os.path.dirname(self.path)
+        if libc.inotify_add_watch(fd, folder.encode(sys.getfilesystemencoding()), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno, f"inotify_add_watch failed for {folder}")
+        return fd
+
+    def watch_inotify(self, fd):
+        name = os.path.basename(self.path).encode(sys.getfilesystemencoding())
+        try:
+            while not self.stop_event.is_set():
+                ready, _, _ = select.select([fd], [], [], self.poll_interval)
+                if not ready:
+                    continue
+                try:
+                    data = os.read(fd, 65536)
+                except BlockingIOError:
+                    continue
+                changed = False
+                offset = 0
+                while offset + INOTIFY_EVENT.size <= len(data):
+                    _wd, _mask, _cookie, length = INOTIFY_EVENT.unpack_from(data, offset)
+                    offset += INOTIFY_EVENT.size
+                    if data[offset:offset + length].rstrip(b"\0") == name:
+                        changed = True
+                    offset += length
+                if changed:  # one callback per batch of events
+                    self.notify()
+        finally:
+            os.close(fd)
+
+    # ---------------- Polling ----------------
+    def watch_poll(self):
+        signature = file_signature(self.path)
+        while not self.stop_event.wait(self.poll_interval):
+            current = file_signature(self.path)
+            if current != signature:
+                signature = current
+                self.notify()
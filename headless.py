@@ -0,0 +1,301 @@
+import os, sys, time, threading, argparse, traceback
+
+from timer_core import (get_base_path, get_data_dir, get_settings_path, load_settings, parse_timer,
+                        next_tick_delay, format_remaining, TIMER_SIDES, DEFAULT_TIMERS,
+                        READY_TEXT, EXPIRED_TEXT, SOUND_PRESETS, DEFAULT_SOUNDS)
+from asset_pack import AssetSource
+from asset_build import PreparedAssets, MIXER_FREQUENCY, MIXER_SIZE, MIXER_CHANNELS
+from hotkeys import combo_from_key, normalize_combo, parse_binding, HotkeyMatcher
+from control_server import ControlServer, run_command, load_token, DEFAULT_HEADLESS_PORT
+
+# ================= Headless Timer Class =================
+class HeadlessTimer:
+    """
+    Hotkey -> countdown -> sound loop without Tk, PIL or ttkbootstrap.
+    Uses the saved settings of the GUI and renders all timers on a single
+    status line. The main thread sleeps until the next display change, so with
+    no timer running it does no periodic work at all.
+    """
+    def __init__(self, settings_path=None, sound=True, out=None, control_port=0):
+        self.settings_path = settings_path or get_settings_path()
+        self.out = out or sys.stdout
+        self.tty = hasattr(self.out, "isatty") and self.out.isatty()
+        self.assets = AssetSource(get_base_path(),
+                                  extract_dir=os.path.join(get_data_dir(), "cache", "extracted"))
+        self.prepared = PreparedAssets(self.assets)
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.running = False
+        self.listener = None
+        self.pressed_keys = set()
+        self.hotkeys = {side: "" for side in TIMER_SIDES}
+        self.matcher = HotkeyMatcher()
+        self.durations = dict(DEFAULT_TIMERS)
+        self.sounds = dict(DEFAULT_SOUNDS)
+        self.deadlines = {side: None for side in TIMER_SIDES}
+        self.finished_at = {side: None for side in TIMER_SIDES}
+        self.last_press = {side: 0 for side in TIMER_SIDES}
+        self.pending_sounds = []  # (monotonic due time, sound ref)
+        self.last_line = None
+        self.sound_enabled = sound
+        self.sound_cache = {}
+        self.channel = None
+        self.control_port = control_port
+        self.control_server = None
+        self.load_settings()
+
+    def load_settings(self):
+        """Apply hotkeys, timers and sound selections from the GUI's settings file"""
+        settings = load_settings(self.settings_path)
+        hotkeys = settings.get("hotkeys", {})
+        times = settings.get("times", {})
+        sounds = settings.get("sound_selection", {})
+        for side in TIMER_SIDES:
+            self.hotkeys[side] = normalize_combo(hotkeys.get(side, ""))
+            if times.get(side):
+                try:
+                    self.durations[side] = parse_timer(times[side])
+                except ValueError as e:
+                    print(f"Invalid {side} timer {times[side]!r}: {e}")
+            # Custom sounds are not stored with a path, so they fall back to the default
+            self.sounds[side] = SOUND_PRESETS[side].get(sounds.get(side), DEFAULT_SOUNDS[side])
+        self.matcher = self.build_matcher(settings.get("bindings", []))
+
+    def build_matcher(self, bindings):
+        """Panel hotkeys plus extra bindings, as in TibiaTimerApp.build_hotkey_matcher"""
+        matcher = HotkeyMatcher()
+        panel_keys = set()
+        for side in TIMER_SIDES:
+            steps = parse_binding(self.hotkeys[side])
+            if steps and steps not in panel_keys:
+                panel_keys.add(steps)
+                matcher.add(steps, (side, None))
+        for binding in bindings:
+            try:
+                side = self.check_side(binding.get("timer"))
+                duration = binding.get("duration")
+                duration = None if duration is None else parse_timer(str(duration))
+                matcher.add(binding["keys"], (side, duration), binding.get("timeout"))
+            except (KeyError, ValueError, AttributeError) as e:
+                print(f"Skipping hotkey binding {binding!r}: {e}")
+        return matcher
+
+    def init_audio(self):
+        if not self.sound_enabled:
+            return
+        try:
+            import pygame
+            pygame.mixer.init(frequency=MIXER_FREQUENCY, size=MIXER_SIZE, channels=MIXER_CHANNELS)
+            pygame.mixer.set_reserved(1)
+            self.channel = pygame.mixer.Channel(0)
+            for sound_ref in set(self.sounds.values()):
+                self.get_sound(sound_ref)
+        except Exception as e:
+            print(f"Audio unavailable, using the terminal bell: {e}")
+            self.channel = None
+
+    def get_sound(self, sound_ref):
+        import pygame
+        sound = self.sound_cache.get(sound_ref)
+        if sound is None:
+            prepared = self.prepared.sound(sound_ref, pygame.mixer.get_init())
+            sound = pygame.mixer.Sound(file=self.assets.open(prepared or sound_ref))
+            self.sound_cache[sound_ref] = sound
+        return sound
+
+    def play_sound(self, sound_ref):
+        try:
+            if self.channel is not None:
+                self.channel.play(self.get_sound(sound_ref))
+                return
+        except Exception as e:
+            print(f"Error playing {sound_ref}: {e}")
+        if self.sound_enabled:
+            self.out.write("\a")
+            self.out.flush()
+
+    # ---------------- Hotkeys ----------------
+    def on_press(self, key):
+        try:
+            self.pressed_keys.add(key)
+            combo = combo_from_key(key, self.pressed_keys)
+            if not combo:
+                return
+            for side, duration in self.matcher.feed(normalize_combo(combo), time.monotonic()):
+                self.arm(side, duration)
+        except Exception as e:
+            print(f"Error in on_press: {e}")
+            traceback.print_exc()
+
+    def on_release(self, key):
+        self.pressed_keys.discard(key)
+
+    def arm(self, side, duration=None):
+        """
+        Same rules as TibiaTimerApp.start_countdown_*: left/middle ignore
+        re-presses, right restarts. A binding's own duration restarts
+        immediately, like TibiaTimerApp.arm_timer.
+        """
+        now = time.monotonic()
+        with self.lock:
+            if duration is None and side != "right":
+                if self.deadlines[side] is not None or now - self.last_press[side] <= 3:
+                    return
+                self.last_press[side] = now
+            self.deadlines[side] = now + (self.durations[side] if duration is None else duration)
+        self.wakeup.set()
+
+    # ---------------- Control API ----------------
+    def dispatch(self, commands):
+        """Control server entry point; commands run directly on the server thread"""
+        return [run_command(self.handle_command, command) for command in commands]
+
+    def handle_command(self, command):
+        cmd = command["cmd"]
+        if cmd == "ping":
+            return {"ok": True}
+        if cmd == "query":
+            sides = [self.check_side(command["timer"])] if "timer" in command else TIMER_SIDES
+            return {"ok": True, "timers": [self.timer_state(side) for side in sides]}
+        side = self.check_side(command.get("timer"))
+        with self.lock:
+            if cmd == "arm":
+                duration = command.get("duration")
+                duration = self.durations[side] if duration is None else parse_timer(str(duration))
+                self.deadlines[side] = time.monotonic() + duration
+            elif cmd == "cancel":
+                self.deadlines[side] = None
+            else:
+                raise ValueError(f"unknown command {cmd!r}")
+        self.wakeup.set()
+        return {"ok": True, "timer": self.timer_state(side)}
+
+    def check_side(self, side):
+        if side not in TIMER_SIDES:
+            raise ValueError(f"unknown timer {side!r}, expected one of {', '.join(TIMER_SIDES)}")
+        return side
+
+    def timer_state(self, side):
+        with self.lock:
+            deadline = self.deadlines[side]
+            if deadline is not None:
+                state, remaining = "running", round(max(0.0, deadline - time.monotonic()), 3)
+            elif self.finished_at[side] is not None:
+                state, remaining = "expired", 0.0
+            else:
+                state, remaining = "ready", None
+            return {"id": side, "state": state, "remaining": remaining, "duration": self.durations[side]}
+
+    # ---------------- Scheduler ----------------
+    def process(self, now):
+        """Expire due timers and play due sounds; returns seconds until the next wakeup or None"""
+        next_wakeup = None
+        with self.lock:
+            for side in TIMER_SIDES:
+                deadline = self.deadlines[side]
+                if deadline is None:
+                    continue
+                remaining = deadline - now
+                if remaining <= 0:
+                    self.deadlines[side] = None
+                    self.finished_at[side] = now
+                    left_done = self.finished_at["left"]
+                    if side == "right" and left_done is not None and now - left_done < 2:
+                        # Do not talk over the left alert, same as the GUI
+                        self.pending_sounds.append((now + 1.0, self.sounds[side]))
+                    else:
+                        self.pending_sounds.append((now, self.sounds[side]))
+                    continue
+                delay = next_tick_delay(remaining) / 1000.0
+                next_wakeup = delay if next_wakeup is None else min(next_wakeup, delay)
+            due = [entry for entry in self.pending_sounds if entry[0] <= now]
+            self.pending_sounds = [entry for entry in self.pending_sounds if entry[0] > now]
+            for due_at, _ref in self.pending_sounds:
+                next_wakeup = due_at - now if next_wakeup is None else min(next_wakeup, due_at - now)
+        for _due_at, sound_ref in due:
+            self.play_sound(sound_ref)
+        return next_wakeup
+
+    def status_line(self, now):
+        parts = []
+        for side in TIMER_SIDES:
+            deadline = self.deadlines[side]
+            if deadline is not None:
+                text = "Ready in " + format_remaining(max(0.0, deadline - now), clock=(side == "right"))
+                if side != "right":
+                    text += "s"
+            elif self.finished_at[side] is not None:
+                text = EXPIRED_TEXT[side]
+            else:
+                text = READY_TEXT[side]
+            parts.append(f"{side.capitalize()}: {text}")
+        return " | ".join(parts)
+
+    def render(self, now):
+        line = self.status_line(now)
+        if line == self.last_line:
+            return
+        self.last_line = line
+        if self.tty:
+            self.out.write("\r" + line + "\x1b[K")
+        else:
+            self.out.write(line + "\n")
+        self.out.flush()
+
+    def run(self):
+        from pynput import keyboard
+        self.init_audio()
+        self.listener = keyboard.Listener(on_press=self.on_press, on_release=self.on_release)
+        self.listener.start()
+        if self.control_port:
+            try:
+                self.control_server = ControlServer(self.dispatch, ("127.0.0.1", self.control_port),
+                                                    load_token()).start()
+            except OSError as e:
+                print(f"Could not start control server: {e}")
+        self.running = True
+        print("Hotkeys - " + ", ".join(f"{side}: {self.hotkeys[side] or '-'}" for side in TIMER_SIDES)
+              + " (Ctrl+C to quit)")
+        try:
+            while self.running:
+                delay = self.process(time.monotonic())
+                self.render(time.monotonic())
+                self.wakeup.wait(delay)
+                self.wakeup.clear()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            if self.tty:
+                self.out.write("\n")
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+        if self.listener:
+            self.listener.stop()
+            self.listener = None
+        if self.control_server:
+            self.control_server.stop()
+            self.control_server = None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tibia Timer without the GUI")
+    parser.add_argument("--settings", help="settings file (defaults to the GUI's saved settings)")
+    parser.add_argument("--no-sound", action="store_true", help="do not initialise audio")
+    parser.add_argument("--control", action="store_true",
+                        help=f"serve the control API on loopback port {DEFAULT_HEADLESS_PORT}")
+    parser.add_argument("--control-port", type=int, default=None,
+                        help="serve the control API on this loopback port instead")
+    args = parser.parse_args(argv)
+    control_port = args.control_port if args.control_port is not None else DEFAULT_HEADLESS_PORT if args.control else 0
+    try:
+        HeadlessTimer(args.settings, sound=not args.no_sound, control_port=control_port).run()
+    except Exception as e:
+        print(f"Headless mode failed: {e}")
+        traceback.print_exc()
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+import sys, functools
+
+# Hotkey naming and matching shared by the Tk app (capture in the hotkey
+# entries, matching on pynput events) and the headless terminal mode.
+# Combos are strings like "CTRL+SHIFT+F1" in the format the settings file
+# stores. There is one canonical name per key; every spelling either backend
+# or an older settings file may produce (ESC, Escape, esc...) is translated
+# onto it once and cached, and the results are interned strings, so per
+# event matching allocates nothing and compares identical objects.
+
+MODIFIER_BITS = {"CTRL": 1, "ALT": 2, "SHIFT": 4}
+MODIFIER_ORDER = ("CTRL", "ALT", "SHIFT")
+
+# Other spellings of canonical names, from older settings files and the backends
+KEY_ALIASES = {
+    "ESC": "ESCAPE", "DEL": "DELETE", "ENTER": "RETURN", "CONTROL": "CTRL",
+    "PRIOR": "PAGE_UP", "NEXT": "PAGE_DOWN", "PRINT": "PRINT_SCREEN",
+    "SUPER": "CMD", "WIN": "CMD",
+    ",": "COMMA", "`": "GRAVE", "~": "GRAVE",
+    # Plus is shifted "=" on the main keyboard; numpad plus is named the same, like numpad digits
+    "+": "=", "PLUS": "=", "ADD": "=",
+    # Shifted characters name the key they sit on (US layout), like the vk codes do
+    "!": "1", "@": "2", "#": "3", "$": "4", "%": "5", "^": "6", "&": "7", "*": "8",
+    "(": "9", ")": "0", "_": "-", "{": "[", "}": "]", "|": "\\", ":": ";",
+    "\"": "'", "<": "COMMA", ">": ".", "?": "/",
+}
+
+# Tk keysyms that are not simply the uppercased key name
+TK_KEYSYMS = {
+    "Control_L": "CTRL", "Control_R": "CTRL",
+    "Alt_L": "ALT", "Alt_R": "ALT",
+    "Shift_L": "SHIFT", "Shift_R": "SHIFT",
+    "Super_L": "CMD", "Super_R": "CMD", "Win_L": "CMD", "Win_R": "CMD",
+    "grave": "GRAVE", "asciitilde": "GRAVE",
+    "minus": "-", "underscore": "-", "equal": "=", "plus": "=",
+    "bracketleft": "[", "braceleft": "[", "bracketright": "]", "braceright": "]",
+    "backslash": "\\", "bar": "\\", "semicolon": ";", "colon": ";",
+    "apostrophe": "'", "quotedbl": "'", "comma": "COMMA", "less": "COMMA",
+    "period": ".", "greater": ".", "slash": "/", "question": "/",
+    "exclam": "1", "at": "2", "numbersign": "3", "dollar": "4", "percent": "5",
+    "asciicircum": "6", "ampersand": "7", "asterisk": "8", "parenleft": "9", "parenright": "0",
+    "KP_Enter": "RETURN", "KP_Add": "=",
+    **{f"KP_{digit}": str(digit) for digit in range(10)},
+}
+
+# pynput Key names that are not simply the uppercased name
+PYNPUT_KEY_NAMES = {
+    "ctrl": "CTRL", "ctrl_l": "CTRL", "ctrl_r": "CTRL",
+    "alt": "ALT", "alt_l": "ALT", "alt_r": "ALT", "alt_gr": "ALT",
+    "shift": "SHIFT", "shift_l": "SHIFT", "shift_r": "SHIFT",
+    "cmd_l": "CMD", "cmd_r": "CMD",
+}
+
+# Windows virtual key codes for layout-independent keys
+VK_MAP = {
+    192: "GRAVE",    # Backtick/grave key (US layout)
+    223: "GRAVE",    # Backtick/grave key (alternate code)
+    189: "-",        # Minus
+    187: "=",        # Equals
+    219: "[",        # Left bracket
+    221: "]",        # Right bracket
+    220: "\\",       # Backslash
+    186: ";",        # Semicolon
+    222: "'",        # Quote
+    188: "COMMA",    # Comma
+    190: ".",        # Period
+    191: "/",        # Forward slash
+    32: "SPACE",     # Space
+    # Number row and numpad
+    **{48 + digit: str(digit) for digit in range(10)},
+    **{96 + digit: str(digit) for digit in range(10)},
+    107: "=",        # Numpad plus
+    # Letters
+    **{code: chr(code) for code in range(65, 91)},
+}
+# Elsewhere pynput's vk is a platform keysym, so only the character is trusted
+USE_VK = sys.platform == "win32"
+
+@functools.lru_cache(maxsize=1024)
+def canonical_name(name):
+    """Canonical interned name for one key spelling ('esc' -> 'ESCAPE')"""
+    name = name.strip()
+    upper = name.upper() if len(name) > 1 or name.isalpha() else name
+    return sys.intern(KEY_ALIASES.get(upper, upper))
+
+@functools.lru_cache(maxsize=4096)
+def key_id(backend, vk, name):
+    """
+    Interned canonical key for an event: ("tk", None, keysym),
+    ("pynput_key", None, Key name) or ("pynput", vk, char). None when the
+    key cannot be named.
+    """
+    if backend == "tk":
+        return sys.intern(TK_KEYSYMS[name]) if name in TK_KEYSYMS else canonical_name(name) if name else None
+    if backend == "pynput_key":
+        return sys.intern(PYNPUT_KEY_NAMES[name]) if name in PYNPUT_KEY_NAMES else canonical_name(name)
+    if USE_VK and vk in VK_MAP:
+        return sys.intern(VK_MAP[vk])
+    if name:
+        return canonical_name(name)
+    return None
+
+def pynput_key_id(key):
+    """key_id for a pynput Key (special key) or KeyCode (character key)"""
+    name = getattr(key, "name", None)
+    if name is not None:
+        return key_id("pynput_key", None, name)
+    return key_id("pynput", getattr(key, "vk", None), getattr(key, "char", None))
+
+@functools.lru_cache(maxsize=1024)
+def combo_string(mask, key):
+    """Interned combo for a modifier bitmask and a main key"""
+    parts = [mod for mod in MODIFIER_ORDER if mask & MODIFIER_BITS[mod]]
+    parts.append(key)
+    return sys.intern("+".join(parts))
+
+def combo_from_key(key, pressed_keys):
+    """
+    Combo for a pynput key press given the keys currently held. Returns None
+    for bare modifier presses and keys that cannot be named.
+    """
+    main = pynput_key_id(key)
+    if main is None or main in MODIFIER_BITS:
+        return None
+    mask = 0
+    for held in pressed_keys:
+        mask |= MODIFIER_BITS.get(pynput_key_id(held), 0)
+    return combo_string(mask, main)
+
+@functools.lru_cache(maxsize=1024)
+def normalize_combo(combo):
+    """Canonical interned form of a combo string: aliases resolved, modifiers in order"""
+    if combo in ("", None):
+        return ""
+    combo = combo.replace(" ", "")
+    mask = 0
+    keys = []
+    if combo.endswith("+") and (combo == "+" or combo.endswith("++")):
+        keys.append(canonical_name("+"))  # a trailing literal "+" is the key, not a separator
+        combo = combo[:-2]
+    for part in combo.split("+"):
+        if not part:
+            continue
+        name = canonical_name(part)
+        if name in MODIFIER_BITS:
+            mask |= MODIFIER_BITS[name]
+        else:
+            keys.append(name)
+    if not keys:  # modifiers only
+        return sys.intern("+".join(mod for mod in MODIFIER_ORDER if mask & MODIFIER_BITS[mod]))
+    return combo_string(mask, "+".join(keys))
+
+# ---------------- Sequence Matching ----------------
+SEQUENCE_SEPARATOR = ","
+DEFAULT_SEQUENCE_TIMEOUT = 0.3  # seconds allowed between the keys of a sequence
+
+def parse_binding(keys):
+    """
+    'F1' -> ('F1',); 'CTRL+F1, F2' -> ('CTRL+F1', 'F2'). Older settings spell
+    the comma key ','; right after '+' or on its own it is read as that key.
+    """
+    keys = keys.replace(" ", "")
+    if keys == SEQUENCE_SEPARATOR:
+        return (normalize_combo("COMMA"),)
+    keys = keys.replace("++" + SEQUENCE_SEPARATOR, "+PLUS" + SEQUENCE_SEPARATOR)  # plus key, then the next step
+    keys = keys.replace("+" + SEQUENCE_SEPARATOR, "+COMMA")
+    return tuple(normalize_combo(step) for step in keys.split(SEQUENCE_SEPARATOR) if step)
+
+class HotkeyNode:
+    __slots__ = ("children", "actions", "timeout", "fail", "depth")
+
+    def __init__(self, depth=0):
+        self.children = {}  # combo -> HotkeyNode
+        self.actions = []   # (action, timeout) of the bindings that end here
+        self.timeout = 0.0  # longest step timeout of the bindings passing through this node
+        self.fail = None    # node of the longest proper suffix of this path that is also in the trie
+        self.depth = depth
+
+class HotkeyMatcher:
+    """
+    All bindings compiled into one trie of combos. Each key event is a dict
+    lookup from the current node; when the sequence breaks or a step comes
+    too late, matching falls back along Aho-Corasick style links to the
+    longest suffix of the keys so far that can still continue (so with
+    "F1,F2,F3" and "F2,F4" bound, F1 F2 F4 fires "F2,F4"), and finally to the
+    root. Matching cost does not grow with the number of bindings. A binding
+    that is a prefix of a longer one fires straight away, so single-key
+    timers never wait for a possible sequence. Each binding keeps its own
+    step timeout.
+    """
+    def __init__(self, bindings=(), timeout=DEFAULT_SEQUENCE_TIMEOUT):
+        self.root = HotkeyNode()
+        self.timeout = timeout
+        self.count = 0
+        self.linked = True
+        self.reset()
+        for keys, action, *step_timeout in bindings:
+            self.add(keys, action, *step_timeout)
+
+    def add(self, keys, action, timeout=None):
+        steps = parse_binding(keys) if isinstance(keys, str) else tuple(keys)
+        if not steps:
+            return False
+        timeout = self.timeout if timeout is None else timeout
+        node = self.root
+        for step in steps:
+            if step not in node.children:
+                node.children[step] = HotkeyNode(node.depth + 1)
+            node = node.children[step]
+            node.timeout = max(node.timeout, timeout)
+        node.actions.append((action, timeout))
+        self.count += 1
+        self.linked = False
+        self.reset()
+        return True
+
+    def link(self):
+        """Set the fallback links breadth first, so every node's parent link is ready before it"""
+        self.root.fail = self.root
+        pending = []
+        for child in self.root.children.values():
+            child.fail = self.root
+            pending.append(child)
+        while pending:
+            node = pending.pop(0)
+            for combo, child in node.children.items():
+                fallback = node.fail
+                while fallback is not self.root and combo not in fallback.children:
+                    fallback = fallback.fail
+                child.fail = fallback.children.get(combo, self.root)
+                if child.fail is child:
+                    child.fail = self.root
+                pending.append(child)
+        self.linked = True
+
+    def reset(self):
+        self.node = self.root
+        self.times = []  # when each key on the path to self.node was pressed
+
+    def feed(self, combo, now):
+        """Advance on one combo at monotonic time now; returns the actions completed by it"""
+        if not self.linked:
+            self.link()
+        node, times = self.node, self.times
+        while True:
+            child = node.children.get(combo)
+            if child is not None and (node is self.root or now - times[-1] <= child.timeout):
+                break
+            if node is self.root:
+                self.reset()
+                return []
+            node = node.fail  # the sequence broke or timed out; try a shorter suffix of it
+            times = times[len(times) - node.depth:] if node.depth else []
+        times = times + [now]
+        gap = max((later - earlier for earlier, later in zip(times, times[1:])), default=0.0)
+        actions = [action for action, timeout in child.actions if gap <= timeout]
+        if child.children:
+            self.node, self.times = child, times
+        else:
+            self.reset()
+        return actions
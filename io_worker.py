@@ -0,0 +1,195 @@
+import os, time, queue, threading, traceback
+
+# Disk work (sound decoding, settings writes, error reports, file checks) runs
+# here instead of on the Tk thread, so a slow disk or an antivirus scan
+# delays the job, never a countdown. Results come back through a callback
+# that the UI runs on its own thread.
+DEFAULT_MAX_QUEUE = 64
+
+def write_file_atomic(path, text, encoding="utf-8"):
+    """Write text to path via a temporary file, so readers never see half a file"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding=encoding) as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return path
+
+def append_file(path, text, encoding="utf-8"):
+    with open(path, "a", encoding=encoding) as f:
+        f.write(text)
+    return path
+
+# ================= IO Worker Class =================
+class IOWorker:
+    """
+    Bounded job queue served by a small pool of daemon threads (one by
+    default, which keeps jobs in submission order). Jobs submitted with a
+    key replace any still-queued job with the same key, so e.g. only the
+    newest settings write runs, in the queued job's place. submit() never
+    blocks: a full queue rejects the job and returns False.
+    """
+    def __init__(self, max_queue=DEFAULT_MAX_QUEUE, threads=1, name="io-worker"):
+        self.jobs = queue.Queue(maxsize=max_queue)
+        self.thread_count = threads
+        self.name = name
+        self.threads = []
+        self.dispatch = None  # dispatch(fn) runs fn on the UI thread; None runs callbacks on the worker
+        self.lock = threading.Lock()
+        self.queued_by_key = {}  # key -> the still-queued job with that key
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.superseded = 0
+        self.max_depth = 0
+        self.total_latency = 0.0  # seconds from submit to done, over completed jobs
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+        self.max_run_time = 0.0
+
+    def set_dispatcher(self, dispatch):
+        self.dispatch = dispatch
+
+    def start(self):
+        with self.lock:
+            if self.threads:
+                return self
+            for i in range(self.thread_count):
+                thread = threading.Thread(target=self.run, name=f"{self.name}-{i + 1}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+        return self
+
+    def submit(self, fn, *args, callback=None, key=None):
+        """Queue fn(*args); callback(result, error) runs afterwards via the dispatcher"""
+        if not self.threads:
+            self.start()
+        job = [key, fn, args, callback, time.monotonic()]
+        with self.lock:
+            queued = self.queued_by_key.get(key) if key is not None else None
+            if queued is not None:
+                queued[1:] = job[1:]  # the queued job runs the newer work instead
+                self.submitted += 1
+                self.superseded += 1
+                return True
+            try:
+                self.jobs.put_nowait(job)
+            except queue.Full:
+                self.rejected += 1
+                print(f"I/O queue full, dropped {getattr(fn, '__name__', fn)}")
+                return False
+            if key is not None:
+                self.queued_by_key[key] = job
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, self.jobs.qsize())
+        return True
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            with self.lock:
+                key, fn, args, callback, submitted_at = job
+                if key is not None and self.queued_by_key.get(key) is job:
+                    del self.queued_by_key[key]
+            started = time.monotonic()
+            result = error = None
+            try:
+                result = fn(*args)
+            except Exception as e:
+                error = e
+                print(f"Error in background job {getattr(fn, '__name__', fn)}: {e}")
+                traceback.print_exc()
+            finished = time.monotonic()
+            with self.lock:
+                self.completed += 1
+                self.failed += error is not None
+                self.last_latency = finished - submitted_at
+                self.total_latency += self.last_latency
+                self.max_latency = max(self.max_latency, self.last_latency)
+                self.max_run_time = max(self.max_run_time, finished - started)
+            if callback is not None:
+                self.complete(callback, result, error)
+
+    def complete(self, callback, result, error):
+        try:
+            if self.dispatch is not None:
+                self.dispatch(lambda: callback(result, error))
+            else:
+                callback(result, error)
+        except Exception as e:
+            print(f"Error delivering background job result: {e}")
+
+    def stop(self, timeout=2.0):
+        """Finish the queued jobs (up to timeout seconds) and stop the threads"""
+        threads, self.threads = self.threads, []
+        deadline = time.monotonic() + timeout
+        for _ in threads:
+            try:
+                self.jobs.put(None, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+    def stats(self):
+        with self.lock:
+            return {
+                "depth": self.jobs.qsize(),
+                "max_depth": self.max_depth,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "superseded": self.superseded,
+                "mean_latency_ms": self.total_latency / self.completed * 1000.0 if self.completed else 0.0,
+                "max_latency_ms": self.max_latency * 1000.0,
+                "last_latency_ms": self.last_latency * 1000.0,
+                "max_run_ms": self.max_run_time * 1000.0,
+            }
+
+# ================= Tk Callback Queue Class =================
+class TkCallbackQueue:
+    """
+    dispatch(fn) for IOWorker: any thread may call it, fn runs on the Tk
+    thread. One after(0) drain is scheduled per burst of completions.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.pending = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.drain_scheduled = False
+
+    def __call__(self, fn):
+        self.pending.put(fn)
+        with self.lock:
+            schedule = not self.drain_scheduled
+            self.drain_scheduled = True
+        if schedule:
+            self.root.after(0, self.drain)
+
+    def drain(self):
+        with self.lock:
+            self.drain_scheduled = False
+        while True:
+            try:
+                fn = self.pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                fn()
+            except Exception as e:
+                print(f"Error in background job callback: {e}")
+                traceback.print_exc()
+
+default_worker_instance = None
+default_worker_lock = threading.Lock()
+
+def default_worker():
+    """The process-wide worker, shared by the app and the exception handler"""
+    global default_worker_instance
+    with default_worker_lock:
+        if default_worker_instance is None:
+            default_worker_instance = IOWorker()
+        return default_worker_instance
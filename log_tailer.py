@@ -0,0 +1,170 @@
+import os, re, threading, traceback
+
+from file_watch import FileWatcher
+from timer_core import TIMER_SIDES
+
+# Arms timers from lines appended to a game or chat log. All trigger patterns
+# are joined into one alternation of named groups, so every new chunk of the
+# log is scanned in a single pass no matter how many triggers are configured,
+# and only bytes appended since the last read are ever looked at. An
+# alternation reports one branch per position, so the few lines it hits are
+# scanned again with each trigger's own regex, and triggers that overlap on a
+# line all fire. The rare pattern that cannot be wrapped (backreferences,
+# named groups) is scanned with its own regex.
+READ_CHUNK = 1 << 20
+
+LEADING_FLAGS = re.compile(r"\(\?([aiLmsux]+)\)")
+# Group references that would point elsewhere, or names that could clash, once wrapped into the alternation
+GROUP_REFERENCES = re.compile(r"(?<!\\)(?:\\\\)*\\[1-9]|\(\?P[<=]|\(\?\(")
+
+def scope_flags(pattern):
+    """Turn leading global flags like "(?i)" into a scoped "(?i:...)" group, which may sit inside an alternation"""
+    flags = ""
+    match = LEADING_FLAGS.match(pattern)
+    while match:
+        flags += match.group(1)
+        pattern = pattern[match.end():]
+        match = LEADING_FLAGS.match(pattern)
+    if not flags:
+        return pattern
+    if "x" in flags:
+        pattern += "\n"  # a trailing verbose-mode comment must not swallow the ")"
+    return f"(?{flags}:{pattern})"
+
+def compile_triggers(triggers):
+    """
+    Build (combined, members, standalone, trigger list) from
+    [{"pattern": ..., "timer": "left", ...}]. combined is the alternation
+    (group t<i> belongs to trigger i) or None; members are the (regex, trigger
+    number) pairs of the triggers in it and standalone those of patterns with
+    group references or named groups, which break when wrapped. "ignore_case"
+    is scoped to its own trigger, in the alternation too.
+    """
+    parts = []
+    members = []
+    standalone = []
+    for i, trigger in enumerate(triggers):
+        if trigger.get("timer") not in TIMER_SIDES:
+            raise ValueError(f"trigger {trigger.get('pattern')!r} needs a timer from {', '.join(TIMER_SIDES)}")
+        flags = re.MULTILINE | (re.IGNORECASE if trigger.get("ignore_case") else 0)
+        try:
+            regex = re.compile(trigger["pattern"], flags)  # report a bad pattern by itself, not as part of the alternation
+        except re.error as e:
+            raise ValueError(f"bad trigger pattern {trigger['pattern']!r}: {e}") from e
+        if GROUP_REFERENCES.search(trigger["pattern"]):
+            standalone.append((regex, i))
+            continue
+        pattern = scope_flags(trigger["pattern"])
+        if trigger.get("ignore_case"):
+            pattern = f"(?i:{pattern})"
+        parts.append(f"(?P<t{i}>{pattern})")
+        members.append((regex, i))
+    combined = None
+    if parts:
+        try:
+            combined = re.compile("|".join(parts), re.MULTILINE)
+        except re.error:
+            # Something else did not survive being combined; scan those triggers one by one
+            standalone.extend(members)
+            members = []
+    return combined, members, standalone, list(triggers)
+
+# ================= Log Tailer Class =================
+class LogTailer:
+    """
+    Follows path from its current end and calls on_match(trigger, line) for
+    every trigger hit in newly written lines. Handles the log being truncated
+    or replaced by starting again from the top of the new file.
+    """
+    def __init__(self, path, triggers, on_match, encoding="utf-8", poll_interval=0.5):
+        self.path = path
+        self.combined, self.members, self.standalone, self.triggers = compile_triggers(triggers)
+        self.on_match = on_match
+        self.encoding = encoding
+        self.lock = threading.Lock()
+        self.offset = 0
+        self.inode = None
+        self.partial = ""  # text after the last newline, waiting for the rest of its line
+        self.bytes_scanned = 0
+        self.matches = 0
+        self.skip_existing()
+        self.watcher = FileWatcher(path, self.read_new, poll_interval)
+
+    def start(self):
+        self.watcher.start()
+        print(f"Tailing {self.path} for {len(self.triggers)} triggers")
+        return self
+
+    def stop(self):
+        self.watcher.stop()
+
+    def skip_existing(self):
+        """Start at the current end; what is already in the log has happened"""
+        try:
+            st = os.stat(self.path)
+            self.offset, self.inode = st.st_size, st.st_ino
+        except OSError:
+            self.offset, self.inode = 0, None
+
+    def read_new(self):
+        """Read and scan everything appended since the last call"""
+        with self.lock:
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                return  # rotated away; the new file shows up as another change
+            if st.st_ino != self.inode or st.st_size < self.offset:
+                self.inode, self.offset, self.partial = st.st_ino, 0, ""
+            if st.st_size == self.offset:
+                return
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                while True:
+                    data = f.read(READ_CHUNK)
+                    if not data:
+                        break
+                    self.offset += len(data)
+                    self.bytes_scanned += len(data)
+                    self.scan(data.decode(self.encoding, errors="replace"))
+
+    def scan(self, text):
+        text = self.partial + text
+        end = text.rfind("\n") + 1
+        self.partial = text[end:]
+        hits = []
+        if self.combined is not None:
+            for line_start, line_end in self.candidate_lines(text, end):
+                for regex, number in self.members:
+                    for match in regex.finditer(text, line_start, line_end):
+                        hits.append((match.start(), match.end(), number))
+        for regex, number in self.standalone:
+            for match in regex.finditer(text, 0, end):
+                hits.append((match.start(), match.end(), number))
+        hits.sort()  # report in log order across the separate regexes
+        for start, stop, number in hits:
+            trigger = self.triggers[number]
+            line_start, line_end = self.line_span(text, start, stop, end)
+            self.matches += 1
+            try:
+                self.on_match(trigger, text[line_start:line_end])
+            except Exception as e:
+                print(f"Error handling log trigger {trigger['pattern']!r}: {e}")
+                traceback.print_exc()
+
+    def candidate_lines(self, text, end):
+        """Spans of the lines the combined alternation hits, merged so each is rescanned once"""
+        spans = []
+        for match in self.combined.finditer(text, 0, end):
+            line_start, line_end = self.line_span(text, match.start(), match.end(), end)
+            if spans and line_start <= spans[-1][1]:
+                spans[-1] = (spans[-1][0], max(spans[-1][1], line_end))
+            else:
+                spans.append((line_start, line_end))
+        return spans
+
+    def line_span(self, text, start, stop, end):
+        line_start = text.rfind("\n", 0, start) + 1
+        line_end = text.find("\n", stop, end)
+        if line_end < 0:
+            line_end = end  # the match swallowed the newline itself
+        return line_start, line_end
@@ -0,0 +1,173 @@
+import os, sys, json, time, shutil, threading, subprocess, urllib.request
+
+from io_worker import IOWorker
+from timer_core import get_data_dir
+
+# Fans one expiry out to several sinks at once. Sinks that only touch the
+# UI (sound, window) run inline on the Tk thread, first, so nothing can
+# delay the sound. Every other sink has its own worker thread and queue,
+# gets a timeout for its own I/O, and a sink that hangs anyway only backs up
+# its own queue. Latency from expiry to delivery is tracked per sink.
+#
+# Settings section "notify":
+#   {"sinks": ["sound", "window", "desktop", "webhook", "log"], "timeout": 2.0,
+#    "webhook_url": "http://127.0.0.1:8080/timer", "raise": false}
+# Without the section only the sound plays, as before.
+DEFAULT_SINKS = ("sound",)
+DEFAULT_TIMEOUT = 2.0
+SINK_QUEUE = 8
+
+# ---------------- Sinks ----------------
+class SoundSink:
+    name = "sound"
+    inline = True
+
+    def __init__(self, play):
+        self.play = play
+
+    def send(self, event, timeout):
+        self.play(event["side"])
+
+class WindowSink:
+    """Flashes the taskbar entry (Windows) or rings the bell, and optionally raises the window"""
+    name = "window"
+    inline = True
+
+    def __init__(self, root, raise_window=False):
+        self.root = root
+        self.raise_window = raise_window
+
+    def send(self, event, timeout):
+        if self.raise_window:
+            self.root.deiconify()
+            self.root.lift()
+        if sys.platform == "win32":
+            import ctypes
+            hwnd = ctypes.windll.user32.GetParent(self.root.winfo_id())
+            ctypes.windll.user32.FlashWindow(hwnd, True)
+        else:
+            self.root.bell()
+
+class DesktopSink:
+    """Desktop notification through the session D-Bus (org.freedesktop.Notifications)"""
+    name = "desktop"
+    inline = False
+
+    def __init__(self):
+        self.gdbus = shutil.which("gdbus")
+        self.notify_send = shutil.which("notify-send")
+        if not self.gdbus and not self.notify_send:
+            raise RuntimeError("desktop notifications need gdbus or notify-send")
+
+    def send(self, event, timeout):
+        title, body = "Tibia Timer", event["text"]
+        if self.gdbus:
+            command = [self.gdbus, "call", "--session", "--dest", "org.freedesktop.Notifications",
+                       "--object-path", "/org/freedesktop/Notifications",
+                       "--method", "org.freedesktop.Notifications.Notify",
+                       "Tibia Timer", "0", "", title, body, "[]", "{}", "5000"]
+        else:
+            command = [self.notify_send, "-t", "5000", title, body]
+        subprocess.run(command, timeout=timeout, check=True, capture_output=True)
+
+class WebhookSink:
+    """POSTs the event as JSON to a (local) HTTP endpoint"""
+    name = "webhook"
+    inline = False
+
+    def __init__(self, url):
+        if not url:
+            raise ValueError("the webhook sink needs \"webhook_url\"")
+        self.url = url
+
+    def send(self, event, timeout):
+        request = urllib.request.Request(self.url, data=json.dumps(event).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+
+class LogSink:
+    name = "log"
+    inline = False
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_data_dir(), "notifications.log")
+
+    def send(self, event, timeout):
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(event["expired_at"]))
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(f"{stamp} {event['side']} {event['text']}\n")
+
+def build_sinks(config, root, play):
+    """Sink objects for the "notify" settings section; sinks that cannot work here are skipped"""
+    factories = {
+        "sound": lambda: SoundSink(play),
+        "window": lambda: WindowSink(root, config.get("raise", False)),
+        "desktop": DesktopSink,
+        "webhook": lambda: WebhookSink(config.get("webhook_url")),
+        "log": lambda: LogSink(config.get("log_path")),
+    }
+    sinks = []
+    for name in config.get("sinks", DEFAULT_SINKS):
+        if name not in factories:
+            print(f"Unknown notification sink {name!r}, expected one of {', '.join(factories)}")
+            continue
+        try:
+            sinks.append(factories[name]())
+        except (RuntimeError, ValueError, OSError) as e:
+            print(f"Notification sink {name} disabled: {e}")
+    return sinks
+
+# ================= Notifier Class =================
+class Notifier:
+    def __init__(self, sinks, timeout=DEFAULT_TIMEOUT):
+        self.sinks = sinks
+        self.timeout = timeout
+        self.workers = {}
+        for sink in sinks:
+            if not sink.inline:
+                self.workers[sink.name] = IOWorker(max_queue=SINK_QUEUE, name=f"notify-{sink.name}").start()
+        self.lock = threading.Lock()
+        self.counters = {sink.name: {"sent": 0, "failed": 0, "timed_out": 0, "dropped": 0,
+                                     "total_ms": 0.0, "max_ms": 0.0} for sink in sinks}
+
+    def notify(self, side, text):
+        """Deliver one expiry to every sink; returns once the inline sinks have run"""
+        event = {"side": side, "text": text, "expired_at": time.time()}
+        started = time.monotonic()
+        for sink in self.sinks:
+            if sink.inline:
+                self.deliver(sink, event, started)
+        for sink in self.sinks:
+            if not sink.inline and not self.workers[sink.name].submit(self.deliver, sink, event, started):
+                with self.lock:
+                    self.counters[sink.name]["dropped"] += 1
+
+    def deliver(self, sink, event, started):
+        error = None
+        try:
+            sink.send(event, self.timeout)
+        except Exception as e:
+            error = e
+        latency = (time.monotonic() - started) * 1000.0
+        with self.lock:
+            counters = self.counters[sink.name]
+            counters["sent"] += 1
+            counters["total_ms"] += latency
+            counters["max_ms"] = max(counters["max_ms"], latency)
+            if error is not None:
+                counters["failed"] += 1
+                if isinstance(error, (TimeoutError, subprocess.TimeoutExpired)) or isinstance(
+                        getattr(error, "reason", None), TimeoutError):  # urllib wraps socket timeouts
+                    counters["timed_out"] += 1
+        if error is not None:
+            print(f"Notification sink {sink.name} failed after {latency:.0f} ms: {error}")
+
+    def stats(self):
+        with self.lock:
+            return {name: dict(counters, mean_ms=counters["total_ms"] / counters["sent"] if counters["sent"] else 0.0)
+                    for name, counters in self.counters.items()}
+
+    def close(self):
+        for worker in self.workers.values():
+            worker.stop(timeout=self.timeout)
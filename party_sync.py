@@ -0,0 +1,168 @@
+import os, time, socket, struct, threading, traceback
+
+from timer_core import TIMER_SIDES
+
+# Party sync: every instance multicasts (or broadcasts) its timer changes as
+# one small datagram each and merges what the others send into a table of
+# remote timers. Packet layout, 51 bytes little endian:
+#   MAGIC | u8 version | u8 kind | 8-byte peer id | u32 seq | f64 sent_at |
+#   u8 timer index | f64 deadline | 16-byte player name
+# sent_at and deadline are on the sender's monotonic clock. Receivers map
+# them onto their own with a per-peer offset, the smallest (receive - send)
+# difference seen so far, which is the clock difference plus the fastest
+# transit time observed.
+PACKET = struct.Struct("<4sBB8sIdBd16s")
+PARTY_MAGIC = b"TTPS"
+PARTY_VERSION = 1
+EVENT_ARM, EVENT_EXPIRE, EVENT_CANCEL = 1, 2, 3
+EVENT_STATES = {EVENT_ARM: "running", EVENT_EXPIRE: "expired", EVENT_CANCEL: "ready"}
+DEFAULT_GROUP = "239.255.42.99"
+DEFAULT_PARTY_PORT = 47655
+SEND_REPEAT = 2  # every event goes out twice; receivers drop the copy
+
+def encode_event(kind, peer, seq, sent_at, timer, deadline, name):
+    return PACKET.pack(PARTY_MAGIC, PARTY_VERSION, kind, peer, seq, sent_at,
+                       timer, deadline, name.encode("utf-8")[:16])
+
+def decode_event(data):
+    """(kind, peer, seq, sent_at, timer index, deadline, name); ValueError for foreign packets"""
+    if len(data) != PACKET.size:
+        raise ValueError(f"expected {PACKET.size} bytes, got {len(data)}")
+    magic, version, kind, peer, seq, sent_at, timer, deadline, name = PACKET.unpack(data)
+    if magic != PARTY_MAGIC or version != PARTY_VERSION:
+        raise ValueError("not a party sync packet")
+    if kind not in EVENT_STATES or timer >= len(TIMER_SIDES):
+        raise ValueError(f"bad event kind {kind} or timer {timer}")
+    return kind, peer, seq, sent_at, timer, deadline, name.rstrip(b"\0").decode("utf-8", "replace")
+
+# ================= Party Sync Class =================
+class PartySync:
+    """
+    Sends local timer changes and keeps the merged remote timer table.
+    Receiving runs on its own thread; on_change() is called once after the
+    table changes and not again until remote_timers() has been read, so a
+    burst of events from many peers costs the GUI a single refresh.
+    """
+    def __init__(self, name="", group=DEFAULT_GROUP, port=DEFAULT_PARTY_PORT,
+                 interface="0.0.0.0", ttl=1, on_change=None):
+        self.name = name or socket.gethostname()
+        self.address = (group, port)
+        self.on_change = on_change
+        self.peer = os.urandom(8)  # new identity each run, so seq can restart at zero
+        self.seq = 0
+        self.lock = threading.Lock()
+        self.offsets = {}    # peer -> local clock minus peer clock
+        self.last_seq = {}   # (peer, timer index) -> newest seq applied
+        self.remote = {}     # (peer, timer index) -> {"name", "timer", "state", "deadline"}
+        self.sent = {}       # side -> (state, deadline) last announced
+        self.notify_pending = False
+        self.received = 0
+        self.duplicates = 0
+        self.running = False
+        self.thread = None
+        self.sock = self.open_socket(group, port, interface, ttl)
+
+    def open_socket(self, group, port, interface, ttl):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)  # several instances on one host
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 18)  # absorb bursts from many peers
+        sock.bind(("", port))
+        if socket.inet_aton(group)[0] in range(224, 240):
+            membership = struct.pack("4s4s", socket.inet_aton(group), socket.inet_aton(interface))
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        else:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.settimeout(0.5)  # lets the receive loop notice stop()
+        return sock
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.receive_loop, name="party-sync", daemon=True)
+        self.thread.start()
+        print(f"Party sync as {self.name!r} on {self.address[0]}:{self.address[1]}")
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(1.0)
+            self.thread = None
+        self.sock.close()
+
+    # ---------------- Sending ----------------
+    def timer_changed(self, side, state, deadline=None):
+        """Announce a local timer if its state or deadline changed since the last announcement"""
+        if self.sent.get(side) == (state, deadline):
+            return
+        self.sent[side] = (state, deadline)
+        kind = {"running": EVENT_ARM, "expired": EVENT_EXPIRE}.get(state, EVENT_CANCEL)
+        self.send(kind, TIMER_SIDES.index(side), deadline or 0.0)
+
+    def send(self, kind, timer, deadline):
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        packet = encode_event(kind, self.peer, self.seq, time.monotonic(), timer, deadline, self.name)
+        try:
+            for _ in range(SEND_REPEAT):
+                self.sock.sendto(packet, self.address)
+        except OSError as e:
+            print(f"Party sync send failed: {e}")
+
+    # ---------------- Receiving ----------------
+    def receive_loop(self):
+        while self.running:
+            try:
+                data, _sender = self.sock.recvfrom(512)
+            except socket.timeout:
+                continue
+            except OSError:
+                if self.running:
+                    traceback.print_exc()
+                return
+            try:
+                self.apply(decode_event(data), time.monotonic())
+            except ValueError:
+                continue  # someone else's traffic on the port
+
+    def apply(self, event, now):
+        """Merge one decoded event received at local monotonic time now"""
+        kind, peer, seq, sent_at, timer, deadline, name = event
+        if peer == self.peer:
+            return  # our own multicast looped back
+        key = (peer, timer)
+        with self.lock:
+            self.received += 1
+            if seq <= self.last_seq.get(key, 0):
+                self.duplicates += 1  # repeat copy, or older than what we already applied
+                return
+            self.last_seq[key] = seq
+            offset = min(self.offsets.get(peer, now - sent_at), now - sent_at)
+            self.offsets[peer] = offset
+            self.remote[key] = {"name": name, "timer": TIMER_SIDES[timer], "state": EVENT_STATES[kind],
+                                "deadline": deadline + offset if kind == EVENT_ARM else None}
+            notify = not self.notify_pending
+            self.notify_pending = True
+        if notify and self.on_change is not None:
+            self.on_change()
+
+    def remote_timers(self, now=None):
+        """Remote timers sorted by player and timer, with remaining seconds on the local clock"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self.notify_pending = False
+            timers = []
+            for entry in self.remote.values():
+                entry = dict(entry)
+                if entry["state"] == "running":
+                    entry["remaining"] = max(0.0, entry["deadline"] - now)
+                    if entry["remaining"] == 0.0:
+                        entry["state"] = "expired"  # expire packet lost or not here yet
+                else:
+                    entry["remaining"] = None
+                timers.append(entry)
+        timers.sort(key=lambda entry: (entry["name"], TIMER_SIDES.index(entry["timer"])))
+        return timers
@@ -0,0 +1,115 @@
+import bisect, threading
+from collections import namedtuple
+from functools import lru_cache
+
+# Bundled table of spells, runes, potions and food buffs with their
+# cooldowns (assets/spells.tsv). It is only read the first time someone
+# searches, and searching goes through two small indexes built at load:
+#   - a sorted list of (term, entry) for prefix lookups by bisection
+#   - trigram -> entries, so a substring query only checks entries that
+#     contain every trigram of the query
+# Each term is an entry's lowercased name or spell words.
+SPELL_FILE = "assets/spells.tsv"
+SEARCH_LIMIT = 60
+
+Spell = namedtuple("Spell", "name words vocations kind group cooldown group_cooldown sound")
+
+def parse_spells(text):
+    """Spell tuples from the tab separated table; '#' lines are comments"""
+    spells = []
+    for line_number, line in enumerate(text.splitlines(), 1):
+        if not line.strip() or line.startswith("#"):
+            continue
+        fields = line.split("\t")
+        if len(fields) != len(Spell._fields):
+            raise ValueError(f"{SPELL_FILE} line {line_number}: expected {len(Spell._fields)} fields, got {len(fields)}")
+        name, words, vocations, kind, group, cooldown, group_cooldown, sound = fields
+        spells.append(Spell(name, words, tuple(vocations.split()), kind, group,
+                            float(cooldown), float(group_cooldown), sound))
+    return spells
+
+def trigrams(term):
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+# ================= Spell Index Class =================
+class SpellIndex:
+    """Prefix and substring search over spell names and words"""
+    def __init__(self, spells):
+        self.spells = spells
+        self.by_name = {spell.name.lower(): spell for spell in spells}
+        self.terms = []  # (term, entry number), sorted
+        self.grams = {}  # trigram -> set of entry numbers
+        for number, spell in enumerate(spells):
+            for term in {spell.name.lower(), spell.words.lower()}:
+                if not term:
+                    continue
+                self.terms.append((term, number))
+                for gram in trigrams(term):
+                    self.grams.setdefault(gram, set()).add(number)
+        self.terms.sort()
+        self.search = lru_cache(maxsize=256)(self.search)  # retyping and backspacing repeats queries
+
+    def get(self, name):
+        return self.by_name.get(name.lower())
+
+    def prefix_matches(self, query):
+        """Entry numbers with a term starting with query, in term order"""
+        found = []
+        i = bisect.bisect_left(self.terms, (query,))
+        while i < len(self.terms) and self.terms[i][0].startswith(query):
+            found.append(self.terms[i][1])
+            i += 1
+        return found
+
+    def substring_matches(self, query):
+        """Entry numbers with query anywhere in a term, in table order"""
+        if len(query) >= 3:
+            postings = sorted((self.grams.get(gram, set()) for gram in trigrams(query)), key=len)
+            candidates = set.intersection(*postings) if postings[0] else set()
+        else:
+            candidates = range(len(self.spells))
+        return [number for number in sorted(candidates)
+                if query in self.spells[number].name.lower() or query in self.spells[number].words.lower()]
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """Spells matching query: prefix matches first, then other substring matches"""
+        query = " ".join(query.lower().split())
+        if not query:
+            return tuple(self.spells[:limit])
+        seen = set()
+        results = []
+        for number in self.prefix_matches(query) + self.substring_matches(query):
+            if number not in seen:
+                seen.add(number)
+                results.append(self.spells[number])
+                if len(results) >= limit:
+                    break
+        return tuple(results)
+
+# ================= Spell Database Class =================
+class SpellDatabase:
+    """Loads and indexes the bundled table on first use"""
+    def __init__(self, assets, name=SPELL_FILE):
+        self.assets = assets
+        self.name = name
+        self.lock = threading.Lock()
+        self.index = None
+
+    def load(self):
+        with self.lock:
+            if self.index is None:
+                spells = []
+                try:
+                    with self.assets.open(self.name) as f:
+                        spells = parse_spells(f.read().decode("utf-8"))
+                except (OSError, KeyError, ValueError) as e:
+                    print(f"Could not load the spell table: {e}")
+                self.index = SpellIndex(spells)
+                print(f"Loaded {len(spells)} spells")
+            return self.index
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        return self.load().search(query, limit)
+
+    def get(self, name):
+        return self.load().get(name)
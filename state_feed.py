@@ -0,0 +1,167 @@
+import json, threading, collections
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Live timer state for streaming overlays (e.g. an OBS browser source).
+#   GET /events  Server-Sent Events: a "snapshot" event on connect, then one
+#                "delta" event per change holding only the changed fields
+#   GET /state   current snapshot as JSON
+#   GET /        minimal overlay page that renders the feed
+# The Tk thread only calls StateFeed.publish(): the delta is computed and
+# encoded once there, and every viewer's own server thread copies the same
+# bytes out of a shared ring buffer.
+DEFAULT_FEED_PORT = 47654
+BACKLOG_EVENTS = 256
+KEEPALIVE_SECONDS = 15
+
+def sse_event(name, seq, payload):
+    data = json.dumps(payload, separators=(",", ":"))
+    return f"event: {name}\nid: {seq}\ndata: {data}\n\n".encode("utf-8")
+
+# ================= State Feed Class =================
+class StateFeed:
+    """Holds the latest timer states and a ring buffer of encoded delta events"""
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.states = {}   # timer id -> {"id", "state", "remaining"}
+        self.seq = 0
+        self.events = collections.deque(maxlen=BACKLOG_EVENTS)  # (seq, encoded event)
+        self.closed = False
+
+    def publish(self, states):
+        """Record new states (list of dicts with an "id"); only changed fields go out"""
+        changes = []
+        for state in states:
+            previous = self.states.get(state["id"], {})
+            changed = {key: value for key, value in state.items()
+                       if key != "id" and (key not in previous or previous[key] != value)}
+            if changed:
+                changes.append(dict(id=state["id"], **changed))
+        if not changes:
+            return
+        with self.condition:
+            for change in changes:
+                self.states.setdefault(change["id"], {}).update(change)
+            self.seq += 1
+            self.events.append((self.seq, sse_event("delta", self.seq, {"seq": self.seq, "timers": changes})))
+            self.condition.notify_all()
+
+    def snapshot(self):
+        """(seq, encoded snapshot event, snapshot dict) under one consistent view"""
+        with self.condition:
+            payload = {"seq": self.seq, "timers": [dict(state) for state in self.states.values()]}
+            return self.seq, sse_event("snapshot", self.seq, payload), payload
+
+    def events_after(self, seq, timeout):
+        """
+        Block until there are events newer than seq. Returns (new seq, list of
+        encoded events), or (seq, None) if seq fell out of the ring buffer and
+        the viewer has to resync from a snapshot.
+        """
+        with self.condition:
+            if self.seq == seq and not self.closed:
+                self.condition.wait(timeout)
+            if self.seq == seq:
+                return seq, []
+            if not self.events or self.events[0][0] > seq + 1:
+                return seq, None
+            return self.seq, [event for event_seq, event in self.events if event_seq > seq]
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+OVERLAY_PAGE = b"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Tibia Timer</title>
+<style>body{margin:0;font:bold 28px sans-serif;color:#fff;text-shadow:0 0 4px #000;background:transparent}
+div{padding:2px 8px}.running{color:#ffd24d}.expired{color:#5dff5d}</style></head>
+<body><div id="timers"></div><script>
+var timers = {};
+function fmt(t){ if(t.state !== "running" || t.remaining == null) return t.state === "expired" ? "Ready!" : "Ready";
+  var r = t.remaining; if (r > 10) { r = Math.ceil(r); return Math.floor(r/60) + ":" + ("0" + r%60).slice(-2); }
+  return r.toFixed(1) + "s"; }
+function draw(){ var html = ""; for (var id in timers) { var t = timers[id];
+  html += '<div class="' + t.state + '">' + id + ": " + fmt(t) + "</div>"; }
+  document.getElementById("timers").innerHTML = html; }
+var source = new EventSource("/events");
+source.addEventListener("snapshot", function(e){ timers = {};
+  JSON.parse(e.data).timers.forEach(function(t){ timers[t.id] = t; }); draw(); });
+source.addEventListener("delta", function(e){
+  JSON.parse(e.data).timers.forEach(function(t){ timers[t.id] = Object.assign(timers[t.id] || {}, t); }); draw(); });
+</script></body></html>
+"""
+
+# ================= Feed Request Handler =================
+class FeedRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # one line per request would flood the console with viewers reconnecting
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/events":
+            self.stream_events()
+        elif path == "/state":
+            _seq, _event, payload = self.server.feed.snapshot()
+            self.send_body(json.dumps(payload).encode("utf-8"), "application/json")
+        elif path == "/":
+            self.send_body(OVERLAY_PAGE, "text/html; charset=utf-8")
+        else:
+            self.send_error(404)
+
+    def send_body(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_events(self):
+        feed = self.server.feed
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            seq, event, _payload = feed.snapshot()
+            self.wfile.write(event)
+            self.wfile.flush()
+            while not feed.closed:
+                seq, events = feed.events_after(seq, KEEPALIVE_SECONDS)
+                if events is None:
+                    seq, event, _payload = feed.snapshot()
+                    events = [event]
+                self.wfile.write(b"".join(events) if events else b": keepalive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+            pass  # viewer went away
+
+class FeedHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 64  # overlays tend to reconnect all at once
+
+# ================= State Feed Server Class =================
+class StateFeedServer:
+    """Serves a StateFeed over HTTP on loopback from background threads"""
+    def __init__(self, feed, port=DEFAULT_FEED_PORT, host="127.0.0.1"):
+        self.feed = feed
+        self.server = FeedHTTPServer((host, port), FeedRequestHandler)
+        self.server.feed = feed
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="state-feed", daemon=True)
+        self.thread.start()
+        print(f"State feed on http://{self.server.server_address[0]}:{self.server.server_address[1]}/")
+        return self
+
+    def stop(self):
+        self.feed.close()
+        self.server.shutdown()
+        self.server.server_close()
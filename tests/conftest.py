@@ -0,0 +1,5 @@
+import os, sys
+
+# Tests import the app modules from the repository root and never touch a sound card
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
@@ -0,0 +1,97 @@
+import os, json, shutil
+
+import pytest
+from PIL import Image
+
+from asset_build import preprocess_assets, PreparedAssets, MANIFEST_NAME, MIXER_FREQUENCY, MIXER_SIZE, MIXER_CHANNELS
+from asset_pack import AssetSource, build_pack, PACK_NAME
+
+REPO_ASSETS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+MIXER_FORMAT = (MIXER_FREQUENCY, MIXER_SIZE, MIXER_CHANNELS)
+
+@pytest.fixture
+def base_dir(tmp_path):
+    """A small asset tree: one real MP3, a two-frame GIF and the image that gets a pre-sized variant"""
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    shutil.copy(os.path.join(REPO_ASSETS, "click.mp3"), assets / "click.mp3")
+    frames = [Image.new("RGBA", (8, 6), color) for color in ((255, 0, 0, 255), (0, 0, 255, 255))]
+    frames[0].save(assets / "anim.gif", save_all=True, append_images=frames[1:], duration=[40, 60], loop=0)
+    Image.new("RGBA", (200, 200), (0, 255, 0, 255)).save(assets / "Transparentmage.png")
+    preprocess_assets(str(tmp_path))
+    return tmp_path
+
+def test_preprocess_writes_manifest_and_outputs(base_dir):
+    with open(base_dir / MANIFEST_NAME) as f:
+        manifest = json.load(f)
+    entries = manifest["entries"]
+    assert manifest["mixer"] == {"frequency": MIXER_FREQUENCY, "size": MIXER_SIZE, "channels": MIXER_CHANNELS}
+    assert entries["assets/click.mp3"]["kind"] == "sound"
+    assert entries["assets/click.mp3"]["duration"] > 0
+    assert entries["assets/anim.gif"]["count"] == 2
+    assert entries["assets/anim.gif"]["durations"] == [40, 60]
+    image = entries["assets/Transparentmage.png@94x94"]
+    with Image.open(base_dir / image["output"]) as resized:
+        assert resized.size == (94, 94)
+    for entry in entries.values():
+        assert (base_dir / entry["output"]).exists()
+
+def test_fresh_entries_are_used(base_dir):
+    prepared = PreparedAssets(AssetSource(str(base_dir)))
+    assert prepared.sound("assets/click.mp3", MIXER_FORMAT) == "prepared/sounds/click.wav"
+    assert prepared.frames("assets/anim.gif")["frame_width"] == 8
+    assert prepared.image("assets/Transparentmage.png", (94, 94)) is not None
+
+def test_changed_source_is_stale(base_dir):
+    with open(base_dir / "assets" / "click.mp3", "ab") as f:
+        f.write(b"\0")
+    prepared = PreparedAssets(AssetSource(str(base_dir)))
+    assert prepared.sound("assets/click.mp3", MIXER_FORMAT) is None
+    assert prepared.frames("assets/anim.gif") is not None
+
+def test_changed_or_missing_output_is_stale(base_dir):
+    with open(base_dir / "prepared" / "frames" / "anim.png", "ab") as f:
+        f.write(b"\0")
+    os.remove(base_dir / "prepared" / "sounds" / "click.wav")
+    prepared = PreparedAssets(AssetSource(str(base_dir)))
+    assert prepared.frames("assets/anim.gif") is None
+    assert prepared.sound("assets/click.mp3", MIXER_FORMAT) is None
+
+def test_missing_source_counts_as_fresh(base_dir):
+    os.remove(base_dir / "assets" / "anim.gif")
+    prepared = PreparedAssets(AssetSource(str(base_dir)))
+    assert prepared.frames("assets/anim.gif") is not None
+
+def test_other_mixer_format_falls_back(base_dir):
+    prepared = PreparedAssets(AssetSource(str(base_dir)))
+    assert prepared.sound("assets/click.mp3", (22050, MIXER_SIZE, 1)) is None
+
+def test_manifest_version_mismatch_uses_raw_files(base_dir):
+    path = base_dir / MANIFEST_NAME
+    manifest = json.loads(path.read_text())
+    manifest["version"] += 1
+    path.write_text(json.dumps(manifest))
+    prepared = PreparedAssets(AssetSource(str(base_dir)))
+    assert prepared.sound("assets/click.mp3", MIXER_FORMAT) is None
+
+def test_pack_leaves_out_superseded_raw_files(base_dir):
+    build_pack([str(base_dir / "assets"), str(base_dir / "prepared")], str(base_dir / PACK_NAME),
+               base_dir=str(base_dir))
+    assets = AssetSource(str(base_dir))
+    assert not assets.exists("assets/click.mp3")
+    assert not assets.exists("assets/anim.gif")
+    assert not assets.exists("assets/Transparentmage.png")
+    prepared = PreparedAssets(assets)
+    assert prepared.frames("assets/anim.gif") is not None
+    assert prepared.image("assets/Transparentmage.png", (94, 94)) is not None
+    # Without the raw file the prepared WAV is used even for another mixer format
+    assert prepared.sound("assets/click.mp3", (22050, MIXER_SIZE, 1)) == "prepared/sounds/click.wav"
+
+def test_pack_keeps_raw_files_with_stale_outputs(base_dir):
+    with open(base_dir / "assets" / "click.mp3", "ab") as f:
+        f.write(b"\0")
+    build_pack([str(base_dir / "assets"), str(base_dir / "prepared")], str(base_dir / PACK_NAME),
+               base_dir=str(base_dir))
+    assets = AssetSource(str(base_dir))
+    assert assets.exists("assets/click.mp3")
+    assert not assets.exists("assets/anim.gif")
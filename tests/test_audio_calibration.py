@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+import audio_calibration
+from audio_calibration import calibrate, output_time, save_audio_settings, find_clicks, MIXER_FREQUENCY
+
+@pytest.fixture
+def disk_driver(monkeypatch):
+    """measure_simulated switches SDL to the disk driver; put the environment back afterwards"""
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    monkeypatch.setenv("SDL_DISKAUDIOFILE", "")
+
+def test_simulated_calibration_finds_clicks_and_picks_a_buffer(disk_driver):
+    trials = 6
+    chosen, results = calibrate(buffers=(1024, 512), trials=trials, load=False, simulate=True)
+    assert [result["buffer"] for result in results] == [512, 1024]
+    for result in results:
+        assert result["clicks_found"] == trials
+        assert result["underruns"] == 0
+        # Nothing but the mixer sits between play() and the file: at most about one buffer period
+        period_ms = result["buffer"] * 1000.0 / result["frequency"]
+        assert 0.0 <= result["latency_ms"] <= result["max_latency_ms"] <= period_ms + 5.0
+    assert chosen is results[0]
+
+def test_output_time_splits_a_flush_into_its_buffers():
+    # One flush at t=1.0 carried two 512-frame buffers; the first was done a buffer earlier
+    jumps = [(0.5, 0), (1.0, 1024)]
+    assert output_time(jumps, 1024 - 1, 512, MIXER_FREQUENCY) == pytest.approx(1.0)
+    assert output_time(jumps, 10, 512, MIXER_FREQUENCY) == pytest.approx(1.0 - 512 / MIXER_FREQUENCY)
+    assert output_time(jumps, 2000, 512, MIXER_FREQUENCY) is None
+
+def test_find_clicks_merges_loud_frames_of_one_click():
+    samples = [0] * 20 + [30000] * 4 + [0] * 20 + [-30000] * 2 + [0] * 5
+    assert find_clicks(samples, 1, 5) == [20, 44]
+
+def test_save_audio_settings_keeps_other_settings(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"times": {"left": "2"}, "audio": {"note": "kept"}}))
+    chosen = {"buffer": 512, "latency_ms": 6.04, "capture": "Monitor of Built-in Audio"}
+    save_audio_settings(chosen, str(path))
+    settings = json.loads(path.read_text())
+    assert settings["times"] == {"left": "2"}
+    audio = settings["audio"]
+    assert (audio["note"], audio["buffer"], audio["output_latency_ms"], audio["capture"]) == (
+        "kept", 512, 6.0, "Monitor of Built-in Audio")
+    assert audio["calibrated"]
+
+def test_real_calibration_without_capture_saves_nothing(disk_driver, monkeypatch, tmp_path):
+    monkeypatch.setattr(audio_calibration, "capture_devices", lambda: [])
+    monkeypatch.setattr(audio_calibration, "save_audio_settings", lambda *args: pytest.fail("saved"))
+    assert audio_calibration.main(["--buffers", "512"]) == 1
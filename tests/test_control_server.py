@@ -0,0 +1,130 @@
+import os, json, time, socket, threading
+
+import pytest
+
+from control_server import ControlServer, TkDispatcher, load_token
+from headless import HeadlessTimer
+
+TOKEN = "test-token"
+
+@pytest.fixture
+def timer(tmp_path, monkeypatch):
+    monkeypatch.setenv("APPDATA", str(tmp_path))
+    return HeadlessTimer(str(tmp_path / "settings.json"), sound=False)
+
+@pytest.fixture
+def server(timer):
+    server = ControlServer(timer.dispatch, ("127.0.0.1", 0), TOKEN).start()
+    yield server
+    server.stop()
+
+class Client:
+    def __init__(self, server):
+        self.sock = socket.create_connection(server.server.server_address, timeout=5)
+        self.file = self.sock.makefile("rwb")
+
+    def send(self, line):
+        self.file.write(line.encode("utf-8") + b"\n")
+        self.file.flush()
+        reply = self.file.readline()
+        return json.loads(reply) if reply else None
+
+    def request(self, request):
+        return self.send(json.dumps(request))
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+@pytest.fixture
+def client(server):
+    client = Client(server)
+    assert client.request({"cmd": "auth", "token": TOKEN}) == {"ok": True}
+    yield client
+    client.close()
+
+def test_arm_query_cancel_round_trip(client):
+    reply = client.request({"cmd": "arm", "timer": "left", "duration": 6.5, "id": 7})
+    assert reply["ok"] and reply["id"] == 7
+    assert reply["timer"]["state"] == "running"
+    assert 6.0 < reply["timer"]["remaining"] <= 6.5
+    timers = client.request({"cmd": "query"})["timers"]
+    assert [timer["id"] for timer in timers] == ["left", "middle", "right"]
+    assert client.request({"cmd": "cancel", "timer": "left"})["timer"]["state"] == "ready"
+
+def test_batch_gets_one_result_per_command(client):
+    replies = client.request([{"cmd": "ping", "id": 1}, {"cmd": "arm", "timer": "nowhere", "id": 2}])
+    assert replies[0] == {"ok": True, "id": 1}
+    assert replies[1]["ok"] is False and replies[1]["id"] == 2
+
+def test_bad_request_keeps_the_connection(client):
+    assert client.send("{not json")["ok"] is False
+    assert client.request({"cmd": "ping"}) == {"ok": True}
+
+def test_commands_need_auth_first(server, timer):
+    client = Client(server)
+    try:
+        reply = client.request({"cmd": "arm", "timer": "left", "duration": 5})
+        assert reply["ok"] is False and "unauthorized" in reply["error"]
+        assert client.send('{"cmd": "ping"}') is None  # closed
+    finally:
+        client.close()
+    assert timer.timer_state("left")["state"] == "ready"
+
+def test_wrong_token_is_rejected(server):
+    client = Client(server)
+    try:
+        assert client.request({"cmd": "auth", "token": "guess"})["ok"] is False
+        assert client.send('{"cmd": "ping"}') is None
+    finally:
+        client.close()
+
+def test_http_requests_are_dropped(client, timer):
+    assert client.send("POST / HTTP/1.1") is None
+    assert timer.timer_state("left")["state"] == "ready"
+
+def test_token_is_created_once_and_private(tmp_path):
+    path = tmp_path / "control.token"
+    token = load_token(str(path))
+    assert token and load_token(str(path)) == token
+    if os.name == "posix":
+        assert path.stat().st_mode & 0o077 == 0
+
+class FakeRoot:
+    """Collects after() callbacks so a test decides when the "Tk thread" runs them"""
+    def __init__(self, closed=False):
+        self.callbacks = []
+        self.closed = closed
+
+    def after(self, ms, callback):
+        if self.closed:
+            raise RuntimeError("main thread is not in main loop")
+        self.callbacks.append(callback)
+
+    def run(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+def test_timed_out_batch_never_runs():
+    root, handled = FakeRoot(), []
+    dispatcher = TkDispatcher(root, lambda command: handled.append(command) or {"ok": True}, timeout=0.05)
+    assert dispatcher([{"cmd": "arm"}])[0]["error"] == "timed out waiting for the app"
+    root.run()
+    assert handled == []
+    # The next batch still gets a drain and runs normally
+    dispatcher.timeout = 2.0
+    result = []
+    thread = threading.Thread(target=lambda: result.extend(dispatcher([{"cmd": "ping"}])))
+    thread.start()
+    while not root.callbacks:
+        time.sleep(0.01)
+    root.run()
+    thread.join()
+    assert result == [{"ok": True}] and handled == [{"cmd": "ping"}]
+
+def test_closed_root_resets_the_drain_flag():
+    root = FakeRoot(closed=True)
+    dispatcher = TkDispatcher(root, lambda command: {"ok": True}, timeout=0.05)
+    assert "shutting down" in dispatcher([{"cmd": "ping"}])[0]["error"]
+    assert not dispatcher.drain_scheduled
@@ -0,0 +1,97 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+from PIL import Image
+
+from cooldown_detector import CooldownDetector, CooldownReconciler, CooldownWatcher, load_frame
+
+READY = (40, 200, 60)     # bright icon
+COOLDOWN = (20, 60, 30)   # the same icon darkened by the cooldown sweep
+BACKGROUND = (0, 0, 0)
+ICON = 8
+
+def save_png(path, width, height, icons=()):
+    """A region screenshot: background plus solid icons given as (x, color)"""
+    image = Image.new("RGB", (width, height), BACKGROUND)
+    for x, color in icons:
+        image.paste(Image.new("RGB", (ICON, ICON), color), (x, 0))
+    image.save(path)
+    return str(path)
+
+@pytest.fixture
+def shots(tmp_path):
+    """Templates for two icons plus saved frames of a 20x8 region with the icons at x=0 and x=12"""
+    paths = {
+        "ready": save_png(tmp_path / "ready.png", ICON, ICON, [(0, READY)]),
+        "cooldown": save_png(tmp_path / "cooldown.png", ICON, ICON, [(0, COOLDOWN)]),
+    }
+    for name, left, right in (("both_ready", READY, READY), ("left_cd", COOLDOWN, READY),
+                              ("both_cd", COOLDOWN, COOLDOWN)):
+        paths[name] = save_png(tmp_path / f"{name}.png", 20, ICON, [(0, left), (12, right)])
+    return paths
+
+@pytest.fixture
+def detector(shots):
+    icons = [{"timer": "left", "x": 0, "y": 0, "ready": shots["ready"], "cooldown": shots["cooldown"]},
+             {"timer": "right", "x": 12, "y": 0, "ready": shots["ready"]}]
+    return CooldownDetector(icons, threshold=40, confirm_frames=2)
+
+def test_state_flips_after_confirm_frames(detector, shots):
+    ready, left_cd = load_frame(shots["both_ready"]), load_frame(shots["left_cd"])
+    assert detector.update(ready) == {}
+    assert detector.update(left_cd) == {}  # one disagreeing frame is flicker
+    assert detector.update(left_cd) == {"left": True}
+    assert detector.update(left_cd) == {}  # reported once
+    assert detector.detected() == {"left": True, "right": False}
+
+def test_flicker_resets_the_streak(detector, shots):
+    ready, left_cd = load_frame(shots["both_ready"]), load_frame(shots["left_cd"])
+    for frame in (left_cd, ready, left_cd, ready):
+        assert detector.update(frame) == {}
+    assert detector.detected() == {"left": False, "right": False}
+
+def test_threshold_without_cooldown_template(detector, shots):
+    both_cd = load_frame(shots["both_cd"])
+    detector.update(both_cd)
+    assert detector.update(both_cd) == {"left": True, "right": True}
+
+def test_templates_must_match_in_size(shots, tmp_path):
+    small = save_png(tmp_path / "small.png", 4, 4, [(0, READY)])
+    with pytest.raises(ValueError):
+        CooldownDetector([{"timer": "left", "x": 0, "y": 0, "ready": shots["ready"]},
+                          {"timer": "right", "x": 12, "y": 0, "ready": small}])
+
+def test_reconciler_arms_idle_timer():
+    reconciler = CooldownReconciler(grace=1.5)
+    detected = {"left": True}
+    assert reconciler.actions({"left": True}, detected, {"left": None}, 10.0) == [("arm", "left")]
+    # Already running: a detected cooldown agrees with the timer
+    assert reconciler.actions({"left": True}, detected, {"left": 50.0}, 10.1) == []
+
+def test_reconciler_cancels_after_grace_once_per_arm():
+    reconciler = CooldownReconciler(grace=1.5)
+    ready = {"left": False}
+    assert reconciler.actions({}, ready, {"left": 40.0}, 10.0) == []
+    assert reconciler.actions({}, ready, {"left": 40.0}, 11.0) == []  # inside the grace period
+    assert reconciler.actions({}, ready, {"left": 40.0}, 11.5) == [("cancel", "left")]
+    assert reconciler.actions({}, ready, {"left": 40.0}, 12.0) == []  # once per arm
+    # A new arm starts a new grace period
+    assert reconciler.actions({}, ready, {"left": 45.0}, 13.0) == []
+    assert reconciler.actions({}, ready, {"left": 45.0}, 14.5) == [("cancel", "left")]
+
+def test_reconciler_ignores_timers_without_icons():
+    reconciler = CooldownReconciler(grace=0.0)
+    assert reconciler.actions({}, {"left": False}, {"left": None, "middle": 30.0}, 5.0) == []
+
+def test_watcher_drives_actions_from_saved_frames(detector, shots):
+    deadlines = {"left": None, "right": 99.0}
+    actions = []
+    watcher = CooldownWatcher(detector, (0, 0, 20, ICON), lambda: dict(deadlines),
+                              lambda action, timer: actions.append((action, timer)), grace=1.0)
+    ready, left_cd = load_frame(shots["both_ready"]), load_frame(shots["left_cd"])
+    watcher.process(ready, 0.0)
+    watcher.process(left_cd, 0.25)
+    watcher.process(left_cd, 0.5)   # left confirmed on cooldown while idle: arm
+    watcher.process(left_cd, 1.25)  # right still shows ready a second after its arm: cancel
+    watcher.process(left_cd, 2.0)
+    assert actions == [("arm", "left"), ("cancel", "right")]
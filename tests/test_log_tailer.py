@@ -0,0 +1,61 @@
+import pytest
+
+from log_tailer import LogTailer, compile_triggers
+
+@pytest.fixture
+def tail(tmp_path):
+    """Returns (tailer, append(text), hits) for a log that starts out with an old line"""
+    path = tmp_path / "chat.log"
+    path.write_text("exura vita before the tailer started\n")
+    hits = []
+
+    def make(triggers):
+        tailer = LogTailer(str(path), triggers, lambda trigger, line: hits.append((trigger["timer"], line)))
+
+        def append(text):
+            with open(path, "a") as f:
+                f.write(text)
+            tailer.read_new()
+        return tailer, append
+    return make, hits
+
+def test_existing_lines_are_skipped(tail):
+    make, hits = tail
+    _tailer, append = make([{"pattern": "exura vita", "timer": "left"}])
+    append("exura vita\n")
+    assert hits == [("left", "exura vita")]
+
+def test_overlapping_triggers_all_fire(tail):
+    make, hits = tail
+    _tailer, append = make([{"pattern": "You feel hungry", "timer": "right"},
+                            {"pattern": "hungry", "timer": "left"}])
+    append("You feel hungry.\n")
+    assert sorted(hits) == [("left", "You feel hungry."), ("right", "You feel hungry.")]
+
+def test_ignore_case_stays_with_its_trigger(tail):
+    make, hits = tail
+    _tailer, append = make([{"pattern": "Exura", "timer": "left"},
+                            {"pattern": "exori", "timer": "middle", "ignore_case": True}])
+    append("exura vita\nEXORI gran\nExura vita\n")
+    assert hits == [("middle", "EXORI gran"), ("left", "Exura vita")]
+
+def test_partial_line_waits_for_its_newline(tail):
+    make, hits = tail
+    _tailer, append = make([{"pattern": r"utani gran hur$", "timer": "right"}])
+    append("utani gran")
+    assert hits == []
+    append(" hur\n")
+    assert hits == [("right", "utani gran hur")]
+
+def test_inline_flags_and_backreferences(tail):
+    make, hits = tail
+    _tailer, append = make([{"pattern": "(?i)utamo vita", "timer": "left"},
+                            {"pattern": r"(\w+) \1", "timer": "middle"}])
+    append("UTAMO VITA\nhur hur\n")
+    assert hits == [("left", "UTAMO VITA"), ("middle", "hur hur")]
+
+def test_bad_patterns_are_reported():
+    with pytest.raises(ValueError):
+        compile_triggers([{"pattern": "(unclosed", "timer": "left"}])
+    with pytest.raises(ValueError):
+        compile_triggers([{"pattern": "ok", "timer": "nowhere"}])
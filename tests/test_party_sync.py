@@ -0,0 +1,106 @@
+import time, socket
+
+import pytest
+
+from party_sync import PartySync, encode_event, decode_event, EVENT_ARM, EVENT_CANCEL, SEND_REPEAT
+
+TEST_GROUP = "239.255.42.98"
+
+def free_udp_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+@pytest.fixture
+def sync():
+    sync = PartySync("me", group="127.0.0.1", port=free_udp_port())
+    yield sync
+    sync.stop()
+
+def event(kind=EVENT_ARM, peer=b"peer0001", seq=1, sent_at=100.0, timer=0, deadline=110.0, name="Knight"):
+    return decode_event(encode_event(kind, peer, seq, sent_at, timer, deadline, name))
+
+def test_repeated_and_older_packets_are_dropped(sync):
+    sync.apply(event(seq=2), now=500.0)
+    sync.apply(event(seq=2), now=500.0)
+    sync.apply(event(seq=1, kind=EVENT_CANCEL), now=500.1)
+    assert sync.received == 3 and sync.duplicates == 2
+    assert [timer["state"] for timer in sync.remote_timers(now=500.2)] == ["running"]
+
+def test_sequence_is_tracked_per_timer(sync):
+    sync.apply(event(seq=5, timer=0), now=500.0)
+    sync.apply(event(seq=3, timer=1), now=500.0)  # another timer of the same peer
+    assert sync.duplicates == 0 and len(sync.remote_timers(now=500.0)) == 2
+
+def test_own_packets_are_ignored(sync):
+    sync.apply(event(peer=sync.peer), now=500.0)
+    assert sync.received == 0 and sync.remote_timers(now=500.0) == []
+
+def test_deadline_maps_onto_the_local_clock_with_the_smallest_offset(sync):
+    # Peer clock is 400 s behind ours; the first packet took 30 ms, the second 10 ms
+    sync.apply(event(seq=1, sent_at=100.0, deadline=110.0), now=500.030)
+    assert sync.offsets[b"peer0001"] == pytest.approx(400.030)
+    sync.apply(event(seq=2, sent_at=101.0, deadline=111.0), now=501.010)
+    assert sync.offsets[b"peer0001"] == pytest.approx(400.010)
+    sync.apply(event(seq=3, sent_at=102.0, deadline=120.0), now=502.050)  # slower again: offset kept
+    assert sync.offsets[b"peer0001"] == pytest.approx(400.010)
+    (timer,) = sync.remote_timers(now=510.010)
+    assert timer["remaining"] == pytest.approx(10.0)
+
+def test_running_timer_past_its_deadline_shows_expired(sync):
+    sync.apply(event(sent_at=100.0, deadline=105.0), now=500.0)
+    (timer,) = sync.remote_timers(now=506.0)
+    assert timer["state"] == "expired" and timer["remaining"] == 0.0
+
+def test_foreign_packets_are_rejected():
+    with pytest.raises(ValueError):
+        decode_event(b"hello")
+    with pytest.raises(ValueError):
+        decode_event(b"XXXX" + encode_event(EVENT_ARM, b"peer0001", 1, 0.0, 0, 0.0, "x")[4:])
+
+def test_udp_loopback_receive(sync):
+    changes = []
+    sync.on_change = lambda: changes.append(1)
+    sync.start()
+    packet = encode_event(EVENT_ARM, b"peer0001", 1, time.monotonic(), 2, time.monotonic() + 30.0, "Druid")
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+        for _ in range(SEND_REPEAT):
+            sender.sendto(packet, ("127.0.0.1", sync.address[1]))
+        sender.sendto(b"not for us", ("127.0.0.1", sync.address[1]))
+    assert wait_for(lambda: sync.received == SEND_REPEAT)
+    assert sync.duplicates == SEND_REPEAT - 1
+    (timer,) = sync.remote_timers()
+    assert (timer["name"], timer["timer"], timer["state"]) == ("Druid", "right", "running")
+    assert 29.0 < timer["remaining"] <= 30.0
+    assert changes == [1]
+
+def test_multicast_between_two_instances():
+    port = free_udp_port()
+    try:
+        sender = PartySync("Sorc", group=TEST_GROUP, port=port, interface="127.0.0.1")
+        receiver = PartySync("Paladin", group=TEST_GROUP, port=port, interface="127.0.0.1")
+    except OSError as e:
+        pytest.skip(f"multicast on loopback is not available here: {e}")
+    try:
+        receiver.start()
+        deadline = time.monotonic() + 20.0
+        sender.timer_changed("left", "running", deadline)
+        sender.timer_changed("left", "running", deadline)  # unchanged: not sent again
+        if not wait_for(lambda: receiver.received >= SEND_REPEAT):
+            pytest.skip("multicast packets are not looped back on this host")
+        time.sleep(0.1)
+        assert receiver.received == SEND_REPEAT and receiver.duplicates == SEND_REPEAT - 1
+        (timer,) = receiver.remote_timers()
+        assert (timer["name"], timer["timer"], timer["state"]) == ("Sorc", "left", "running")
+        assert 19.0 < timer["remaining"] <= 20.0
+    finally:
+        receiver.stop()
+        sender.stop()
@@ -1,12 +1,45 @@
+import sys
+
+# Headless terminal mode must never import the GUI stack below
+if __name__ == "__main__" and "--headless" in sys.argv:
+    from headless import main
+    sys.exit(main([arg for arg in sys.argv[1:] if arg != "--headless"]))
+if __name__ == "__main__" and "--calibrate-audio" in sys.argv:
+    from audio_calibration import main
+    sys.exit(main([arg for arg in sys.argv[1:] if arg != "--calibrate-audio"]))
+
 import tkinter as tk
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk, ImageSequence
 import pygame
 import time
-from pynput import keyboard
-import os, sys, traceback, json
+import os, traceback, json, functools, threading
+from asset_cache import ImageCache
+from asset_pack import AssetSource
+from asset_build import PreparedAssets, MIXER_FREQUENCY, MIXER_SIZE, MIXER_CHANNELS, MIXER_BUFFER
+from hotkeys import combo_from_key, normalize_combo, parse_binding, key_id, MODIFIER_BITS, HotkeyMatcher
+from timer_core import (get_base_path, next_tick_delay, format_remaining, parse_timer,
+                        get_data_dir, get_settings_path, get_process_rss,
+                        SOUND_PRESETS_LEFT, SOUND_PRESETS_RIGHT, DEFAULT_SOUNDS,
+                        TIMER_SIDES, READY_TEXT)
+from control_server import ControlServer, TkDispatcher, DEFAULT_PORT, load_token
+from state_feed import StateFeed, StateFeedServer, DEFAULT_FEED_PORT
+from party_sync import PartySync, DEFAULT_GROUP, DEFAULT_PARTY_PORT
+from log_tailer import LogTailer
+from file_watch import FileWatcher
+from cooldown_detector import CooldownDetector, CooldownWatcher
+from cooldown_stats import CooldownStats, format_summary, DEFAULT_MAX_ROWS
+from spell_db import SpellDatabase
+from timer_journal import TimerJournal
+from notify import Notifier, build_sinks, DEFAULT_TIMEOUT
+from tts import PhraseCache, find_engine, SPEAK_OPTION, DEFAULT_VOICE, DEFAULT_RATE, TTS_QUEUE
+from io_worker import IOWorker, default_worker, TkCallbackQueue, write_file_atomic
+from error_report import default_reporter
+
+# Settings sections read whenever they are used, so a reload applies them at
+# once; every other section configures a service started with the app
+LIVE_SECTIONS = ("bindings", "prewarn", "tts", "audio")
 
 # Fix for "lost sys.stdin" error
 class DummyStream:
@@ -19,15 +52,6 @@ class DummyStream:
 if not hasattr(sys.stdin, 'isatty'):
     sys.stdin = DummyStream()
 
-# Helper function to locate resources in both dev and PyInstaller environments
-def resource_path(relative_path):
-    """ Get absolute path to resource, works for dev and for PyInstaller """
-    try:
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.dirname(os.path.abspath(__file__))
-    return os.path.join(base_path, relative_path)
-
 # ---------------- Helper for JSON Serialization ----------------
 def get_serializable_place_info(widget):
     """
@@ -40,14 +64,18 @@ def get_serializable_place_info(widget):
 
 # ================= Global Exception Handler =================
 def global_exception_handler(exctype, value, tb):
-    error_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "error_report.txt")
-    with open(error_file_path, "a") as f:
-        f.write("\n=========== Exception Occurred ===========\n")
-        traceback.print_exception(exctype, value, tb, file=f)
-        f.write("===========================================\n")
+    # Deduplicated and size-capped in the per-user data folder, written in the background
+    try:
+        default_reporter().report(exctype, value, tb)
+    except Exception as e:
+        print(f"Error in error reporter: {e}")
     sys.__excepthook__(exctype, value, tb)
 
+def thread_exception_handler(args):
+    global_exception_handler(args.exc_type, args.exc_value, args.exc_traceback)
+
 sys.excepthook = global_exception_handler
+threading.excepthook = thread_exception_handler
 
 # ================= Tooltip Class =================
 class CreateToolTip:
@@ -103,7 +131,7 @@ class TimerPanel:
     def __init__(self, parent, side, timer_label_text, sound_default, sound_presets,
                  countdown_ready_text, tooltip_text=None,
                  add_preset=False, preset_options=None, preset_callback=None,
-                 sound_label_rely=0.85, set_sound_callback=None):
+                 sound_label_rely=0.85, set_sound_callback=None, spell_db=None):
         self.parent = parent
         self.side = side
         self.initial_positions = {}
@@ -150,6 +178,16 @@ class TimerPanel:
             # Store preset options and callback
             self.preset_options = preset_options
             self.preset_callback = preset_callback
+
+            # Type-ahead over the spell table: each keystroke narrows the list
+            self.spell_db = spell_db
+            self.group_label = ttk.Label(parent, text="", font=("Copilot", 8))
+            self.group_label.place(relx=0.92, rely=0.25, anchor="ne")
+            self.initial_positions['group_label'] = {'relx': 0.92, 'rely': 0.25}
+            if spell_db is not None:
+                self.preset_menu.configure(postcommand=self.filter_presets)
+                self.preset_menu.bind("<KeyRelease>", self.on_preset_typed)
+                self.preset_menu.bind("<Return>", self.handle_preset_selection)
         
         # Countdown label.
         self.countdown_label = ttk.Label(parent, text=countdown_ready_text, font=("Copilot", 24, "bold"))
@@ -194,12 +232,41 @@ class TimerPanel:
         if selection == "Custom":
             self.timer_entry.delete(0, tk.END)
             self.timer_var.set("")
-        else:
+            self.group_label.config(text="")
+        elif selection in self.preset_options:
             timer_value = self.preset_options.get(selection)
             if timer_value is not None:
                 self.timer_entry.delete(0, tk.END)
                 self.timer_entry.insert(0, str(timer_value))
                 self.timer_var.set(str(timer_value))
+            self.group_label.config(text="")
+        elif self.spell_db is not None:
+            spell = self.spell_db.get(selection)
+            if spell is None:
+                return
+            self.preset_var.set(spell.name)
+            self.timer_var.set(f"{spell.cooldown:g}")
+            group = f"{spell.group.capitalize()} group"
+            if spell.group_cooldown:
+                group += f" ({spell.group_cooldown:g}s)"
+            self.group_label.config(text=group)
+            if self.preset_callback:
+                self.preset_callback(self.side, spell)
+
+    def on_preset_typed(self, event):
+        if event.keysym in ("Up", "Down", "Return", "KP_Enter", "Escape", "Tab"):
+            return
+        self.filter_presets()
+
+    def filter_presets(self):
+        """Limit the preset list to the built-in presets and spells matching the typed text"""
+        text = self.preset_var.get()
+        if text == "Select Spell":
+            text = ""
+        query = text.lower()
+        values = [name for name in self.preset_options if query in name.lower()]
+        values += [spell.name for spell in self.spell_db.search(text) if spell.name not in self.preset_options]
+        self.preset_menu.configure(values=values)
 
     def get_widget_positions(self):
         positions = {}
@@ -217,6 +284,8 @@ class TimerPanel:
             widgets[f'{self.side}_preset_menu'] = self.preset_menu
         if hasattr(self, 'momentum_checkbox'):
             widgets[f'{self.side}_momentum_checkbox'] = self.momentum_checkbox
+        if hasattr(self, 'group_label'):
+            widgets[f'{self.side}_group_label'] = self.group_label
 
         print(f"\nGetting positions for {self.side} panel widgets:")
         for name, widget in widgets.items():
@@ -256,6 +325,8 @@ class TimerPanel:
             widgets['preset_menu'] = self.preset_menu
         if hasattr(self, 'momentum_checkbox'):
             widgets['momentum_checkbox'] = self.momentum_checkbox
+        if hasattr(self, 'group_label'):
+            widgets['group_label'] = self.group_label
 
         for name, widget in widgets.items():
             # Remove any 'left_' or 'right_' prefix from the position key
@@ -294,7 +365,7 @@ class TimerPanel:
         self.parent.update_idletasks()
 
     def validate_timer_entry(self, new_value):
-        allowed = "0123456789:"
+        allowed = "0123456789:."
         for char in new_value:
             if char not in allowed:
                 return False
@@ -316,64 +387,20 @@ class TimerPanel:
         if event.keysym == "Tab":
             # Allow normal tabbing, do not record as hotkey
             return  # Do not return "break" so default focus behavior occurs
-        # Map for modifier keys
-        modifier_map = {
-            "Control_L": "CTRL", "Control_R": "CTRL",
-            "Alt_L": "ALT", "Alt_R": "ALT",
-            "Shift_L": "SHIFT", "Shift_R": "SHIFT"
-        }
-        # Map for special keys
-        special_key_map = {
-            "space": "SPACE",
-            "Return": "RETURN",
-            "Escape": "ESC",
-            "Delete": "DEL",
-            "Up": "UP",
-            "Down": "DOWN",
-            "Left": "LEFT",
-            "Right": "RIGHT",
-            "grave": "GRAVE",
-            "asciitilde": "GRAVE",
-            "minus": "-",
-            "equal": "=",
-            "bracketleft": "[",
-            "bracketright": "]",
-            "backslash": "\\",
-            "semicolon": ";",
-            "apostrophe": "'",
-            "comma": ",",
-            "period": ".",
-            "slash": "/",
-            "F1": "F1", "F2": "F2", "F3": "F3", "F4": "F4",
-            "F5": "F5", "F6": "F6", "F7": "F7", "F8": "F8",
-            "F9": "F9", "F10": "F10", "F11": "F11", "F12": "F12"
-        }
-
-        # Handle modifier keys
-        if event.keysym in modifier_map:
-            mod = modifier_map[event.keysym]
-            if mod not in self.hotkey_combo:
-                self.hotkey_combo.append(mod)
+        # Same key table as runtime matching, so a captured hotkey always fires
+        key_name = key_id("tk", None, event.keysym)
+        if key_name is None:
+            return "break"
+        if key_name in MODIFIER_BITS:
+            if key_name not in self.hotkey_combo:
+                self.hotkey_combo.append(key_name)
         else:
             # Remove any non-modifier keys from the combo
-            self.hotkey_combo = [k for k in self.hotkey_combo if k in ["CTRL", "ALT", "SHIFT"]]
-            
-            # Handle special keys and regular keys
-            if event.keysym in special_key_map:
-                key_name = special_key_map[event.keysym]
-            elif len(event.keysym) == 1:  # Single character keys
-                key_name = event.keysym.upper()
-            else:  # Other special keys
-                key_name = event.keysym.upper()
-            
+            self.hotkey_combo = [k for k in self.hotkey_combo if k in MODIFIER_BITS]
             self.hotkey_combo.append(key_name)
 
-        # Sort modifiers consistently
-        mods = [m for m in ["CTRL", "ALT", "SHIFT"] if m in self.hotkey_combo]
-        keys = [k for k in self.hotkey_combo if k not in ["CTRL", "ALT", "SHIFT"]]
-        
-        # Update the display
-        combo_string = "+".join(mods + keys)
+        # Update the display, modifiers in canonical order
+        combo_string = normalize_combo("+".join(self.hotkey_combo))
         print(f"Final hotkey combo: {combo_string}")
         self.hotkey_var.set(combo_string)
         return "break"
@@ -387,27 +414,114 @@ class TibiaTimerApp:
         self.init_variables()
         self.setup_gui()
         self.load_user_settings()  # <-- Load settings after GUI setup
+        self.apply_audio_settings()
+        self.start_control_server()
+        self.start_state_feed()
+        self.start_party_sync()
+        self.start_log_tailer()
+        self.start_cooldown_detector()
+        self.start_cooldown_stats()
+        self.start_notifier()
+        self.start_timer_journal()
+        self.start_settings_watcher()
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.root.bind_all("<Control-Shift-KeyPress-D>", self.report_memory)
+        self.root.bind_all("<Control-Shift-KeyPress-S>", self.report_stats)
+        self.setup_idle_tracking()
 
     def setup_paths(self):
+        self.io_worker = default_worker()
+        self.io_worker.set_dispatcher(TkCallbackQueue(self.root))
+        # Speech renders get their own thread (started on first use); see tts.py
+        self.tts_worker = IOWorker(max_queue=TTS_QUEUE, name="tts")
+        self.tts_worker.set_dispatcher(self.io_worker.dispatch)
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
-        self.sound_file_left = resource_path("assets/chime.mp3")
-        self.sound_file_right = resource_path("assets/Potion.mp3")
-        self.image_path_left = resource_path("assets/spells.gif")
-        self.image_path_right = resource_path("assets/Buff.gif")
-        self.icon_path = resource_path("assets/Wizard1.ico")
-        self.top_left_image_path = resource_path("assets/Transparentmage.png")
-        self.click_file = resource_path("assets/click.mp3")
+        cache_dir = os.path.join(get_data_dir(), "cache")
+        self.assets = AssetSource(get_base_path(), extract_dir=os.path.join(cache_dir, "extracted"))
+        # Bundled assets are referred to by name; custom sounds by absolute path
+        self.sound_file_left = DEFAULT_SOUNDS["left"]
+        self.sound_file_right = DEFAULT_SOUNDS["right"]
+        self.image_path_left = "assets/spells.gif"
+        self.image_path_right = "assets/Buff.gif"
+        self.icon_name = "assets/Wizard1.ico"
+        self.top_left_image_path = "assets/Transparentmage.png"
+        self.click_file = "assets/click.mp3"
         self.user_settings_file = get_settings_path()
+        self.prepared = PreparedAssets(self.assets)
+        self.spell_db = SpellDatabase(self.assets)  # read on first search
+        self.image_cache = ImageCache(cache_dir, self.assets, self.prepared)
 
     def init_pygame(self):
+        self.sound_cache = {}    # sound ref -> decoded pygame Sound (only valid while the mixer is up)
+        self.sound_loading = {}  # sound ref -> play when decoded (bool), while a decode job is queued
+        self.mixer_generation = getattr(self, "mixer_generation", 0) + 1  # decodes for an older mixer are dropped
+        self.alert_channel = None
         try:
-            pygame.mixer.init()
-            pygame.mixer.music.set_volume(0.5)
-            self.click_sound = pygame.mixer.Sound(self.click_file)
+            # Same format the build-time preprocessing renders PCM for
+            # Buffer size from --calibrate-audio once the settings are loaded (see apply_audio_settings)
+            self.mixer_buffer = int(getattr(self, "extra_settings", {}).get("audio", {}).get("buffer", MIXER_BUFFER))
+            pygame.mixer.init(frequency=MIXER_FREQUENCY, size=MIXER_SIZE, channels=MIXER_CHANNELS, buffer=self.mixer_buffer)
+            # One reserved channel for alerts: a new alert cuts off the previous one
+            pygame.mixer.set_reserved(1)
+            self.alert_channel = pygame.mixer.Channel(0)
+            self.load_sound_async(self.click_file)
         except Exception as e:
             print("Pygame initialization failed:", e)
-            self.click_sound = None
+
+    def decode_sound(self, sound_ref):
+        """
+        Decode a bundled asset name or a custom file path (runs on the I/O
+        worker). Bundled sounds come from the preprocessed PCM when the
+        manifest is fresh and from the raw MP3 otherwise.
+        """
+        prepared = self.prepared.sound(sound_ref, pygame.mixer.get_init())
+        if prepared:
+            return pygame.mixer.Sound(file=self.assets.open(prepared))
+        if self.assets.exists(sound_ref):
+            return pygame.mixer.Sound(file=self.assets.open(sound_ref))
+        return pygame.mixer.Sound(sound_ref)
+
+    def load_sound_async(self, sound_ref, play=False):
+        """Queue a decode on the I/O worker; each sound is decoded once per mixer"""
+        if sound_ref in self.sound_loading:
+            self.sound_loading[sound_ref] = self.sound_loading[sound_ref] or play
+            return
+        self.sound_loading[sound_ref] = play
+        callback = functools.partial(self.on_sound_decoded, sound_ref, self.mixer_generation)
+        if not self.io_worker.submit(self.decode_sound, sound_ref, callback=callback):
+            del self.sound_loading[sound_ref]
+
+    def on_sound_decoded(self, sound_ref, generation, sound, error):
+        """Decode finished (Tk thread): cache it and play it if an alert was waiting on it"""
+        if generation != self.mixer_generation or not pygame.mixer.get_init():
+            return  # the mixer was shut down or restarted meanwhile
+        play = self.sound_loading.pop(sound_ref, False)
+        if error is not None:
+            print(f"Could not load sound {sound_ref}: {error}")
+            return
+        self.sound_cache[sound_ref] = sound
+        if play:
+            self.play_sound(sound_ref)
+
+    def preload_sounds(self):
+        """Decode the currently selected alert sounds ahead of their expiry"""
+        if not pygame.mixer.get_init():
+            return
+        cue = self.extra_settings.get("prewarn", {}).get("sound", self.click_file)
+        for sound_ref in (self.click_file, cue, self.current_sound_left, self.current_sound_middle, self.current_sound_right):
+            if sound_ref and sound_ref not in self.sound_cache:
+                self.load_sound_async(sound_ref)
+
+    def play_sound(self, sound_ref):
+        """Play an alert sound on the alert channel at the current volume (once decoded)"""
+        if self.alert_channel is None:
+            return
+        sound = self.sound_cache.get(sound_ref)
+        if sound is None:
+            self.load_sound_async(sound_ref, play=True)
+            return
+        self.alert_channel.set_volume(self.volume_var.get() / 100.0)
+        self.alert_channel.play(sound)
 
     def init_variables(self):
         self.current_hotkey_left = ''
@@ -422,6 +536,9 @@ class TibiaTimerApp:
         self.countdown_left_job = None
         self.countdown_middle_job = None
         self.countdown_right_job = None
+        self.left_deadline = None
+        self.middle_deadline = None
+        self.right_deadline = None
         self.last_left_hotkey_time = 0
         self.last_middle_hotkey_time = 0
         self.pressed_keys = set()
@@ -431,23 +548,13 @@ class TibiaTimerApp:
         self.middle_frames = []
         self.right_frames = []
         self.preset_options = {"Ice UE": 40, "Ulu's": 22, "Exori Gran": 6, "Custom": None}
-        self.sound_presets_left = {
-            "Chime": self.sound_file_left,
-            "Spell Ready": resource_path("assets/Spell Ready.mp3"),
-            "Jingle": resource_path("assets/Jingle.mp3"),
-            "UE Ready": resource_path("assets/UEREADY.mp3"),
-            "ULU Ready": resource_path("assets/ULUready.mp3"),
-            "Use Food Buff": resource_path ("assets/Use Food Buff.mp3")
-        }
+        self.sound_presets_left = dict(SOUND_PRESETS_LEFT)
         self.sound_presets_middle = self.sound_presets_left.copy()  # Use same presets as left panel
-        self.sound_presets_right = {
-            "Potion": self.sound_file_right,
-            "Use Buff": resource_path("assets/Use Buff.mp3"),
-            "Snappy": resource_path("assets/Snappy.mp3"),
-            "Bullseye Potion": resource_path("assets/bullseyepotion.mp3"),
-            "MM Potion Ready": resource_path("assets/MMPotionready.mp3"),
-            "Use Food Buff": resource_path ("assets/Use Food Buff.mp3")
-        }
+        self.sound_presets_right = dict(SOUND_PRESETS_RIGHT)
+        if find_engine():  # spoken alerts are offered only with an offline speech engine installed
+            for side in TIMER_SIDES:
+                # Placeholder until the phrase is rendered, see apply_spoken_sound
+                getattr(self, f"sound_presets_{side}")[SPEAK_OPTION] = DEFAULT_SOUNDS[side]
 
         self.current_sound_left = self.sound_file_left
         self.current_sound_middle = self.sound_file_left
@@ -456,10 +563,38 @@ class TibiaTimerApp:
         self.middle_finished_at = None
         self.right_finished_at = None
         self.drag_mode = False
+        self.extra_settings = {}   # settings file sections this version does not edit in the GUI
+        self.control_servers = []
+        self.state_feed = None     # set when the overlay feed is enabled
+        self.state_feed_server = None
+        self.party_sync = None     # set when party sync is enabled
+        self.party_job = None
+        self.log_tailer = None
+        self.settings_watcher = None
+        self.settings_text = None  # settings file contents last loaded or written by the app
+        self.cooldown_watcher = None
+        self.cooldown_stats = None
+        self.timer_journal = None
+        self.notifier = None       # set by start_notifier; expiry falls back to the sound alone
+        self.alert_jobs = {side: [] for side in TIMER_SIDES}  # pending pre-warn cue / early ready sound jobs
+        self.alert_deadline = {}   # side -> deadline the pending alert jobs belong to
+        self.early_sound = {}      # side -> deadline whose ready sound already started ahead of expiry
+        self.hotkey_matcher = HotkeyMatcher()
+        # Idle state: no countdown running means no periodic callbacks at all
+        self.idle = False
+        self.suspend_mixer_when_idle = True
+        self.idle_grace_ms = 10000  # keep animating this long after the last interaction
+        self.idle_check_job = None
+        self.last_interaction_time = time.monotonic()
+        self.wakeup_count = 0       # periodic callbacks fired since startup
+        self.idle_started_at = None
+        self.idle_started_cpu = 0.0
+        self.idle_started_wakeups = 0
 
     def play_click_sound(self):
-        if self.click_sound:
-            self.click_sound.play()
+        click_sound = self.sound_cache.get(self.click_file)
+        if click_sound:
+            click_sound.play()
 
     def setup_gui(self):
         self.root.title("Tibia Timer")
@@ -468,7 +603,7 @@ class TibiaTimerApp:
         self.root.geometry("1220x400")  # Increased from 810px to fit third panel
         self.root.resizable(False, False)
         try:
-            self.root.iconbitmap(self.icon_path)
+            self.root.iconbitmap(self.assets.path(self.icon_name))
         except Exception as e:
             print(f"Icon error: {e}")
 
@@ -599,12 +734,13 @@ class TibiaTimerApp:
             sound_default="Select sound",
             sound_presets=self.sound_presets_left,
             countdown_ready_text="Spell Ready",
-            tooltip_text="(mm:ss or ss)",
+            tooltip_text="(mm:ss.f or ss.f)",
             add_preset=True,
             preset_options=self.preset_options,
             preset_callback=self.apply_preset_option,
             sound_label_rely=0.85,
-            set_sound_callback=self.set_sound_left
+            set_sound_callback=self.set_sound_left,
+            spell_db=self.spell_db
         )
         
         self.middle_panel = TimerPanel(
@@ -614,12 +750,13 @@ class TibiaTimerApp:
             sound_default="Select sound",
             sound_presets=self.sound_presets_middle,
             countdown_ready_text="Spell Ready",
-            tooltip_text="(mm:ss or ss)",
+            tooltip_text="(mm:ss.f or ss.f)",
             add_preset=True,
             preset_options=self.preset_options,
             preset_callback=self.apply_preset_option,
             sound_label_rely=0.85,
-            set_sound_callback=self.set_sound_middle
+            set_sound_callback=self.set_sound_middle,
+            spell_db=self.spell_db
         )
         
         self.right_panel = TimerPanel(
@@ -629,7 +766,7 @@ class TibiaTimerApp:
             sound_default="Select sound",
             sound_presets=self.sound_presets_right,
             countdown_ready_text="Buff Ready",
-            tooltip_text="(mm:ss or ss)",
+            tooltip_text="(mm:ss.f or ss.f)",
             add_preset=False,
             sound_label_rely=0.85,
             set_sound_callback=self.set_sound_right
@@ -654,15 +791,12 @@ class TibiaTimerApp:
         """Create image labels for the application"""
         try:
             print("Base path:", os.path.dirname(os.path.abspath(__file__)))
-            print("Assets path:", resource_path("assets/spells.gif"))
-            print("Assets exists:", os.path.exists(resource_path("assets/spells.gif")))
+            print("Asset pack:", self.assets.pack.path if self.assets.pack else "none (loose files)")
+            print("Assets exists:", self.assets.exists(self.image_path_left))
             
-            # Load the top left image (transparent wizard)
+            # Load the top left image (transparent wizard), pre-resized to 94x94 via the cache
             try:
-                pil_image = Image.open(self.top_left_image_path)
-                # Resize to 94x94 with antialiasing
-                pil_image = pil_image.resize((94, 94), Image.Resampling.LANCZOS)
-                self.top_left_img = ImageTk.PhotoImage(pil_image)
+                self.top_left_img = self.image_cache.get_image(self.top_left_image_path, (94, 94))
                 # Place in top left corner of the left panel with a small margin
                 self.top_left_label = tk.Label(self.left_frame, image=self.top_left_img, bd=0)
                 self.top_left_label.place(x=2, y=2)
@@ -674,11 +808,7 @@ class TibiaTimerApp:
             
             # Load the left panel GIF (spells)
             try:
-                self.left_gif = Image.open(self.image_path_left)
-                self.left_frames = []
-                for frame in ImageSequence.Iterator(self.left_gif):
-                    frame_copy = frame.copy()
-                    self.left_frames.append(ImageTk.PhotoImage(frame_copy))
+                self.left_frames = self.image_cache.get_frames(self.image_path_left)
                 
                 self.left_image_label = tk.Label(self.left_frame, image=self.left_frames[0], bd=0)
                 self.left_image_label.place(relx=0.5, rely=0.35, anchor="center")
@@ -690,13 +820,9 @@ class TibiaTimerApp:
                 self.left_image_label = tk.Label(self.left_frame, bd=0)
                 self.left_image_label.place(relx=0.5, rely=0.35, anchor="center")
             
-            # Load the middle panel GIF (same as left for now)
+            # Load the middle panel GIF (same as left, so the cache hands back the same frames)
             try:
-                self.middle_gif = Image.open(self.image_path_left)  # Reuse left image path
-                self.middle_frames = []
-                for frame in ImageSequence.Iterator(self.middle_gif):
-                    frame_copy = frame.copy()
-                    self.middle_frames.append(ImageTk.PhotoImage(frame_copy))
+                self.middle_frames = self.image_cache.get_frames(self.image_path_left)  # Reuse left image path
                 
                 self.middle_image_label = tk.Label(self.middle_frame, image=self.middle_frames[0], bd=0)
                 self.middle_image_label.place(relx=0.5, rely=0.35, anchor="center")
@@ -710,11 +836,7 @@ class TibiaTimerApp:
             
             # Load the right panel GIF (buff)
             try:
-                self.right_gif = Image.open(self.image_path_right)
-                self.right_frames = []
-                for frame in ImageSequence.Iterator(self.right_gif):
-                    frame_copy = frame.copy()
-                    self.right_frames.append(ImageTk.PhotoImage(frame_copy))
+                self.right_frames = self.image_cache.get_frames(self.image_path_right)
                 
                 self.right_image_label = tk.Label(self.right_frame, image=self.right_frames[0], bd=0)
                 self.right_image_label.place(relx=0.5, rely=0.35, anchor="center")
@@ -735,6 +857,10 @@ class TibiaTimerApp:
     def update_left_gif(self):
         """Update the left GIF animation"""
         try:
+            self.wakeup_count += 1
+            if self.idle:
+                self.left_after_id = None
+                return
             if hasattr(self, 'left_frames') and self.left_frames:
                 self.left_frame_idx = (self.left_frame_idx + 1) % len(self.left_frames)
                 self.left_image_label.configure(image=self.left_frames[self.left_frame_idx])
@@ -745,6 +871,10 @@ class TibiaTimerApp:
     def update_middle_gif(self):
         """Update the middle GIF animation"""
         try:
+            self.wakeup_count += 1
+            if self.idle:
+                self.middle_after_id = None
+                return
             if hasattr(self, 'middle_frames') and self.middle_frames:
                 self.middle_frame_idx = (self.middle_frame_idx + 1) % len(self.middle_frames)
                 self.middle_image_label.configure(image=self.middle_frames[self.middle_frame_idx])
@@ -755,6 +885,10 @@ class TibiaTimerApp:
     def update_right_gif(self):
         """Update the right GIF animation"""
         try:
+            self.wakeup_count += 1
+            if self.idle:
+                self.right_after_id = None
+                return
             if hasattr(self, 'right_frames') and self.right_frames:
                 self.right_frame_idx = (self.right_frame_idx + 1) % len(self.right_frames)
                 self.right_image_label.configure(image=self.right_frames[self.right_frame_idx])
@@ -762,6 +896,629 @@ class TibiaTimerApp:
         except Exception as e:
             print(f"Error updating right GIF: {e}")
 
+    def start_gif_animations(self):
+        """(Re)start the GIF animation loops that are not already running"""
+        for side in ("left", "middle", "right"):
+            frames = getattr(self, f"{side}_frames", None)
+            if frames and getattr(self, f"{side}_after_id", None) is None:
+                setattr(self, f"{side}_after_id",
+                        self.root.after(200, getattr(self, f"update_{side}_gif")))
+
+    def stop_gif_animations(self):
+        """Cancel all pending GIF animation callbacks"""
+        for attr in ["left_after_id", "middle_after_id", "right_after_id"]:
+            job = getattr(self, attr, None)
+            if job is not None:
+                self.root.after_cancel(job)
+                setattr(self, attr, None)
+
+    # ---------------- Idle State ----------------
+    def setup_idle_tracking(self):
+        """Wake on any user interaction and arm the first idle check"""
+        for sequence in ("<ButtonPress>", "<KeyPress>", "<Enter>"):
+            self.root.bind_all(sequence, lambda e: self.wake("interaction"), add="+")
+        self.schedule_idle_check()
+
+    def has_active_timers(self):
+        return self.is_counting_left or self.is_counting_middle or self.is_counting_right
+
+    def schedule_idle_check(self, delay_ms=None):
+        """Arm a single (non-repeating) check that puts the app to sleep if nothing is running"""
+        if self.idle_check_job is not None:
+            self.root.after_cancel(self.idle_check_job)
+        self.idle_check_job = self.root.after(delay_ms or self.idle_grace_ms, self.check_idle)
+
+    def check_idle(self):
+        self.idle_check_job = None
+        self.wakeup_count += 1
+        if self.idle or self.has_active_timers():
+            return
+        if pygame.mixer.get_init() and pygame.mixer.get_busy():
+            self.schedule_idle_check(1000)  # let an expiry sound finish first
+            return
+        quiet_ms = (time.monotonic() - self.last_interaction_time) * 1000
+        if quiet_ms < self.idle_grace_ms:
+            self.schedule_idle_check(int(self.idle_grace_ms - quiet_ms) + 1)
+            return
+        self.enter_idle()
+
+    def enter_idle(self):
+        """Cancel all periodic work and optionally release the audio device"""
+        try:
+            self.stop_gif_animations()
+            if self.suspend_mixer_when_idle and pygame.mixer.get_init():
+                self.alert_channel = None
+                self.sound_cache.clear()
+                self.sound_loading.clear()
+                pygame.mixer.quit()
+            self.idle = True
+            self.idle_started_at = time.monotonic()
+            self.idle_started_cpu = time.process_time()
+            self.idle_started_wakeups = self.wakeup_count
+            print("Entered idle mode")
+        except Exception as e:
+            print(f"Error in enter_idle: {e}")
+            traceback.print_exc()
+
+    def wake(self, reason="interaction"):
+        """Leave idle mode immediately; called on user interaction or when a timer is armed"""
+        self.last_interaction_time = time.monotonic()
+        if not self.idle:
+            return
+        if threading.current_thread() is not threading.main_thread():
+            # Restarting the mixer and animations must not race enter_idle on the Tk thread
+            try:
+                self.root.after(0, self.wake, reason)
+            except RuntimeError:
+                pass  # window already closed
+            return
+        try:
+            self.idle = False
+            stats = self.idle_stats()
+            print(f"Woke from idle ({reason}) after {stats['idle_seconds']:.1f}s: "
+                  f"{stats['idle_wakeups']} wakeups, {stats['idle_cpu_ms']:.1f} ms CPU")
+            if not pygame.mixer.get_init():
+                self.init_pygame()
+                self.preload_sounds()
+            self.start_gif_animations()
+            self.schedule_idle_check()
+        except Exception as e:
+            print(f"Error in wake: {e}")
+            traceback.print_exc()
+
+    def idle_stats(self):
+        """Periodic wakeups and CPU time spent during the current (or last) idle period"""
+        if self.idle_started_at is None:
+            return {"idle": self.idle, "idle_seconds": 0.0, "idle_wakeups": 0,
+                    "idle_cpu_ms": 0.0, "total_wakeups": self.wakeup_count}
+        return {
+            "idle": self.idle,
+            "idle_seconds": time.monotonic() - self.idle_started_at,
+            "idle_wakeups": self.wakeup_count - self.idle_started_wakeups,
+            "idle_cpu_ms": (time.process_time() - self.idle_started_cpu) * 1000,
+            "total_wakeups": self.wakeup_count,
+        }
+
+    # ---------------- Diagnostics ----------------
+    def report_memory(self, event=None):
+        """Print (and show) resident memory broken down by images, sounds and Tk widgets"""
+        try:
+            rss = get_process_rss()
+            image_bytes = self.image_cache.memory_usage()
+            sound_bytes = 0
+            mixer = pygame.mixer.get_init()
+            if mixer:
+                frequency, size, channels = mixer
+                for sound in self.sound_cache.values():
+                    sound_bytes += int(sound.get_length() * frequency * channels * abs(size) // 8)
+            widget_count = 0
+            pending = [self.root]
+            while pending:
+                widget = pending.pop()
+                widget_count += 1
+                pending.extend(widget.winfo_children())
+            report = {
+                "rss": rss,
+                "images": image_bytes,
+                "sounds": sound_bytes,
+                "widgets": widget_count,
+            }
+            lines = [
+                f"Resident memory: {rss / 1048576:.1f} MB" if rss else "Resident memory: unavailable",
+                f"Images (decoded pixels): {image_bytes / 1024:.1f} KB",
+                f"Sounds (decoded PCM): {sound_bytes / 1024:.1f} KB",
+                f"Tk widgets: {widget_count}",
+            ]
+            if self.notifier is not None:
+                for name, sink in self.notifier.stats().items():
+                    lines.append(f"Notify {name}: {sink['sent']} sent, {sink['failed']} failed, "
+                                 f"{sink['dropped']} dropped, {sink['mean_ms']:.1f} ms mean / {sink['max_ms']:.1f} ms max")
+            io = self.io_worker.stats()
+            report["io"] = io
+            lines.append(f"I/O queue: {io['depth']} queued (max {io['max_depth']}), {io['completed']} jobs, "
+                         f"latency {io['mean_latency_ms']:.1f} ms mean / {io['max_latency_ms']:.1f} ms max")
+            if rss:
+                other = rss - image_bytes - sound_bytes
+                lines.append(f"Interpreter, Tk and widgets (remainder): {other / 1048576:.1f} MB")
+            print("\n".join(["Memory report:"] + lines))
+            if event is not None:
+                messagebox.showinfo("Memory report", "\n".join(lines))
+            return report
+        except Exception as e:
+            print(f"Error in report_memory: {e}")
+            traceback.print_exc()
+
+    # ---------------- Expiry Notifications ----------------
+    def start_notifier(self):
+        """Expiry sinks from the "notify" settings section (see notify.py); just the sound by default"""
+        config = self.extra_settings.get("notify", {})
+        try:
+            sinks = build_sinks(config, self.root, self.play_expiry_sound)
+            self.notifier = Notifier(sinks, float(config.get("timeout", DEFAULT_TIMEOUT)))
+        except Exception as e:
+            print(f"Could not set up notifications: {e}")
+            self.notifier = None
+
+    def stop_notifier(self):
+        if self.notifier is not None:
+            self.notifier.close()
+            self.notifier = None
+
+    def notify_expired(self, side, text):
+        if self.notifier is not None:
+            self.notifier.notify(side, text)
+        else:
+            self.play_expiry_sound(side)
+
+    def play_expiry_sound(self, side):
+        early = self.early_sound.pop(side, None)
+        if early is not None and early == getattr(self, f"{side}_deadline"):
+            return  # already started ahead of the deadline by schedule_alerts
+        if not getattr(self, f"current_sound_{side}"):
+            return
+        if side != "right":
+            self.play_sound(getattr(self, f"current_sound_{side}"))
+        elif self.left_finished_at is not None and (time.time() - self.left_finished_at) < 2:
+            self.root.after(1000, self.play_right_sound)  # let a near-simultaneous left alert finish
+        else:
+            self.play_right_sound()
+
+    # ---------------- Pre-warn Cues and Latency Compensation ----------------
+    def apply_audio_settings(self):
+        """The mixer starts before the settings load; restart it if a calibrated buffer size differs"""
+        buffer = self.extra_settings.get("audio", {}).get("buffer")
+        if buffer is None or int(buffer) == getattr(self, "mixer_buffer", None) or not pygame.mixer.get_init():
+            return
+        print(f"Using calibrated audio buffer of {buffer} samples")
+        pygame.mixer.quit()
+        self.init_pygame()
+        self.preload_sounds()
+
+    def output_latency(self):
+        """
+        Seconds between starting a sound and hearing it: the calibrated value
+        from the "audio" settings section when there is one, otherwise two
+        mixer buffers.
+        """
+        audio = self.extra_settings.get("audio", {})
+        if "output_latency_ms" in audio:
+            return max(0.0, float(audio["output_latency_ms"]) / 1000.0)
+        mixer = pygame.mixer.get_init()
+        return 2 * self.mixer_buffer / mixer[0] if mixer else 0.0
+
+    def prewarn_times(self, side):
+        """Seconds before expiry to play the cue, from "prewarn": {"left": [5], "right": [60, 10]}"""
+        times = self.extra_settings.get("prewarn", {}).get(side, [])
+        return [float(seconds) for seconds in (times if isinstance(times, list) else [times])]
+
+    def schedule_alerts(self, side, deadline):
+        """
+        For a new deadline, queue the pre-warn cues and start the ready sound
+        early by the output latency, so it is heard at the deadline itself.
+        """
+        self.cancel_alerts(side)
+        self.alert_deadline[side] = deadline
+        now = time.monotonic()
+        latency = self.output_latency()
+        jobs = []
+        for seconds in self.prewarn_times(side):
+            at = deadline - seconds - latency
+            if at > now:
+                jobs.append(self.root.after(int((at - now) * 1000), self.play_prewarn_cue, side))
+        if latency > 0 and deadline - latency > now:
+            jobs.append(self.root.after(int((deadline - latency - now) * 1000), self.play_ready_early, side, deadline))
+        self.alert_jobs[side] = jobs
+
+    def cancel_alerts(self, side):
+        for job in self.alert_jobs[side]:
+            self.root.after_cancel(job)
+        self.alert_jobs[side] = []
+        self.alert_deadline.pop(side, None)
+        self.early_sound.pop(side, None)
+
+    def play_prewarn_cue(self, side):
+        try:
+            cue = self.extra_settings.get("prewarn", {}).get("sound", self.click_file)
+            sound = self.sound_cache.get(cue)
+            if sound is None:
+                self.load_sound_async(cue)  # ready for the next cue
+                return
+            sound.set_volume(self.volume_var.get() / 100.0)
+            sound.play()
+        except Exception as e:
+            print(f"Error in play_prewarn_cue: {e}")
+            traceback.print_exc()
+
+    def play_ready_early(self, side, deadline):
+        try:
+            if getattr(self, f"{side}_deadline") != deadline or not getattr(self, f"is_counting_{side}"):
+                return
+            self.play_expiry_sound(side)
+            self.early_sound[side] = deadline
+        except Exception as e:
+            print(f"Error in play_ready_early: {e}")
+            traceback.print_exc()
+
+    # ---------------- Timer Journal ----------------
+    def start_timer_journal(self):
+        """
+        Journal timer changes and restart the countdowns that were running when
+        the app last stopped, unless the "journal" settings section has
+        "enabled": false.
+        """
+        if not self.extra_settings.get("journal", {}).get("enabled", True):
+            return
+        try:
+            journal = TimerJournal()
+            running = journal.restore()
+            self.timer_journal = journal.start()
+        except OSError as e:
+            print(f"Could not open the timer journal: {e}")
+            self.timer_journal = None
+            return
+        for side, (deadline, duration) in running.items():
+            remaining = deadline - time.time()
+            if remaining > 0:
+                print(f"Restoring {side} timer: {remaining:.1f}s of {duration:g}s left")
+                self.arm_timer(side, remaining)
+
+    def stop_timer_journal(self):
+        if self.timer_journal is not None:
+            self.timer_journal.close()
+            self.timer_journal = None
+
+    # ---------------- Cooldown Usage Stats ----------------
+    def start_cooldown_stats(self):
+        """
+        Record activations/expiries when the "stats" settings section has
+        "enabled": true; "max_rows" caps how many are kept on disk
+        """
+        config = self.extra_settings.get("stats", {})
+        if not config.get("enabled", False):
+            return
+        try:
+            self.cooldown_stats = CooldownStats(worker=self.io_worker,
+                                                max_rows=config.get("max_rows", DEFAULT_MAX_ROWS))
+        except (OSError, ValueError) as e:
+            print(f"Could not open cooldown stats: {e}")
+
+    def report_stats(self, event=None):
+        """Print (and show) how quickly each cooldown gets used once ready"""
+        try:
+            if self.cooldown_stats is None:
+                print('Cooldown stats are off; add "stats": {"enabled": true} to the settings file')
+                return None
+            results = self.cooldown_stats.summary()
+            lines = format_summary(results)
+            print("\n".join(["Cooldown usage:"] + lines))
+            if event is not None:
+                messagebox.showinfo("Cooldown usage", "\n".join(lines))
+            return results
+        except Exception as e:
+            print(f"Error in report_stats: {e}")
+            traceback.print_exc()
+
+    # ---------------- Timer Control (local API) ----------------
+    def start_control_server(self):
+        """
+        Start the local control API from the "control" settings section:
+        {"enabled": true, "port": 47653, "unix_socket": "/path/to/socket"}.
+        Off by default. TCP always binds to loopback; port 0 disables it.
+        Clients authenticate with the token in control.token ("token" in the
+        section overrides it).
+        """
+        control = self.extra_settings.get("control", {})
+        if not control.get("enabled", False):
+            return
+        try:
+            token = control.get("token") or load_token()
+        except OSError as e:
+            print(f"Could not read the control token, not starting the control server: {e}")
+            return
+        dispatcher = TkDispatcher(self.root, self.handle_control_command)
+        addresses = []
+        port = control.get("port", DEFAULT_PORT)
+        if port:
+            addresses.append(("127.0.0.1", int(port)))
+        if control.get("unix_socket"):
+            addresses.append(control["unix_socket"])
+        for address in addresses:
+            try:
+                self.control_servers.append(ControlServer(dispatcher, address, token).start())
+            except OSError as e:
+                print(f"Could not start control server on {address}: {e}")
+
+    def stop_control_server(self):
+        for server in self.control_servers:
+            try:
+                server.stop()
+            except OSError as e:
+                print(f"Error stopping control server: {e}")
+        self.control_servers = []
+
+    def handle_control_command(self, command):
+        """Run one control API command on the Tk thread and return its result"""
+        cmd = command["cmd"]
+        if cmd == "ping":
+            return {"ok": True}
+        if cmd == "query":
+            sides = [self.check_side(command["timer"])] if "timer" in command else TIMER_SIDES
+            return {"ok": True, "timers": [self.timer_state(side) for side in sides]}
+        side = self.check_side(command.get("timer"))
+        if cmd == "arm":
+            duration = command.get("duration")
+            self.arm_timer(side, None if duration is None else parse_timer(str(duration)))
+        elif cmd == "cancel":
+            self.cancel_timer(side)
+        else:
+            raise ValueError(f"unknown command {cmd!r}")
+        return {"ok": True, "timer": self.timer_state(side)}
+
+    def check_side(self, side):
+        if side not in TIMER_SIDES:
+            raise ValueError(f"unknown timer {side!r}, expected one of {', '.join(TIMER_SIDES)}")
+        return side
+
+    def configured_duration(self, side):
+        """Duration a timer would run for: the started value, or the entry while stopped"""
+        if not self.listening_active:
+            entry = getattr(self, f"{side}_panel").timer_entry.get()
+            if entry:
+                return self.parse_timer(entry)
+        return getattr(self, f"current_timer_{side}")
+
+    def arm_timer(self, side, duration=None):
+        """(Re)start a countdown immediately, bypassing the hotkey debounce"""
+        job = getattr(self, f"countdown_{side}_job")
+        if getattr(self, f"is_counting_{side}") and job is not None:
+            self.root.after_cancel(job)
+        self.wake("control")
+        if duration is None:
+            duration = self.configured_duration(side)
+        setattr(self, f"{side}_deadline", time.monotonic() + duration)
+        setattr(self, f"is_counting_{side}", True)
+        getattr(self, f"countdown_{side}")()
+
+    def cancel_timer(self, side):
+        """Stop one countdown and show its ready text"""
+        job = getattr(self, f"countdown_{side}_job")
+        if getattr(self, f"is_counting_{side}") and job is not None:
+            self.root.after_cancel(job)
+        setattr(self, f"is_counting_{side}", False)
+        setattr(self, f"{side}_deadline", None)
+        getattr(self, f"{side}_panel").countdown_label.config(text=READY_TEXT[side])
+        self.publish_state(side, "ready")
+        self.schedule_idle_check()
+
+    def timer_state(self, side):
+        deadline = getattr(self, f"{side}_deadline")
+        if getattr(self, f"is_counting_{side}") and deadline is not None:
+            state, remaining = "running", round(max(0.0, deadline - time.monotonic()), 3)
+        elif getattr(self, f"{side}_finished_at") is not None:
+            state, remaining = "expired", 0.0
+        else:
+            state, remaining = "ready", None
+        return {"id": side, "state": state, "remaining": remaining,
+                "duration": self.configured_duration(side)}
+
+    # ---------------- Overlay State Feed ----------------
+    def start_state_feed(self):
+        """
+        Serve live timer state for streaming overlays from the "feed" settings
+        section: {"enabled": true, "port": 47654}. Off by default.
+        """
+        feed = self.extra_settings.get("feed", {})
+        if not feed.get("enabled", False):
+            return
+        try:
+            self.state_feed = StateFeed()
+            self.state_feed_server = StateFeedServer(self.state_feed, int(feed.get("port", DEFAULT_FEED_PORT))).start()
+        except OSError as e:
+            print(f"Could not start state feed: {e}")
+            self.state_feed = None
+            return
+        for side in TIMER_SIDES:
+            self.publish_state(side, "ready")
+
+    def stop_state_feed(self):
+        if self.state_feed_server is not None:
+            try:
+                self.state_feed_server.stop()
+            except OSError as e:
+                print(f"Error stopping state feed: {e}")
+        self.state_feed = None
+        self.state_feed_server = None
+
+    def publish_state(self, side, state, remaining=None):
+        """Hand one timer's state to the overlay feed, party sync and usage stats; each keeps only what changed"""
+        if self.state_feed is not None:
+            self.state_feed.publish([{"id": side, "state": state,
+                                      "remaining": None if remaining is None else round(remaining, 1)}])
+        deadline = getattr(self, f"{side}_deadline") if state == "running" else None
+        if self.party_sync is not None:
+            self.party_sync.timer_changed(side, state, deadline)
+        if self.cooldown_stats is not None:
+            self.cooldown_stats.timer_changed(side, state, deadline, remaining or 0.0)
+        if self.timer_journal is not None:
+            self.timer_journal.timer_changed(side, state, deadline, remaining or 0.0)
+        if state == "running" and deadline != self.alert_deadline.get(side):
+            self.schedule_alerts(side, deadline)
+        elif state == "ready":
+            self.cancel_alerts(side)
+
+    # ---------------- Party Sync ----------------
+    def start_party_sync(self):
+        """
+        Share timers with other instances on the LAN from the "party" settings
+        section: {"enabled": true, "name": "Knight", "group": "239.255.42.99",
+        "port": 47655, "interface": "0.0.0.0", "ttl": 1}. A broadcast address
+        works as the group too. Off by default.
+        """
+        party = self.extra_settings.get("party", {})
+        if not party.get("enabled", False):
+            return
+        try:
+            self.party_sync = PartySync(name=party.get("name", ""),
+                                        group=party.get("group", DEFAULT_GROUP),
+                                        port=int(party.get("port", DEFAULT_PARTY_PORT)),
+                                        interface=party.get("interface", "0.0.0.0"),
+                                        ttl=int(party.get("ttl", 1)),
+                                        on_change=self.on_party_change).start()
+        except OSError as e:
+            print(f"Could not start party sync: {e}")
+            self.party_sync = None
+            return
+        self.party_label = ttk.Label(self.right_frame, text="Party: waiting for peers",
+                                     font=("Copilot", 9, "bold"), wraplength=380)
+        self.party_label.place(relx=0.5, rely=0.95, anchor="center")
+        for side in TIMER_SIDES:
+            self.publish_state(side, "ready")
+
+    def stop_party_sync(self):
+        if self.party_job is not None:
+            self.root.after_cancel(self.party_job)
+            self.party_job = None
+        if self.party_sync is not None:
+            self.party_sync.stop()
+            self.party_sync = None
+
+    def on_party_change(self):
+        """Called from the party sync thread; the refresh itself runs on the Tk thread"""
+        try:
+            self.root.after(0, self.refresh_party_label)
+        except RuntimeError:
+            pass  # window already closed
+
+    def refresh_party_label(self):
+        """Show remote timers, ticking only while one of them is counting down"""
+        try:
+            if self.party_job is not None:
+                self.root.after_cancel(self.party_job)
+                self.party_job = None
+            if self.party_sync is None:
+                return
+            self.wakeup_count += 1
+            parts = []
+            next_remaining = None
+            for entry in self.party_sync.remote_timers():
+                if entry["state"] == "running":
+                    text = format_remaining(entry["remaining"], clock=True)
+                    if next_remaining is None or entry["remaining"] < next_remaining:
+                        next_remaining = entry["remaining"]
+                else:
+                    text = "Ready"
+                parts.append(f"{entry['name']} {entry['timer']}: {text}")
+            self.party_label.config(text="Party: " + (" | ".join(parts) or "waiting for peers"))
+            if next_remaining is not None:
+                self.party_job = self.root.after(next_tick_delay(next_remaining), self.refresh_party_label)
+        except Exception as e:
+            print(f"Error in refresh_party_label: {e}")
+            traceback.print_exc()
+
+    # ---------------- Game Log Triggers ----------------
+    def start_log_tailer(self):
+        """
+        Arm timers from game/chat log lines, configured in the "log_triggers"
+        settings section: {"path": "...", "encoding": "utf-8", "triggers":
+        [{"pattern": "You feel hungry\\.", "timer": "right"}]}. A trigger may
+        carry "duration" to override the timer's value; "ignore_case" makes
+        the whole set case-insensitive.
+        """
+        config = self.extra_settings.get("log_triggers", {})
+        if not config.get("path") or not config.get("triggers"):
+            return
+        try:
+            self.log_tailer = LogTailer(config["path"], config["triggers"], self.on_log_match,
+                                        encoding=config.get("encoding", "utf-8")).start()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not start log triggers: {e}")
+            self.log_tailer = None
+
+    def stop_log_tailer(self):
+        if self.log_tailer is not None:
+            self.log_tailer.stop()
+            self.log_tailer = None
+
+    def on_log_match(self, trigger, line):
+        """Called from the log watcher thread; arming happens on the Tk thread"""
+        print(f"Log trigger for {trigger['timer']}: {line.strip()}")
+        try:
+            self.root.after(0, self.arm_from_log, trigger)
+        except RuntimeError:
+            pass  # window already closed
+
+    def arm_from_log(self, trigger):
+        """Log lines count as hotkey presses: same path, same debounce, only while started"""
+        if not self.listening_active:
+            return
+        side = trigger["timer"]
+        if trigger.get("duration") is not None:
+            self.arm_timer(side, self.parse_timer(str(trigger["duration"])))
+        else:
+            getattr(self, f"start_countdown_{side}")()
+
+    # ---------------- Screen Cooldown Detection ----------------
+    def start_cooldown_detector(self):
+        """Optional check of the client's cooldown bar; see cooldown_detector for the settings"""
+        config = self.extra_settings.get("cooldown_detector", {})
+        if not config.get("enabled", False):
+            return
+        try:
+            detector = CooldownDetector(config["icons"], threshold=config.get("threshold", 40),
+                                        confirm_frames=config.get("confirm_frames", 2))
+            self.cooldown_watcher = CooldownWatcher(detector, tuple(config["region"]), self.detector_deadlines,
+                                                    self.on_cooldown_action, fps=config.get("fps", 4),
+                                                    grace=config.get("grace", 1.5)).start()
+        except (OSError, ValueError, KeyError, RuntimeError) as e:
+            print(f"Could not start cooldown detector: {e}")
+            self.cooldown_watcher = None
+
+    def stop_cooldown_detector(self):
+        if self.cooldown_watcher is not None:
+            self.cooldown_watcher.stop()
+            self.cooldown_watcher = None
+
+    def detector_deadlines(self):
+        """Read from the detector thread: plain attribute reads, no Tk calls"""
+        return {side: getattr(self, f"{side}_deadline") if getattr(self, f"is_counting_{side}") else None
+                for side in TIMER_SIDES}
+
+    def on_cooldown_action(self, action, side):
+        try:
+            self.root.after(0, self.apply_cooldown_action, action, side)
+        except RuntimeError:
+            pass  # window already closed
+
+    def apply_cooldown_action(self, action, side):
+        """The game's cooldown bar wins over our own guess, but only while started"""
+        if not self.listening_active:
+            return
+        print(f"Cooldown detector: {action} {side}")
+        if action == "arm" and not getattr(self, f"is_counting_{side}"):
+            self.arm_timer(side)
+        elif action == "cancel" and getattr(self, f"is_counting_{side}"):
+            self.cancel_timer(side)
+
     def toggle_listener(self):
         self.play_click_sound()
         
@@ -799,6 +1556,9 @@ class TibiaTimerApp:
                 self.right_panel.hotkey_entry.config(state="disabled")
                 self.right_panel.timer_entry.config(state="disabled")
                 
+                self.hotkey_matcher = self.build_hotkey_matcher()
+                print(f"Compiled {self.hotkey_matcher.count} hotkey bindings")
+
                 # Stop any existing listener first
                 if self.listener:
                     self.listener.stop()
@@ -869,10 +1629,12 @@ class TibiaTimerApp:
         # Reset preset selections and momentum checkboxes
         if hasattr(self.left_panel, "preset_var"):
             self.left_panel.preset_var.set("Select Spell")
+            self.left_panel.group_label.config(text="")
         if hasattr(self.left_panel, "momentum_var"):
             self.left_panel.momentum_var.set(False)
         if hasattr(self.middle_panel, "preset_var"):
             self.middle_panel.preset_var.set("Select Spell")
+            self.middle_panel.group_label.config(text="")
         if hasattr(self.middle_panel, "momentum_var"):
             self.middle_panel.momentum_var.set(False)
             
@@ -886,6 +1648,8 @@ class TibiaTimerApp:
         self.left_finished_at = None
         self.middle_finished_at = None
         self.right_finished_at = None
+        for side in TIMER_SIDES:
+            self.publish_state(side, "ready")
         
         # Reset timer variables in panels
         self.left_panel.timer_var.set("")
@@ -911,10 +1675,8 @@ class TibiaTimerApp:
         self.right_panel.sound_menu.config(state="normal")
 
     def update_volume(self, value):
-        """Update the volume level for pygame sounds"""
+        """Update the volume label; the level is applied to the alert channel on playback"""
         try:
-            vol = float(value) / 100.0
-            pygame.mixer.music.set_volume(vol)
             self.vol_label.config(text=f"{int(float(value))}%")
         except Exception as e:
             print(f"Error in update_volume: {e}")
@@ -927,20 +1689,58 @@ class TibiaTimerApp:
                 self.root.after_cancel(self.countdown_left_job)
                 self.left_panel.countdown_label.config(text="Spell Ready")
                 self.is_counting_left = False
+                self.publish_state("left", "ready")
                 
             if hasattr(self, 'is_counting_right') and self.is_counting_right and hasattr(self, 'countdown_right_job') and self.countdown_right_job is not None:
                 self.root.after_cancel(self.countdown_right_job)
                 self.right_panel.countdown_label.config(text="Buff Ready")
                 self.is_counting_right = False
+                self.publish_state("right", "ready")
                 
             if hasattr(self, 'is_counting_middle') and self.is_counting_middle and hasattr(self, 'countdown_middle_job') and self.countdown_middle_job is not None:
                 self.root.after_cancel(self.countdown_middle_job)
                 self.middle_panel.countdown_label.config(text="Spell Ready")
                 self.is_counting_middle = False
+                self.publish_state("middle", "ready")
+            if hasattr(self, 'idle_check_job'):
+                self.schedule_idle_check()
         except Exception as e:
             print(f"Error in cancel_timers: {e}")
             traceback.print_exc()
     
+    def build_hotkey_matcher(self):
+        """
+        Compile the panel hotkeys plus the "bindings" settings section into one
+        matcher. Each binding is {"keys": "F1,F2", "timer": "left"} with an
+        optional "duration" (overrides the panel's timer) and "timeout"
+        (seconds allowed between keys, default 0.3). Keys may be a single
+        combo or a comma-separated sequence.
+        """
+        matcher = HotkeyMatcher()
+        panel_keys = set()
+        for side in TIMER_SIDES:
+            keys = getattr(self, f"current_hotkey_{side}")
+            steps = parse_binding(keys)
+            if steps and steps not in panel_keys:  # the first panel wins a shared hotkey, as before
+                panel_keys.add(steps)
+                matcher.add(steps, {"keys": keys, "timer": side, "duration": None})
+        for binding in self.extra_settings.get("bindings", []):
+            try:
+                side = self.check_side(binding.get("timer"))
+                duration = binding.get("duration")
+                duration = None if duration is None else parse_timer(str(duration))
+                matcher.add(binding["keys"], {"keys": binding["keys"], "timer": side, "duration": duration},
+                            binding.get("timeout"))
+            except (KeyError, ValueError, AttributeError) as e:
+                print(f"Skipping hotkey binding {binding!r}: {e}")
+        return matcher
+
+    def run_hotkey_action(self, action):
+        if action["duration"] is None:
+            getattr(self, f"start_countdown_{action['timer']}")()
+        else:
+            self.arm_timer(action["timer"], action["duration"])
+
     def start_hotkey_listener(self):
         """Start the keyboard listener for hotkeys"""
         try:
@@ -948,7 +1748,8 @@ class TibiaTimerApp:
             if not hasattr(self, 'pressed_keys'):
                 self.pressed_keys = set()
             
-            # Create and start new listener
+            # Create and start new listener (pynput needs a display, so it is only imported here)
+            from pynput import keyboard
             self.listener = keyboard.Listener(on_press=self.on_press, on_release=self.on_release)
             self.listener.start()
             
@@ -966,6 +1767,66 @@ class TibiaTimerApp:
             traceback.print_exc()
             return False
 
+    def apply_custom_sound(self, side, file_path, default_sound):
+        """Check a custom sound's size on the I/O worker, then select it (or fall back to default_sound)"""
+        def checked(file_size, error):
+            panel = getattr(self, f"{side}_panel")
+            if error is not None or file_size > 102400:
+                if error is None:
+                    messagebox.showerror("File Too Large", "File must be no more than 100kb.")
+                else:
+                    messagebox.showerror("Invalid File", f"Could not read {file_path}: {error}")
+                panel.sound_var.set("Select sound")
+                setattr(self, f"current_sound_{side}", default_sound)
+            else:
+                setattr(self, f"current_sound_{side}", file_path)
+                panel.sound_var.set("Custom Sound")
+            self.preload_sounds()
+        self.io_worker.submit(os.path.getsize, file_path, callback=checked, key=("custom_sound", side))
+
+    def phrase_cache(self):
+        """PhraseCache for the "tts" settings section, or None without a speech engine"""
+        config = self.extra_settings.get("tts", {})
+        engine = find_engine(config.get("engine", "auto"))
+        if engine is None:
+            return None
+        return PhraseCache(engine, config.get("voice", DEFAULT_VOICE), config.get("rate", DEFAULT_RATE),
+                           pygame.mixer.get_init(), worker=self.tts_worker.start())
+
+    def spoken_phrase(self, side):
+        """Configured phrase, else the picked spell's name, else the panel's ready text"""
+        phrase = self.extra_settings.get("tts", {}).get("phrases", {}).get(side)
+        if phrase:
+            return phrase
+        preset = getattr(getattr(self, f"{side}_panel"), "preset_var", None)
+        if preset is not None and preset.get() not in ("Select Spell", "Custom", ""):
+            return f"{preset.get()} ready"
+        return READY_TEXT[side]
+
+    def apply_spoken_sound(self, side):
+        """
+        Render this panel's phrase in the background and use it as the alert
+        once it is ready; until then, or without an engine, the default sound plays
+        """
+        setattr(self, f"current_sound_{side}", DEFAULT_SOUNDS[side])
+        try:
+            cache = self.phrase_cache()
+        except ValueError as e:
+            print(f"Speech disabled: {e}")
+            cache = None
+        if cache is None:
+            print("No offline speech engine found (espeak-ng, espeak or pyttsx3), using the default sound")
+            return
+        phrase = self.spoken_phrase(side)
+        def rendered(path, error):
+            if error is not None:
+                print(f"Could not render {phrase!r}, keeping the default sound: {error}")
+            elif getattr(self, f"{side}_panel").sound_var.get() == SPEAK_OPTION:
+                setattr(self, f"current_sound_{side}", path)
+                self.preload_sounds()
+        if not cache.render_async(phrase, rendered):
+            print(f"Speech queue is full, keeping the default sound for {phrase!r}")
+
     def set_sound_left(self, selection):
         """Set the sound for the left panel"""
         try:
@@ -979,19 +1840,16 @@ class TibiaTimerApp:
                         self.left_panel.sound_var.set("Select sound")
                         self.current_sound_left = self.sound_file_left
                     else:
-                        file_size = os.path.getsize(file_path)
-                        if file_size > 102400:
-                            messagebox.showerror("File Too Large", "File must be no more than 100kb.")
-                            self.left_panel.sound_var.set("Select sound")
-                            self.current_sound_left = self.sound_file_left
-                        else:
-                            self.current_sound_left = file_path
-                            self.left_panel.sound_var.set("Custom Sound")
+                        self.apply_custom_sound("left", file_path, self.sound_file_left)
+                        return
                 else:
                     self.left_panel.sound_var.set("Select sound")
                     self.current_sound_left = self.sound_file_left
+            elif selection == SPEAK_OPTION:
+                self.apply_spoken_sound("left")
             else:
                 self.current_sound_left = self.sound_presets_left.get(selection, "")
+            self.preload_sounds()
         except Exception as e:
             print(f"Error in set_sound_left: {e}")
             traceback.print_exc()
@@ -1009,19 +1867,16 @@ class TibiaTimerApp:
                         self.middle_panel.sound_var.set("Select sound")
                         self.current_sound_middle = self.sound_file_left
                     else:
-                        file_size = os.path.getsize(file_path)
-                        if file_size > 102400:
-                            messagebox.showerror("File Too Large", "File must be no more than 100kb.")
-                            self.middle_panel.sound_var.set("Select sound")
-                            self.current_sound_middle = self.sound_file_left
-                        else:
-                            self.current_sound_middle = file_path
-                            self.middle_panel.sound_var.set("Custom Sound")
+                        self.apply_custom_sound("middle", file_path, self.sound_file_left)
+                        return
                 else:
                     self.middle_panel.sound_var.set("Select sound")
                     self.current_sound_middle = self.sound_file_left
+            elif selection == SPEAK_OPTION:
+                self.apply_spoken_sound("middle")
             else:
                 self.current_sound_middle = self.sound_presets_middle.get(selection, "")
+            self.preload_sounds()
         except Exception as e:
             print(f"Error in set_sound_middle: {e}")
             traceback.print_exc()
@@ -1039,52 +1894,38 @@ class TibiaTimerApp:
                         self.right_panel.sound_var.set("Select sound")
                         self.current_sound_right = self.sound_file_right
                     else:
-                        file_size = os.path.getsize(file_path)
-                        if file_size > 102400:
-                            messagebox.showerror("File Too Large", "File must be no more than 100kb.")
-                            self.right_panel.sound_var.set("Select sound")
-                            self.current_sound_right = self.sound_file_right
-                        else:
-                            self.current_sound_right = file_path
-                            self.right_panel.sound_var.set("Custom Sound")
+                        self.apply_custom_sound("right", file_path, self.sound_file_right)
+                        return
                 else:
                     self.right_panel.sound_var.set("Select sound")
                     self.current_sound_right = self.sound_file_right
+            elif selection == SPEAK_OPTION:
+                self.apply_spoken_sound("right")
             else:
                 self.current_sound_right = self.sound_presets_right.get(selection, "")
+            self.preload_sounds()
         except Exception as e:
             print(f"Error in set_sound_right: {e}")
             traceback.print_exc()
 
-    def apply_preset_option(self, selection):
-        """Apply a preset option for timers"""
+    def apply_preset_option(self, side, spell):
+        """A spell was picked from a panel's preset list: use its timer and default sound"""
         try:
-            if selection == "Custom":
-                self.left_panel.timer_entry.delete(0, tk.END)
-                self.current_timer_left = 0
-            else:
-                timer_value = self.preset_options.get(selection)
-                if timer_value is not None:
-                    self.left_panel.timer_entry.delete(0, tk.END)
-                    self.left_panel.timer_entry.insert(0, str(timer_value))
-                    self.current_timer_left = timer_value
+            setattr(self, f"current_timer_{side}", spell.cooldown)
+            panel = getattr(self, f"{side}_panel")
+            if panel.sound_var.get() == SPEAK_OPTION:
+                self.apply_spoken_sound(side)  # speak the new spell's name
+            elif spell.sound in getattr(self, f"sound_presets_{side}"):
+                panel.sound_var.set(spell.sound)
+                getattr(self, f"set_sound_{side}")(spell.sound)
         except Exception as e:
             print(f"Error in apply_preset_option: {e}")
             traceback.print_exc()
 
     def parse_timer(self, timer_str):
-        """Parse a timer string into seconds"""
+        """Parse a timer string ('ss', 'ss.f', 'mm:ss' or 'mm:ss.f') into seconds"""
         try:
-            if ":" in timer_str:
-                parts = timer_str.split(":")
-                if len(parts) == 2:
-                    minutes = int(parts[0])
-                    seconds = int(parts[1])
-                    return minutes * 60 + seconds
-                else:
-                    raise ValueError("Time must be in mm:ss format")
-            else:
-                return int(timer_str)
+            return parse_timer(timer_str)
         except Exception as e:
             print(f"Error parsing timer: {e}")
             traceback.print_exc()
@@ -1101,121 +1942,20 @@ class TibiaTimerApp:
             self.pressed_keys.add(key)
             
             # Build the current combination
-            combo_parts = []
-            
-            # Check for modifiers first
-            if any(k in self.pressed_keys for k in (keyboard.Key.ctrl_l, keyboard.Key.ctrl_r)):
-                combo_parts.append("CTRL")
-            if any(k in self.pressed_keys for k in (keyboard.Key.alt_l, keyboard.Key.alt_r)):
-                combo_parts.append("ALT")
-            if any(k in self.pressed_keys for k in (keyboard.Key.shift_l, keyboard.Key.shift_r)):
-                combo_parts.append("SHIFT")
-
-            # Get the main key
-            if isinstance(key, keyboard.KeyCode):
-                # Handle special virtual key codes
-                vk_map = {
-                    192: "GRAVE",    # Backtick/grave key (US layout)
-                    223: "GRAVE",    # Backtick/grave key (alternate code)
-                    0xC0: "GRAVE",   # Backtick/grave key (hex code)
-                    189: "-",        # Minus
-                    187: "=",        # Equals
-                    219: "[",        # Left bracket
-                    221: "]",        # Right bracket
-                    220: "\\",       # Backslash
-                    186: ";",        # Semicolon
-                    222: "'",        # Quote
-                    188: ",",        # Comma
-                    190: ".",        # Period
-                    191: "/",        # Forward slash
-                    32: "SPACE",     # Space
-                    # Add number keys
-                    48: "0", 49: "1", 50: "2", 51: "3", 52: "4",
-                    53: "5", 54: "6", 55: "7", 56: "8", 57: "9",
-                    # Add numpad keys
-                    96: "0", 97: "1", 98: "2", 99: "3", 100: "4",
-                    101: "5", 102: "6", 103: "7", 104: "8", 105: "9",
-                    # Add alphabet keys
-                    65: "A", 66: "B", 67: "C", 68: "D", 69: "E",
-                    70: "F", 71: "G", 72: "H", 73: "I", 74: "J",
-                    75: "K", 76: "L", 77: "M", 78: "N", 79: "O",
-                    80: "P", 81: "Q", 82: "R", 83: "S", 84: "T",
-                    85: "U", 86: "V", 87: "W", 88: "X", 89: "Y",
-                    90: "Z"
-                }
-
-                # First try to match by virtual key code
-                if hasattr(key, 'vk') and key.vk is not None:
-                    if key.vk in vk_map:
-                        key_name = vk_map[key.vk]
-                        combo_parts.append(key_name)
-                    elif 96 <= key.vk <= 105:  # Numpad numbers
-                        key_name = str(key.vk - 96)
-                        combo_parts.append(key_name)
-                # Then try by character
-                elif hasattr(key, 'char') and key.char:
-                    if key.char in ('`', '~'):
-                        combo_parts.append("GRAVE")
-                    elif key.char.isdigit():
-                        combo_parts.append(key.char)
-                    else:
-                        # For standard letter keys, convert to uppercase and append
-                        key_name = key.char.upper()
-                        combo_parts.append(key_name)
-                        
-            elif isinstance(key, keyboard.Key):
-                # Skip if it's just a modifier key
-                if key in (keyboard.Key.ctrl_l, keyboard.Key.ctrl_r,
-                          keyboard.Key.alt_l, keyboard.Key.alt_r,
-                          keyboard.Key.shift_l, keyboard.Key.shift_r):
-                    return
-                
-                # Map special keys
-                special_keys = {
-                    keyboard.Key.space: "SPACE",
-                    keyboard.Key.enter: "RETURN",
-                    keyboard.Key.esc: "ESCAPE",
-                    keyboard.Key.delete: "DELETE",
-                    keyboard.Key.up: "UP",
-                    keyboard.Key.down: "DOWN",
-                    keyboard.Key.left: "LEFT",
-                    keyboard.Key.right: "RIGHT",
-                }
-                
-                if key in special_keys:
-                    key_name = special_keys[key]
-                    combo_parts.append(key_name)
-                else:
-                    key_name = key.name.upper()
-                    combo_parts.append(key_name)
-
-            # Build the final combo string
-            if combo_parts:
-                combo = "+".join(combo_parts)
-                
+            combo = combo_from_key(key, self.pressed_keys)
+            if combo:
                 # Debug prints for troubleshooting key listening
                 print(f"Pressed keys combo: {combo}")
-                print(f"Current hotkeys - Left: {self.current_hotkey_left}, Middle: {self.current_hotkey_middle}, Right: {self.current_hotkey_right}")
                 
-                # Normalize combo string to uppercase without spaces for comparison
-                normalized_combo = combo.replace(" ", "").upper()
-                normalized_left = self.current_hotkey_left.replace(" ", "").upper()
-                normalized_middle = self.current_hotkey_middle.replace(" ", "").upper()
-                normalized_right = self.current_hotkey_right.replace(" ", "").upper()
-                
-                print(f"Normalized combo: {normalized_combo}")
-                print(f"Normalized hotkeys - Left: {normalized_left}, Middle: {normalized_middle}, Right: {normalized_right}")
-                
-                # Check against saved hotkeys
-                if normalized_combo == normalized_left:
-                    print("Matched left hotkey, starting countdown left")
-                    self.start_countdown_left()
-                elif normalized_combo == normalized_middle:
-                    print("Matched middle hotkey, starting countdown middle")
-                    self.start_countdown_middle()
-                elif normalized_combo == normalized_right:
-                    print("Matched right hotkey, starting countdown right")
-                    self.start_countdown_right()
+                # Advance the binding trie; completed sequences come back as actions.
+                # This is the listener thread: countdowns, widgets and the mixer
+                # belong to the Tk thread, like the log and detector triggers
+                for action in self.hotkey_matcher.feed(normalize_combo(combo), time.monotonic()):
+                    print(f"Matched {action['keys']}, starting countdown {action['timer']}")
+                    try:
+                        self.root.after(0, self.run_hotkey_action, action)
+                    except RuntimeError:
+                        pass  # window already closed
 
         except Exception as e:
             print(f"Error in on_press: {e}")
@@ -1233,13 +1973,15 @@ class TibiaTimerApp:
     def start_countdown_left(self):
         """Start the countdown for the left panel"""
         try:
+            self.wake("hotkey")
             if hasattr(self, "left_panel") and hasattr(self.left_panel, "momentum_var") and self.left_panel.momentum_var.get():
                 current_time = time.time()
                 if current_time - self.last_left_hotkey_time < 2:
                     return
                 if self.is_counting_left and self.countdown_left_job is not None:
                     self.root.after_cancel(self.countdown_left_job)
-                self.countdown_left(self.current_timer_left)
+                self.left_deadline = time.monotonic() + self.current_timer_left
+                self.countdown_left()
                 self.is_counting_left = True
                 self.last_left_hotkey_time = current_time
                 return
@@ -1249,7 +1991,8 @@ class TibiaTimerApp:
                 
             current_time = time.time()
             if current_time - self.last_left_hotkey_time > 3:
-                self.countdown_left(self.current_timer_left)
+                self.left_deadline = time.monotonic() + self.current_timer_left
+                self.countdown_left()
                 self.is_counting_left = True
                 self.last_left_hotkey_time = current_time
         except Exception as e:
@@ -1259,13 +2002,15 @@ class TibiaTimerApp:
     def start_countdown_middle(self):
         """Start the countdown for the middle panel"""
         try:
+            self.wake("hotkey")
             if hasattr(self, "middle_panel") and hasattr(self.middle_panel, "momentum_var") and self.middle_panel.momentum_var.get():
                 current_time = time.time()
                 if current_time - self.last_middle_hotkey_time < 2:
                     return
                 if self.is_counting_middle and self.countdown_middle_job is not None:
                     self.root.after_cancel(self.countdown_middle_job)
-                self.countdown_middle(self.current_timer_middle)
+                self.middle_deadline = time.monotonic() + self.current_timer_middle
+                self.countdown_middle()
                 self.is_counting_middle = True
                 self.last_middle_hotkey_time = current_time
                 return
@@ -1275,7 +2020,8 @@ class TibiaTimerApp:
                 
             current_time = time.time()
             if current_time - self.last_middle_hotkey_time > 3:
-                self.countdown_middle(self.current_timer_middle)
+                self.middle_deadline = time.monotonic() + self.current_timer_middle
+                self.countdown_middle()
                 self.is_counting_middle = True
                 self.last_middle_hotkey_time = current_time
         except Exception as e:
@@ -1285,68 +2031,75 @@ class TibiaTimerApp:
     def start_countdown_right(self):
         """Start the countdown for the right panel"""
         try:
+            self.wake("hotkey")
             if self.is_counting_right and self.countdown_right_job is not None:
                 self.root.after_cancel(self.countdown_right_job)
-            self.countdown_right(self.current_timer_right)
+            self.right_deadline = time.monotonic() + self.current_timer_right
+            self.countdown_right()
             self.is_counting_right = True
         except Exception as e:
             print(f"Error in start_countdown_right: {e}")
             traceback.print_exc()
             
-    def countdown_left(self, time_left):
+    def countdown_left(self):
         """Handle the countdown for the left panel"""
         try:
+            self.wakeup_count += 1
+            time_left = self.left_deadline - time.monotonic()
             if time_left > 0:
                 color = "green" if time_left <= 5 else "black"
-                self.left_panel.countdown_label.config(text=f"Ready in: {time_left}s", foreground=color)
-                self.countdown_left_job = self.root.after(1000, self.countdown_left, time_left - 1)
+                self.left_panel.countdown_label.config(text=f"Ready in: {format_remaining(time_left)}s", foreground=color)
+                self.countdown_left_job = self.root.after(next_tick_delay(time_left), self.countdown_left)
+                self.publish_state("left", "running", time_left)
             else:
                 self.left_panel.countdown_label.config(text="UE Ready")
                 self.left_finished_at = time.time()
-                if self.current_sound_left:
-                    pygame.mixer.music.load(self.current_sound_left)
-                    pygame.mixer.music.play()
+                self.publish_state("left", "expired", 0.0)
+                self.notify_expired("left", "UE Ready")
                 self.is_counting_left = False
+                self.schedule_idle_check()
         except Exception as e:
             print(f"Error in countdown_left: {e}")
             traceback.print_exc()
             
-    def countdown_middle(self, time_left):
+    def countdown_middle(self):
         """Handle the countdown for the middle panel"""
         try:
+            self.wakeup_count += 1
+            time_left = self.middle_deadline - time.monotonic()
             if time_left > 0:
                 color = "green" if time_left <= 5 else "black"
-                self.middle_panel.countdown_label.config(text=f"Ready in: {time_left}s", foreground=color)
-                self.countdown_middle_job = self.root.after(1000, self.countdown_middle, time_left - 1)
+                self.middle_panel.countdown_label.config(text=f"Ready in: {format_remaining(time_left)}s", foreground=color)
+                self.countdown_middle_job = self.root.after(next_tick_delay(time_left), self.countdown_middle)
+                self.publish_state("middle", "running", time_left)
             else:
                 self.middle_panel.countdown_label.config(text="UE Ready")
                 self.middle_finished_at = time.time()
-                if self.current_sound_middle:
-                    pygame.mixer.music.load(self.current_sound_middle)
-                    pygame.mixer.music.play()
+                self.publish_state("middle", "expired", 0.0)
+                self.notify_expired("middle", "UE Ready")
                 self.is_counting_middle = False
+                self.schedule_idle_check()
         except Exception as e:
             print(f"Error in countdown_middle: {e}")
             traceback.print_exc()
             
-    def countdown_right(self, time_left):
+    def countdown_right(self):
         """Handle the countdown for the right panel"""
         try:
+            self.wakeup_count += 1
+            time_left = self.right_deadline - time.monotonic()
             if time_left > 0:
-                minutes = time_left // 60
-                seconds = time_left % 60
                 color = "green" if time_left <= 5 else "black"
-                self.right_panel.countdown_label.config(text=f"Ready in: {minutes:02d}:{seconds:02d}", foreground=color)
-                self.countdown_right_job = self.root.after(1000, self.countdown_right, time_left - 1)
+                self.right_panel.countdown_label.config(text=f"Ready in: {format_remaining(time_left, clock=True)}", foreground=color)
+                self.countdown_right_job = self.root.after(next_tick_delay(time_left), self.countdown_right)
+                self.publish_state("right", "running", time_left)
             else:
                 self.right_panel.countdown_label.config(text="Potion Ready")
                 self.right_finished_at = time.time()
-                if self.current_sound_right:
-                    if (self.left_finished_at is not None and (self.right_finished_at - self.left_finished_at) < 2):
-                        self.root.after(1000, self.play_right_sound)
-                    else:
-                        self.play_right_sound()
+                self.publish_state("right", "expired", 0.0)
+                self.notify_expired("right", "Potion Ready")
                 self.is_counting_right = False
+                self.schedule_idle_check()
         except Exception as e:
             print(f"Error in countdown_right: {e}")
             traceback.print_exc()
@@ -1355,8 +2108,7 @@ class TibiaTimerApp:
         """Play the right panel sound"""
         try:
             if self.current_sound_right:
-                pygame.mixer.music.load(self.current_sound_right)
-                pygame.mixer.music.play()
+                self.play_sound(self.current_sound_right)
         except Exception as e:
             print(f"Error in play_right_sound: {e}")
             traceback.print_exc()
@@ -1370,18 +2122,34 @@ class TibiaTimerApp:
                     self.listener.stop()
                     self.listener = None
                 self.listening_active = False
+            # Close the journal first so the running timers are restored next start
+            self.stop_timer_journal()
             self.cancel_timers()
 
-            # Cancel GIF animations
-            for attr in ["left_after_id", "middle_after_id", "right_after_id"]:
-                if hasattr(self, attr):
-                    self.root.after_cancel(getattr(self, attr))
+            self.stop_control_server()
+            self.stop_state_feed()
+            self.stop_party_sync()
+            self.stop_log_tailer()
+            self.stop_cooldown_detector()
+            self.stop_settings_watcher()
+            self.stop_notifier()
+            self.tts_worker.stop(timeout=0.5)  # a render still running is abandoned
+            if self.cooldown_stats is not None:
+                self.cooldown_stats.flush()
+
+            # Cancel GIF animations and the idle check
+            self.stop_gif_animations()
+            if self.idle_check_job is not None:
+                self.root.after_cancel(self.idle_check_job)
+                self.idle_check_job = None
 
             # Collect current settings
             self.collect_user_settings()
 
-            # Save user settings
+            # Save user settings, then let the I/O worker finish its queue
             self.save_user_settings()
+            default_reporter().flush()
+            self.io_worker.stop(timeout=3.0)
 
         except Exception as e:
             print(f"Error in on_closing: {e}")
@@ -1411,16 +2179,22 @@ class TibiaTimerApp:
 
     def save_user_settings(self):
         """Save user input settings (hotkeys, times, sound selection)"""
-        settings = {
+        settings = dict(self.extra_settings)  # keep sections edited outside the GUI
+        settings.update({
             "hotkeys": self.hotkey_settings,  
             "times": self.timer_settings,
             "sound_selection": self.sound_settings
-        }
-
-        with open(self.user_settings_file, "w") as f:  # ✅ Now `self.user_settings_file` works
-            json.dump(settings, f, indent=4)
-
-        print("User settings saved successfully.")
+        })
+
+        # Serialised here, written by the I/O worker; a newer save replaces a queued one
+        text = json.dumps(settings, indent=4)
+        self.settings_text = text  # the settings watcher skips our own write
+        def saved(_path, error):
+            if error is None:
+                print("User settings saved successfully.")
+        if not self.io_worker.submit(write_file_atomic, self.user_settings_file, text, callback=saved, key="settings"):
+            write_file_atomic(self.user_settings_file, text)
+            print("User settings saved successfully.")
 
     def load_user_settings(self):
         """Load user input settings (hotkeys, times, sound selection) and apply to GUI widgets"""
@@ -1428,46 +2202,130 @@ class TibiaTimerApp:
             if not os.path.exists(self.user_settings_file):
                 return
             with open(self.user_settings_file, "r") as f:
-                settings = json.load(f)
-            # Restore hotkeys
-            hotkeys = settings.get("hotkeys", {})
-            self.left_panel.hotkey_var.set(hotkeys.get("left", ""))
-            self.middle_panel.hotkey_var.set(hotkeys.get("middle", ""))
-            self.right_panel.hotkey_var.set(hotkeys.get("right", ""))
-            # Restore timers
-            timers = settings.get("times", {})
-            self.left_panel.timer_var.set(timers.get("left", ""))
-            self.middle_panel.timer_var.set(timers.get("middle", ""))
-            self.right_panel.timer_var.set(timers.get("right", ""))
-            # Also update the entry widgets
-            self.left_panel.timer_entry.delete(0, tk.END)
-            self.left_panel.timer_entry.insert(0, timers.get("left", ""))
-            self.middle_panel.timer_entry.delete(0, tk.END)
-            self.middle_panel.timer_entry.insert(0, timers.get("middle", ""))
-            self.right_panel.timer_entry.delete(0, tk.END)
-            self.right_panel.timer_entry.insert(0, timers.get("right", ""))
-            # Restore sound selections
-            sounds = settings.get("sound_selection", {})
-            left_sound = sounds.get("left", "Select sound")
-            middle_sound = sounds.get("middle", "Select sound")
-            right_sound = sounds.get("right", "Select sound")
-            self.left_panel.sound_var.set(left_sound)
-            self.middle_panel.sound_var.set(middle_sound)
-            self.right_panel.sound_var.set(right_sound)
-            # Update current_sound_* variables by calling set_sound_* methods
-            self.set_sound_left(left_sound)
-            self.set_sound_middle(middle_sound)
-            self.set_sound_right(right_sound)
+                text = f.read()
+            self.settings_text = text
+            self.apply_user_settings(json.loads(text), initial=True)
         except Exception as e:
             print(f"Error loading user settings: {e}")
             traceback.print_exc()
 
-def get_settings_path():
-    appdata = os.getenv('APPDATA')  # e.g., C:\\Users\\Ben Shelton\\AppData\\Roaming
-    folder = os.path.join(appdata, "TibiaTimer")
-    if not os.path.exists(folder):
-        os.makedirs(folder)
-    return os.path.join(folder, "Tibia Timer Saved settings.json")
+    def apply_user_settings(self, settings, initial=False):
+        """
+        Apply only the hotkeys, timers and sounds that differ from what the
+        panels show now; returns a description of each change. While the
+        listener runs, changed hotkeys and timers take effect immediately by
+        recompiling the hotkey matcher (the listener itself keeps running).
+        """
+        changes = []
+        extra = {key: value for key, value in settings.items()
+                 if key not in ("hotkeys", "times", "sound_selection")}
+        changed = [key for key in sorted(set(extra) | set(self.extra_settings))
+                   if extra.get(key) != self.extra_settings.get(key)]
+        bindings_changed = "bindings" in changed
+        if not initial:
+            changes.extend(key if key in LIVE_SECTIONS else f"{key} (takes effect after a restart)"
+                           for key in changed)
+        self.extra_settings = extra
+        if not initial:
+            self.apply_live_sections(changed)
+
+        hotkeys = settings.get("hotkeys", {})
+        timers = settings.get("times", {})
+        sounds = settings.get("sound_selection", {})
+        hotkeys_changed = False
+        for side in TIMER_SIDES:
+            panel = getattr(self, f"{side}_panel")
+            hotkey = hotkeys.get(side, "")
+            if hotkey != panel.hotkey_var.get():
+                panel.hotkey_var.set(hotkey)
+                changes.append(f"{side} hotkey")
+                if self.listening_active:
+                    setattr(self, f"current_hotkey_{side}", hotkey)
+                    hotkeys_changed = True
+            timer = timers.get(side, "")
+            if timer != panel.timer_entry.get():
+                panel.timer_var.set(timer)  # the entry's textvariable, so this works while it is disabled
+                changes.append(f"{side} timer")
+                if self.listening_active and timer:
+                    try:
+                        # timer_core's parser raises, unlike self.parse_timer which falls back to 0
+                        setattr(self, f"current_timer_{side}", parse_timer(timer))
+                    except ValueError as e:
+                        print(f"Ignoring {side} timer {timer!r}: {e}")
+            sound = sounds.get(side, "Select sound")
+            if sound != "Select sound" and sound not in getattr(self, f"sound_presets_{side}"):
+                # "Custom Sound" is saved without its path and "Custom File..." would open
+                # the file dialog, so anything but a known preset keeps the current sound
+                continue
+            if initial or sound != panel.sound_var.get():
+                panel.sound_var.set(sound)
+                # Only this sound is (re)decoded; unchanged ones stay in the cache
+                getattr(self, f"set_sound_{side}")(sound)
+                if not initial:
+                    changes.append(f"{side} sound")
+
+        if self.listening_active and (hotkeys_changed or bindings_changed):
+            self.hotkey_matcher = self.build_hotkey_matcher()
+            print(f"Recompiled {self.hotkey_matcher.count} hotkey bindings")
+        return changes
+
+    def apply_live_sections(self, changed):
+        """Redo what the reloaded live sections feed into; the rest read them when next used"""
+        if "audio" in changed:
+            self.apply_audio_settings()  # restarts the mixer if the buffer size changed
+        if "tts" in changed:
+            for side in TIMER_SIDES:
+                if getattr(self, f"{side}_panel").sound_var.get() == SPEAK_OPTION:
+                    self.apply_spoken_sound(side)  # new phrase, voice or rate
+        if "prewarn" in changed or "tts" in changed:
+            self.preload_sounds()
+        if "prewarn" in changed or "audio" in changed:
+            for side, deadline in list(self.alert_deadline.items()):
+                self.schedule_alerts(side, deadline)  # requeue running timers' cues
+
+    # ---------------- Settings Hot Reload ----------------
+    def start_settings_watcher(self):
+        """Watch the settings file for edits made outside the app, unless "settings_reload" is disabled"""
+        if not self.extra_settings.get("settings_reload", {}).get("enabled", True):
+            return
+        try:
+            self.settings_watcher = FileWatcher(self.user_settings_file, self.on_settings_file_changed).start()
+        except Exception as e:
+            print(f"Could not watch the settings file: {e}")
+            self.settings_watcher = None
+
+    def stop_settings_watcher(self):
+        if self.settings_watcher is not None:
+            self.settings_watcher.stop()
+            self.settings_watcher = None
+
+    def on_settings_file_changed(self):
+        """Watcher thread: read and parse the file here, apply it on the Tk thread"""
+        try:
+            with open(self.user_settings_file, "r") as f:
+                text = f.read()
+        except OSError:
+            return  # being replaced; the new file shows up as another change
+        if text == self.settings_text:
+            return  # our own save, or an editor touching the file without changing it
+        try:
+            settings = json.loads(text)
+        except ValueError as e:
+            print(f"Ignoring settings file change until it is valid JSON: {e}")
+            return
+        try:
+            self.root.after(0, self.reload_user_settings, text, settings)
+        except RuntimeError:
+            pass  # Tk is shutting down
+
+    def reload_user_settings(self, text, settings):
+        try:
+            self.settings_text = text
+            changes = self.apply_user_settings(settings)
+            print(f"Settings file changed, applied: {', '.join(changes) if changes else 'nothing'}")
+        except Exception as e:
+            print(f"Error in reload_user_settings: {e}")
+            traceback.print_exc()
 
 # Add the main function
 if __name__ == "__main__":
@@ -1475,7 +2333,7 @@ if __name__ == "__main__":
         root = ttk.Window(themename="darkly")
         root.geometry("1220x400")
         def tk_exception_handler(exc, val, tb):
-            global_exception_handler(type(exc), exc, tb)
+            global_exception_handler(exc, val, tb)
         root.report_callback_exception = tk_exception_handler
         app = TibiaTimerApp(root)
         root.mainloop()
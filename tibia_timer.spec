@@ -1,11 +1,28 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os, sys
+sys.path.insert(0, SPECPATH)
+from asset_pack import build_pack, PACK_NAME
+from asset_build import preprocess_assets
+
+# Convert the assets into runtime-ready forms (PCM sounds, frame strips,
+# pre-sized images) and ship them as one indexed archive that the app
+# memory-maps, instead of loose files. Raw files with a fresh prepared form
+# are left out of the pack, so each asset is bundled once.
+#
+# The onefile build still extracts the whole bundle (Python, Tk, SDL and the
+# pack) to a temporary folder on every start, so its size remains a startup
+# cost. Building onedir (COLLECT instead of a single EXE) avoids that if the
+# start time matters more than shipping a single file.
+prepared_dir = preprocess_assets(SPECPATH)
+asset_pack = build_pack([os.path.join(SPECPATH, 'assets'), prepared_dir],
+                        os.path.join(SPECPATH, 'build', PACK_NAME), base_dir=SPECPATH)
 
 
 a = Analysis(
     ['tibia_timer.py'],
     pathex=[],
     binaries=[],
-    datas=[('assets', 'assets')],
+    datas=[(asset_pack, '.')],
     hiddenimports=['pynput.keyboard._win32'],
     hookspath=[],
     hooksconfig={},
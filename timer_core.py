@@ -0,0 +1,144 @@
+import os, sys, json, math
+
+# GUI-free timer core shared by the Tk app and the headless terminal mode.
+# Nothing in here may import tkinter, ttkbootstrap or PIL.
+
+# Helper function to locate the program folder in both dev and PyInstaller environments.
+# Assets themselves are reached through AssetSource (packed archive or loose files).
+def get_base_path():
+    """ Get the folder bundled resources live in, works for dev and for PyInstaller """
+    try:
+        return sys._MEIPASS
+    except Exception:
+        return os.path.dirname(os.path.abspath(__file__))
+
+# ---------------- Countdown Tick Policy ----------------
+# Countdowns run against a monotonic deadline. The label only changes once per
+# second for long timers, and switches to tenths of a second in the last few
+# seconds so short cooldowns stay precise without ticking fast for 10 minutes.
+FAST_TICK_THRESHOLD = 10.0  # seconds left before switching to fast ticks
+FAST_TICK_STEP = 0.1        # seconds per display step near expiry
+SLOW_TICK_STEP = 1.0        # seconds per display step otherwise
+
+def tick_step(remaining):
+    """Return the display resolution (in seconds) for the remaining time"""
+    return FAST_TICK_STEP if remaining <= FAST_TICK_THRESHOLD else SLOW_TICK_STEP
+
+def next_tick_delay(remaining):
+    """
+    Milliseconds until the displayed value next changes (or the timer expires).
+    Aligns ticks to display boundaries so the label never lags the deadline.
+    """
+    if remaining <= 0:
+        return 0
+    step = tick_step(remaining)
+    boundary = (math.ceil(round(remaining / step, 6)) - 1) * step
+    if step == SLOW_TICK_STEP and boundary < FAST_TICK_THRESHOLD:
+        boundary = FAST_TICK_THRESHOLD
+    return max(1, int(math.ceil((remaining - boundary) * 1000)))
+
+def format_remaining(remaining, clock=False):
+    """Format remaining seconds as 'ss'/'s.f' or 'mm:ss'/'mm:ss.f' when clock is set"""
+    step = tick_step(remaining)
+    if step == SLOW_TICK_STEP:
+        total = int(math.ceil(round(remaining, 6)))
+        if clock:
+            return f"{total // 60:02d}:{total % 60:02d}"
+        return str(total)
+    tenths = int(math.ceil(round(remaining * 10, 6)))
+    if clock:
+        return f"{tenths // 600:02d}:{(tenths % 600) // 10:02d}.{tenths % 10}"
+    return f"{tenths // 10}.{tenths % 10}"
+
+# ---------------- Timer Parsing ----------------
+def parse_timer(timer_str):
+    """Parse a timer string ('ss', 'ss.f', 'mm:ss' or 'mm:ss.f') into seconds; raises ValueError"""
+    if ":" in timer_str:
+        parts = timer_str.split(":")
+        if len(parts) == 2:
+            minutes = int(parts[0])
+            seconds = float(parts[1])
+            if seconds < 0 or seconds >= 60:
+                raise ValueError("Seconds must be between 0 and 59.9")
+            return round(minutes * 60 + seconds, 1)
+        else:
+            raise ValueError("Time must be in mm:ss format")
+    else:
+        return round(float(timer_str), 1)
+
+# ---------------- Timers, Sounds and Defaults ----------------
+TIMER_SIDES = ("left", "middle", "right")
+DEFAULT_TIMERS = {"left": 0, "middle": 0, "right": 600}
+READY_TEXT = {"left": "Spell Ready", "middle": "Spell Ready", "right": "Buff Ready"}
+EXPIRED_TEXT = {"left": "UE Ready", "middle": "UE Ready", "right": "Potion Ready"}
+
+SOUND_PRESETS_LEFT = {
+    "Chime": "assets/chime.mp3",
+    "Spell Ready": "assets/Spell Ready.mp3",
+    "Jingle": "assets/Jingle.mp3",
+    "UE Ready": "assets/UEREADY.mp3",
+    "ULU Ready": "assets/ULUready.mp3",
+    "Use Food Buff": "assets/Use Food Buff.mp3"
+}
+SOUND_PRESETS_RIGHT = {
+    "Potion": "assets/Potion.mp3",
+    "Use Buff": "assets/Use Buff.mp3",
+    "Snappy": "assets/Snappy.mp3",
+    "Bullseye Potion": "assets/bullseyepotion.mp3",
+    "MM Potion Ready": "assets/MMPotionready.mp3",
+    "Use Food Buff": "assets/Use Food Buff.mp3"
+}
+SOUND_PRESETS = {"left": SOUND_PRESETS_LEFT, "middle": SOUND_PRESETS_LEFT, "right": SOUND_PRESETS_RIGHT}
+DEFAULT_SOUNDS = {"left": "assets/chime.mp3", "middle": "assets/chime.mp3", "right": "assets/Potion.mp3"}
+
+# ---------------- Settings File ----------------
+def get_data_dir():
+    """Per-user data folder (%APPDATA%\\TibiaTimer, or ~/.local/share/TibiaTimer elsewhere)"""
+    appdata = os.getenv('APPDATA')  # e.g., C:\\Users\\Ben Shelton\\AppData\\Roaming
+    if not appdata:
+        appdata = os.getenv('XDG_DATA_HOME') or os.path.join(os.path.expanduser("~"), ".local", "share")
+    folder = os.path.join(appdata, "TibiaTimer")
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    return folder
+
+def get_settings_path():
+    return os.path.join(get_data_dir(), "Tibia Timer Saved settings.json")
+
+def get_process_rss():
+    """Resident set size of this process in bytes, or None if it cannot be determined"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return None
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def load_settings(path):
+    """Read the saved settings file; returns an empty dict if it does not exist"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
@@ -0,0 +1,187 @@
+import os, time, zlib, struct, threading, traceback
+
+from timer_core import get_data_dir, TIMER_SIDES
+
+# Append-only journal of timer arms, cancels and expiries, so countdowns that
+# were running when the app stopped (or crashed) come back on the next start.
+# Records are fixed size with wall-clock deadlines and a CRC, so a torn write
+# at the end of the file is simply ignored. Appends are batched and fsynced
+# on a background thread, and once the file holds COMPACT_RECORDS records it
+# is rewritten with only the timers still running. Restoring reads records
+# from the end backwards and stops as soon as every timer has been seen.
+JOURNAL_ARM = 1
+JOURNAL_CANCEL = 2
+JOURNAL_EXPIRE = 3
+RECORD = struct.Struct("<BBdd")  # kind, timer index, wall-clock deadline, duration
+RECORD_SIZE = RECORD.size + 4    # plus crc32 of the record
+FLUSH_INTERVAL = 1.0
+COMPACT_RECORDS = 512
+
+def get_journal_path():
+    return os.path.join(get_data_dir(), "timers.journal")
+
+def encode_record(kind, side, deadline, duration):
+    body = RECORD.pack(kind, TIMER_SIDES.index(side), deadline, duration)
+    return body + struct.pack("<I", zlib.crc32(body))
+
+def decode_record(data):
+    """(kind, side, deadline, duration), or None for a torn or corrupt record"""
+    body, (crc,) = data[:RECORD.size], struct.unpack("<I", data[RECORD.size:RECORD_SIZE])
+    if zlib.crc32(body) != crc:
+        return None
+    kind, index, deadline, duration = RECORD.unpack(body)
+    if index >= len(TIMER_SIDES):
+        return None
+    return kind, TIMER_SIDES[index], deadline, duration
+
+def valid_length(data):
+    """Length of data up to the end of its last whole, CRC-valid record"""
+    end = len(data) - len(data) % RECORD_SIZE
+    while end and decode_record(data[end - RECORD_SIZE:end]) is None:
+        end -= RECORD_SIZE
+    return end
+
+def read_latest(path):
+    """{side: (kind, deadline, duration)} from the newest valid record per timer"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return {}
+    latest = {}
+    end = len(data) - len(data) % RECORD_SIZE  # drop a partially written last record
+    for offset in range(end - RECORD_SIZE, -1, -RECORD_SIZE):
+        record = decode_record(data[offset:offset + RECORD_SIZE])
+        if record is None or record[1] in latest:
+            continue
+        kind, side, deadline, duration = record
+        latest[side] = (kind, deadline, duration)
+        if len(latest) == len(TIMER_SIDES):
+            break
+    return latest
+
+# ================= Timer Journal Class =================
+class TimerJournal:
+    def __init__(self, path=None, flush_interval=FLUSH_INTERVAL, compact_records=COMPACT_RECORDS):
+        self.path = path or get_journal_path()
+        self.flush_interval = flush_interval
+        self.compact_records = compact_records
+        self.condition = threading.Condition()
+        self.pending = []
+        self.sent = {}  # side -> (state, deadline) last journaled
+        self.live = {}  # side -> encoded arm record of a running timer (writer thread only)
+        self.file = None
+        self.records = 0
+        self.stopping = False
+        self.thread = None
+        self.fsyncs = 0
+
+    def restore(self, now=None):
+        """
+        Timers still running according to the journal, as {side: (deadline, duration)}
+        with wall-clock deadlines. Call before start().
+        """
+        now = time.time() if now is None else now
+        running = {}
+        for side, (kind, deadline, duration) in read_latest(self.path).items():
+            if kind == JOURNAL_ARM and deadline > now:
+                running[side] = (deadline, duration)
+                self.live[side] = encode_record(JOURNAL_ARM, side, deadline, duration)
+        return running
+
+    def start(self):
+        # Cut off a record torn by a crash, or every record appended after it would be misaligned
+        try:
+            with open(self.path, "r+b") as f:
+                data = f.read()
+                end = valid_length(data)
+                if end != len(data):
+                    print(f"Timer journal: dropping {len(data) - end} bytes of torn or corrupt records")
+                    f.truncate(end)
+        except FileNotFoundError:
+            pass
+        self.file = open(self.path, "ab")
+        self.records = self.file.tell() // RECORD_SIZE
+        self.thread = threading.Thread(target=self.run, name="timer-journal", daemon=True)
+        self.thread.start()
+        return self
+
+    def timer_changed(self, side, state, deadline=None, duration=0.0):
+        """Journal an arm for every new deadline, and a cancel or expiry when the timer stops"""
+        previous = self.sent.get(side)
+        if previous == (state, deadline):
+            return
+        self.sent[side] = (state, deadline)
+        if state == "running":
+            # Deadlines arrive on the monotonic clock; the journal must outlive this process
+            wall_deadline = time.time() + (deadline - time.monotonic())
+            self.append(encode_record(JOURNAL_ARM, side, wall_deadline, duration))
+        elif previous is not None and previous[0] == "running":
+            kind = JOURNAL_EXPIRE if state == "expired" else JOURNAL_CANCEL
+            self.append(encode_record(kind, side, 0.0, 0.0))
+
+    def append(self, record):
+        with self.condition:
+            self.pending.append(record)
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopping:
+                    self.condition.wait()
+                batch, self.pending = self.pending, []
+                stopping = self.stopping
+            if batch:
+                try:
+                    self.write(batch)
+                except Exception as e:
+                    print(f"Error writing timer journal: {e}")
+                    traceback.print_exc()
+            if stopping:
+                return
+            # Group commit: whatever arrives meanwhile shares the next fsync
+            with self.condition:
+                if not self.stopping:
+                    self.condition.wait(self.flush_interval)
+
+    def write(self, batch):
+        self.file.write(b"".join(batch))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.fsyncs += 1
+        self.records += len(batch)
+        for record in batch:
+            kind, side, _deadline, _duration = decode_record(record)
+            if kind == JOURNAL_ARM:
+                self.live[side] = record
+            else:
+                self.live.pop(side, None)
+        if self.records >= self.compact_records:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the journal with only the running timers' arm records"""
+        now = time.time()
+        keep = [record for record in self.live.values() if decode_record(record)[2] > now]
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(keep))
+            f.flush()
+            os.fsync(f.fileno())
+        self.file.close()
+        os.replace(tmp_path, self.path)
+        self.file = open(self.path, "ab")
+        self.records = len(keep)
+
+    def close(self):
+        """Write and fsync everything still pending, then stop the writer"""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(5.0)
+            self.thread = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
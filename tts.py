@@ -0,0 +1,96 @@
+import os, hashlib, shutil, subprocess, importlib.util
+import pygame
+
+from timer_core import get_data_dir
+from asset_build import encode_wav
+from io_worker import IOWorker
+
+# Spoken alerts ("Ice UE ready") from an offline speech engine. A phrase is
+# synthesised once, in the background, as soon as a timer is set to speak,
+# and stored as a WAV in the per-user cache under a key made of the text,
+# engine, voice, rate and mixer format. At expiry it plays like any other
+# sound file, so nothing is synthesised at fire time. Until the WAV exists
+# the timer keeps its default alert. Renders have their own worker, so an
+# engine taking up to RENDER_TIMEOUT never holds up settings writes or sound
+# decoding on the shared I/O worker.
+#
+# Settings section "tts": {"engine": "auto", "voice": "en", "rate": 170,
+#                          "phrases": {"left": "Ice UE ready"}}
+# Engines: espeak-ng or espeak on the PATH, or pyttsx3 (SAPI on Windows).
+SPEAK_OPTION = "Speak Timer Name"
+DEFAULT_VOICE = "en"
+DEFAULT_RATE = 170
+RENDER_TIMEOUT = 30
+TTS_QUEUE = 8
+
+def get_tts_dir():
+    folder = os.path.join(get_data_dir(), "cache", "tts")
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+def find_engine(preferred="auto"):
+    """Path of an espeak binary, "pyttsx3", or None when no engine is installed"""
+    if preferred not in ("auto", "espeak", "pyttsx3"):
+        raise ValueError(f"unknown speech engine {preferred!r}")
+    if preferred in ("auto", "espeak"):
+        for name in ("espeak-ng", "espeak"):
+            path = shutil.which(name)
+            if path:
+                return path
+    if preferred in ("auto", "pyttsx3") and importlib.util.find_spec("pyttsx3") is not None:
+        return "pyttsx3"
+    return None
+
+def synthesize(engine, text, voice, rate, path):
+    """Write the engine's WAV rendering of text to path"""
+    if engine == "pyttsx3":
+        import pyttsx3
+        speaker = pyttsx3.init()
+        speaker.setProperty("rate", rate)
+        if voice and voice != DEFAULT_VOICE:
+            speaker.setProperty("voice", voice)
+        speaker.save_to_file(text, path)
+        speaker.runAndWait()
+    else:
+        subprocess.run([engine, "-v", voice, "-s", str(rate), "-w", path, text],
+                       timeout=RENDER_TIMEOUT, check=True, capture_output=True)
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        raise RuntimeError(f"{os.path.basename(engine)} produced no audio for {text!r}")
+
+# ================= Phrase Cache Class =================
+class PhraseCache:
+    def __init__(self, engine, voice=DEFAULT_VOICE, rate=DEFAULT_RATE, mixer_format=None,
+                 folder=None, worker=None):
+        self.engine = engine
+        self.voice = voice
+        self.rate = int(rate)
+        self.mixer_format = mixer_format  # (frequency, size, channels) to store ready-to-play PCM
+        self.folder = folder or get_tts_dir()
+        self.worker = worker or IOWorker(max_queue=TTS_QUEUE, name="tts").start()
+
+    def path_for(self, text):
+        key = "|".join([os.path.basename(self.engine), self.voice, str(self.rate), str(self.mixer_format), text])
+        return os.path.join(self.folder, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".wav")
+
+    def render(self, text):
+        """Path of the phrase's WAV, synthesising it if it is not cached (blocking)"""
+        path = self.path_for(text)
+        if os.path.exists(path):
+            return path
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            synthesize(self.engine, text, self.voice, self.rate, tmp_path)
+            if self.mixer_format and pygame.mixer.get_init():
+                # Convert to the mixer's format once here instead of on every load
+                pcm = pygame.mixer.Sound(tmp_path).get_raw()
+                with open(tmp_path, "wb") as f:
+                    f.write(encode_wav(pcm, self.mixer_format))
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+    def render_async(self, text, callback):
+        """Render on the I/O worker; callback(path, error) runs via its dispatcher"""
+        return self.worker.submit(self.render, text, callback=callback)